@@ -1,6 +1,10 @@
 import math
 import argparse
 from decimal import Decimal, getcontext
+from mpmath import mp
+from mfn_tablas import omega_fast
+from mfn_espectro import T_precision
+from mfn_perfil import Etapa, agregar_argumento_perfil, configurar_perfil
 
 # Aumentamos precisión para ver convergencia fina
 getcontext().prec = 50
@@ -20,21 +24,6 @@ def explicar_contexto():
       3. Perfectos (6, 28...): Deben tender a 1 a medida que p crece.
     """)
 
-def omega_fast(n):
-    """Calcula Omega(n) = d(2n) - 4 directamente."""
-    # Factorización simple para d(m)
-    m = 2 * n
-    if m == 1: return -3 # Ajuste técnico, d(2)=2 -> 2-4=-2
-    
-    divisors = 0
-    limit = int(math.isqrt(m))
-    for i in range(1, limit + 1):
-        if m % i == 0:
-            divisors += 1
-            if i*i != m:
-                divisors += 1
-    return divisors - 4
-
 def calcular_T(n, max_iter=100):
     """
     Calcula la serie T(n) hasta que el término sea despreciable o max_iter.
@@ -73,7 +62,11 @@ def calcular_T(n, max_iter=100):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Script 2: Analizador Espectral T(n)")
     parser.add_argument("--target", type=int, help="Calcular T(n) para un número específico")
+    parser.add_argument("--digitos", type=int, default=50, help="Dígitos de precisión del modo factorizado")
+    parser.add_argument("--backend", choices=["decimal", "mpmath"], default="decimal", help="Aritmética de precisión")
+    agregar_argumento_perfil(parser)
     args = parser.parse_args()
+    configurar_perfil(args)
 
     explicar_contexto()
 
@@ -99,7 +92,11 @@ if __name__ == "__main__":
     print("-" * 75)
 
     for label, n in targets:
-        val = calcular_T(n)
+        # Modo de precisión: factoriza n una vez en lugar de Omega(n 2^(k-1)) por término
+        with Etapa(f"T({n})"):
+            val, _ = T_precision(n, digitos=args.digitos, backend=args.backend)
+        if args.backend == "mpmath":
+            val = Decimal(mp.nstr(val, args.digitos + 5))
         nota = ""
         
         if n == 4:
@@ -2,6 +2,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import math
 import argparse
+from mfn_tablas import omega_fast
+from mfn_espectro import T_array
+from mfn_sismografo import TP_CONST, K_MF, simular_sismografo_paralelo, ejecutar_sismografo
+from mfn_render import pixeles_figura, reducir_serie, envolvente_desde_bins
+from mfn_perfil import Etapa, Progreso, agregar_argumento_perfil, configurar_perfil
 
 def explicar_contexto():
     print("""
@@ -21,22 +26,9 @@ def explicar_contexto():
     Donde K_MF approx 1.5645  (Dimensión de Equilibrio).
     """)
 
-# Constantes del modelo
-TP_CONST = 2.410142264
-K_MF = 1.5645 
+# Constantes del modelo (compartidas con el motor de escaneo afín)
 PENDIENTE_TEORICA = K_MF
 
-def omega_fast(n):
-    """Requerido para calcular T(n) aproximado."""
-    m = 2 * n
-    divisors = 0
-    limit = int(math.isqrt(m))
-    for i in range(1, limit + 1):
-        if m % i == 0:
-            divisors += 1
-            if i*i != m: divisors += 1
-    return divisors - 4
-
 def estimar_T(n, max_k=10):
     """
     Estimación rápida de T(n) para la simulación dinámica.
@@ -69,9 +61,15 @@ def simular_sismografo(N):
             
     log_trend = np.zeros(N + 1)
     
+    # T(n) de todo el rango de una vez (misma truncación que estimar_T)
+    with Etapa("T(n) tabla", items=N):
+        T_vals, _ = T_array(N, tol=1e-6, max_terminos=10)
+    
     print(f"[INFO] Simulando dinámica hasta n={N}...")
+    progreso = Progreso("sismógrafo", N)
     
     for n in range(3, N + 1):
+        if n & 0xFFFF == 0: progreso(n)
         prev = psi[n-1]
         
         if es_primo[n]:
@@ -79,8 +77,7 @@ def simular_sismografo(N):
             curr = prev / TP_CONST
         else:
             # Regla de Carga
-            # Calculamos T(n) on-the-fly
-            tn = estimar_T(n)
+            tn = T_vals[n]
             curr = prev + tn
             
         psi[n] = curr
@@ -89,35 +86,19 @@ def simular_sismografo(N):
     return psi, log_trend
 
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Script 3: Sismógrafo Dinámico")
-    parser.add_argument("--steps", type=int, default=5000, help="Pasos de simulación")
-    args = parser.parse_args()
-
-    explicar_contexto()
-    
-    psi_vals, trend_vals = simular_sismografo(args.steps)
-    
-    # Graficar
-    x = np.arange(3, args.steps + 1)
-    y_psi = psi_vals[3:]
-    y_trend = trend_vals[3:]
-    
-    plt.figure(figsize=(14, 7))
-    
-    # Gráfica 1: Evolución Absoluta
+def _graficar(x_psi, y_psi, x_trend, y_trend, x_err, y_err, titulo):
+    """Figura de dos paneles a partir de series ya reducidas a resolución de píxel."""
     plt.subplot(2, 1, 1)
-    plt.plot(x, y_psi, label=r"Sismógrafo $\Psi_E(n)$ (Modelo)", color='blue', linewidth=0.8)
-    plt.plot(x, y_trend, label=r"Tendencia Teórica $(K_{MF})\log n$", color='red', linestyle='--')
-    plt.title(f"Dinámica de Tensión Aritmética (n={args.steps})")
+    plt.plot(x_psi, y_psi, label=r"Sismógrafo $\Psi_E(n)$ (Modelo)", color='blue', linewidth=0.8)
+    plt.plot(x_trend, y_trend, label=r"Tendencia Teórica $(K_{MF})\log n$", color='red', linestyle='--')
+    plt.title(titulo)
     plt.ylabel("Amplitud")
     plt.legend()
     plt.grid(True, alpha=0.3)
     
     # Gráfica 2: El Error (La supuesta equivalencia con Riemann)
     plt.subplot(2, 1, 2)
-    error = y_psi - y_trend
-    plt.plot(x, error, color='green', linewidth=0.5)
+    plt.plot(x_err, y_err, color='green', linewidth=0.5)
     plt.axhline(0, color='black', linewidth=1)
     plt.title(r"Residuo $\mathcal{E}_{MF}(n) = \Psi_E - C \log n$ (¿Ruido acotado?)")
     plt.ylabel("Desviación")
@@ -127,3 +108,64 @@ if __name__ == "__main__":
     plt.tight_layout()
     plt.savefig('sismografo_mfn.png')
     print("\n¡Gráfico guardado como 'sismografo_mfn.png' en la misma carpeta!")
+
+
+def graficar_completo(psi_vals, trend_vals, steps, metodo="minmax"):
+    """
+    Gráfica de Psi_E y del residuo. Cada serie se reduce al ancho de la figura
+    (envolvente min/max o LTTB) antes de llegar a matplotlib.
+    """
+    fig = plt.figure(figsize=(14, 7))
+    pixeles = pixeles_figura(fig)
+    
+    x = np.arange(3, steps + 1)
+    y_psi = psi_vals[3:]
+    y_trend = trend_vals[3:]
+    error = y_psi - y_trend
+    
+    _graficar(*reducir_serie(x, y_psi, pixeles, metodo),
+              *reducir_serie(x, y_trend, pixeles, "lttb" if metodo != "completo" else metodo),
+              *reducir_serie(x, error, pixeles, metodo),
+              f"Dinámica de Tensión Aritmética (n={steps})")
+
+
+def graficar_resumen(resumen, steps):
+    """Gráfica desde el resumen decimado (streaming o checkpoint): envolvente min/max por bin."""
+    plt.figure(figsize=(14, 7))
+    x = resumen.centros()
+    _graficar(*envolvente_desde_bins(x, resumen.datos["psi_min"], resumen.datos["psi_max"]),
+              x, K_MF * np.log(x),
+              *envolvente_desde_bins(x, resumen.datos["residuo_min"], resumen.datos["residuo_max"]),
+              f"Dinámica de Tensión Aritmética (n={steps}, {resumen.n_bins} bins)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Script 3: Sismógrafo Dinámico")
+    parser.add_argument("--steps", type=int, default=5000, help="Pasos de simulación")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del escaneo afín (por defecto, todos los núcleos)")
+    parser.add_argument("--secuencial", action="store_true", help="Usa el bucle paso a paso de referencia")
+    parser.add_argument("--streaming", action="store_true", help="Memoria constante: resume la corrida en bins min/max/media")
+    parser.add_argument("--bins", type=int, default=2000, help="Bins del resumen en modo --streaming")
+    parser.add_argument("--checkpoint", type=str, default=None, help="Archivo .npz de checkpoint (reanuda si existe; implica --streaming)")
+    parser.add_argument("--render", choices=["minmax", "lttb", "completo"], default="minmax", help="Reducción de las series antes de graficar")
+    agregar_argumento_perfil(parser)
+    args = parser.parse_args()
+    configurar_perfil(args)
+
+    explicar_contexto()
+    
+    if args.streaming or args.checkpoint:
+        print(f"[INFO] Sismógrafo en streaming hasta n={args.steps}...")
+        with Etapa("sismógrafo", items=args.steps):
+            resumen = ejecutar_sismografo(args.steps, n_bins=args.bins, checkpoint=args.checkpoint)
+        with Etapa("render"):
+            graficar_resumen(resumen, args.steps)
+    else:
+        with Etapa("sismógrafo", items=args.steps):
+            if args.secuencial:
+                psi_vals, trend_vals = simular_sismografo(args.steps)
+            else:
+                print(f"[INFO] Escaneo afín paralelo hasta n={args.steps}...")
+                psi_vals, trend_vals = simular_sismografo_paralelo(args.steps, procesos=args.procesos)
+        with Etapa("render"):
+            graficar_completo(psi_vals, trend_vals, args.steps, args.render)
@@ -1,21 +1,16 @@
 import numpy as np
+import os
 import argparse
 import time
+import tempfile
 from mpmath import mp
+from mfn_inversion import generar_semilla_rapida, push_forward, inversion_segmentada, integrar_J_segmentado, campo_cacheado
+from mfn_primos import pi_en_puntos, raices_enteras, tabla_mobius, pi_lucy, pi_lucy_tabla, pi_real, pi_aprox_batch
+from mfn_perfil import Etapa, agregar_argumento_perfil, configurar_perfil
 
 # Configuración de precisión para cálculos trascendentes
 mp.dps = 50
 
-def generar_semilla_rapida(N):
-    """
-    [EXACTO] Genera la señal base de paridad alpha(n).
-    A(n) = 2 (impar/base), 1 (par).
-    """
-    A = np.ones(N + 1, dtype=np.float64)
-    A[1] = 2.0
-    A[3::2] = 2.0 
-    return A
-
 def inversion_espectral_rapida(A, N):
     """
     [EXACTO] Decodifica Lambda(n) usando convolución recursiva.
@@ -28,103 +23,131 @@ def inversion_espectral_rapida(A, N):
     ln_n[0] = 0.0
     
     B = A * (-ln_n)
-    C = np.zeros(N + 1, dtype=np.float64)
-    inv_A1 = 1.0 / A[1] 
     
     print(f"[INFO] Ejecutando Sismógrafo de Paridad (Convolución) para N={N}...")
     start_time = time.time()
     
-    for i in range(1, N + 1):
-        val = (B[i] + C[i]) * inv_A1
-        C[i] = val
-        
-        # Propagación de la señal a múltiplos (Criba aditiva)
-        if abs(val) < 1e-9: continue
-        
-        if 2 * i <= N:
-            k_limit = N // i
-            multiples = np.arange(2 * i, (k_limit + 1) * i, i)
-            factors_A = A[2 : k_limit + 1]
-            C[multiples] -= val * factors_A
-            
+    # Propagación de la señal a múltiplos (Criba aditiva) con el núcleo compartido
+    C = push_forward(B, A)
+    
     print(f"[INFO] Espectro decodificado en {time.time() - start_time:.2f}s")
     return -C 
 
-def mobius(n):
-    """Calcula mu(n) para limpieza de armónicos."""
-    if n == 1: return 1
-    p = 2
-    count = 0
-    temp = n
-    while p * p <= temp:
-        if temp % p == 0:
-            temp //= p
-            count += 1
-            if temp % p == 0: return 0 # Cuadrado perfecto
-        p += 1
-    if temp > 1: count += 1
-    return -1 if count % 2 == 1 else 1
-
 def correccion_armonicos_exacta(J_counts, N):
     """
     [EXACTO] Inversión de Möbius sobre el potencial discreto J calculado.
     Recupera pi(x) limpiando los ecos p^k de la señal J_MFN.
+    Raíces k-ésimas enteras exactas y mu(k) cribado. Para pocos x usar pi_en_puntos.
     """
     print("[INFO] Aplicando Inversión de Möbius (Limpieza Espectral)...")
     pi_corrected = np.zeros(N + 1)
-    max_k = int(np.log2(N))
+    max_k = int(N).bit_length() - 1
     
-    mu_vals = [mobius(k) for k in range(max_k + 2)]
+    mu_vals = tabla_mobius(max_k + 1)
+    indices = np.arange(N + 1)
     
     for k in range(1, max_k + 1):
         if mu_vals[k] == 0: continue
         
         weight = mu_vals[k] / k
-        indices = np.arange(N + 1)
-        roots = (indices ** (1.0/k)).astype(int)
+        roots = raices_enteras(indices, k)
         pi_corrected += J_counts[roots] * weight
         
     return pi_corrected
 
-def calculo_aproximado_mfn(N):
+def exacto_segmentado(N, memoria_mb, directorio):
+    """
+    [EXACTO] Modo --exactly fuera de núcleo: Lambda y J se vuelcan a archivos
+    mapeados en 'directorio' y la RAM queda acotada por memoria_mb, no por N.
+    Los mapas se sueltan antes de volver, así que 'directorio' puede borrarse después.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    print(f"[INFO] Inversión segmentada (N={N:,}, presupuesto {memoria_mb} MB, en {directorio})...")
+    start_time = time.time()
+    with Etapa("inversión segmentada", items=N):
+        Lambda_mm = inversion_segmentada(N, os.path.join(directorio, f"lambda_{N}.npy"), memoria_mb)
+    print(f"[INFO] Espectro decodificado en {time.time() - start_time:.2f}s")
+    with Etapa("J cumsum", items=N):
+        J_mm = integrar_J_segmentado(Lambda_mm, os.path.join(directorio, f"J_{N}.npy"), memoria_mb)
+    with Etapa("corrección Möbius", items=1):
+        pi_N = float(pi_en_puntos(J_mm, [N])[0])
+    del Lambda_mm, J_mm
+    return pi_N
+
+def calculo_aproximado_mfn(N, inercia=False):
     """
     [APROX] Implementación de la Linearización Esquelética MFN.
     Fórmula: pi(x) ~ Sum_{k=1}^{log2 x} (mu(k)/k) * Li(x^(1/k))
     
     Esta función asume que el potencial J_MFN sigue perfectamente al atractor
     logarítmico (J ~ Li), ignorando la oscilación local de paridad.
-    Complejidad: O(log N) - Instantáneo.
+    Con inercia=True usa J(y) = Li(y) - Tp ln ln y (integral originante del paper).
+    Complejidad: O(log N) - Instantáneo. Para rejillas de x usar pi_aprox_batch.
     """
     print(f"[INFO] Ejecutando Linearización MFN (Esqueleto Logarítmico)...")
     start = time.time()
     
-    total = mp.mpf(0)
-    limit_k = int(np.log2(N))
-    
-    for k in range(1, limit_k + 1):
-        m_k = mobius(k)
-        if m_k == 0: continue
-        
-        # Núcleo de la aproximación: Li(N^(1/k))
-        # Se podría agregar aquí el término de inercia (1 - Tp/t) si se desea mayor precisión en rangos bajos.
-        root = mp.power(N, 1.0/k)
-        term = mp.li(root)
-        
-        total += (m_k / k) * term
+    total = pi_aprox_batch([N], inercia=inercia)[0]
         
     print(f"[INFO] Cálculo completado en {time.time() - start:.6f}s")
     return float(total)
 
+# Por encima de este N la DP de Lucy (O(N^3/4)) deja de ser cuestión de minutos
+LIMITE_PI_EXACTO = 10**14
+
+# Criba de referencia de --curva; por encima, pi(N // i) de una sola tabla de Lucy
+LIMITE_CRIBA_CURVA = 10**7
+
+def graficar_curva_error(N, puntos, inercia=False):
+    """
+    Curva de error de la linearización sobre una rejilla log-espaciada en [10, N]:
+    una sola llamada vectorizada a pi_aprox_batch frente a pi(x) exacto. Hasta
+    LIMITE_CRIBA_CURVA la referencia es una criba; encima, cada punto se ajusta al
+    valor N // i más cercano y pi sale de una única tabla de Lucy en N, O(N^3/4) en
+    total y memoria O(sqrt N). Los N // i se espacian como x^2 / N, así que cerca de
+    N hay menos puntos que los pedidos (N, N/2, N/3, ...).
+    """
+    import matplotlib.pyplot as plt
+    
+    xs = np.unique(np.geomspace(10, N, puntos).astype(np.int64))
+    tope = min(N, LIMITE_CRIBA_CURVA)
+    sieve = np.ones(tope + 1, dtype=bool); sieve[:2] = False
+    for i in range(2, int(tope**0.5) + 1):
+        if sieve[i]: sieve[i*i::i] = False
+    pi_real_x = np.cumsum(sieve)[xs[xs <= tope]]
+    if N > tope:
+        alto = pi_lucy_tabla(N)
+        cocientes = np.clip(np.floor(N / xs[xs > tope]), 1, len(alto) - 1).astype(np.int64)
+        cocientes = np.unique(cocientes)[::-1]
+        print(f"[INFO] Referencia de Lucy: {len(cocientes):,} valores N // i para "
+              f"{int((xs > tope).sum()):,} puntos por encima de {tope:.0e}")
+        xs = np.concatenate((xs[xs <= tope], N // cocientes))
+        pi_real_x = np.concatenate((pi_real_x, alto[cocientes]))
+    
+    plt.figure(figsize=(12, 5))
+    plt.semilogx(xs, pi_aprox_batch(xs) - pi_real_x, label="Esqueleto Li", linewidth=0.8)
+    if inercia:
+        plt.semilogx(xs, pi_aprox_batch(xs, inercia=True) - pi_real_x, label=r"Con inercia $\mathcal{T}_p \ln\ln y$", linewidth=0.8)
+    plt.axhline(0, color='black', linewidth=1)
+    plt.title(f"Error de la Linearización MFN ({len(xs):,} puntos)")
+    plt.xlabel("x")
+    plt.ylabel(r"$\tilde{\pi}_{MF}(x) - \pi(x)$")
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig('error_aprox_mfn.png')
+    print("[INFO] Curva de error guardada como 'error_aprox_mfn.png'")
+
 def get_real_pi(N):
     """Obtiene el valor real de pi(x) para referencia."""
-    if N <= 100_000_000:
+    if N <= 10_000_000:
         print(f"[REF] Cribando para obtener pi(x) real exacto...")
-        sieve = np.ones(N+1, dtype=bool); sieve[:2]=False
-        for i in range(2, int(N**0.5)+1):
-            if sieve[i]: sieve[i*i::i] = False
-        return np.sum(sieve)
+        return pi_real(N)
+    elif N <= LIMITE_PI_EXACTO:
+        print(f"[REF] Conteo combinatorio exacto (DP de Lucy, O(N^3/4))...")
+        return pi_lucy(N)
     else:
-        print(f"[REF] N muy grande, usando Li(x) como proxy de 'Real' (referencia teórica)...")
+        print(f"[REF] N > {LIMITE_PI_EXACTO:.0e}: usando Li(x) como proxy de 'Real' (NO exacto)...")
         return float(mp.li(N))
 
 def main():
@@ -132,36 +155,79 @@ def main():
     parser.add_argument('N', type=int, help='Límite superior N')
     parser.add_argument('--exactly', action='store_true', help='Calcula pi(x) desde cero usando convolución de paridad (Lento, demuestra ontología)')
     parser.add_argument('--aprox', action='store_true', help='Calcula pi(x) usando la fórmula linearizada MFN (Rápido, ingeniería)')
+    parser.add_argument('--memoria', type=float, default=None, help='Presupuesto de RAM en MB para --exactly segmentado (Lambda y J en disco)')
+    parser.add_argument('--inercia', action='store_true', help='Incluye el término de inercia Tp ln ln y en --aprox')
+    parser.add_argument('--curva', type=int, default=0, help='Grafica el error de --aprox en este número de x log-espaciados (N <= 1e14; por encima de 1e7 la referencia es una sola tabla de Lucy y los puntos se ajustan a N // i)')
+    parser.add_argument('--checkpoints', type=int, default=0, help='Imprime pi_MFN en este número de x log-espaciados en [10, N] (modo --exactly, en memoria o con --cache)')
+    parser.add_argument('--cache', type=str, default=None, help='Carpeta de la caché persistente de Lambda/J (reutiliza y extiende campos previos)')
+    parser.add_argument('--directorio', type=str, default=None, help='Carpeta de los archivos mapeados del modo segmentado (se conservan; sin ella se usa una temporal que se borra)')
+    agregar_argumento_perfil(parser)
     
     args = parser.parse_args()
+    configurar_perfil(args)
     N = args.N
     
     if not (args.exactly or args.aprox):
         print("Error: Debes especificar un modo: --exactly (Teoría) o --aprox (Ingeniería).")
         return
+    if args.curva and N > LIMITE_PI_EXACTO:
+        parser.error(f"--curva necesita pi(x) exacto de referencia; sólo hasta N={LIMITE_PI_EXACTO:.0e}")
+    if args.checkpoints and args.exactly and args.memoria and not args.cache:
+        parser.error("--checkpoints no está disponible en el modo segmentado (--memoria sin --cache): "
+                     "J queda en disco y sólo se consulta pi(N); usar --cache para reutilizar J")
 
     # Referencia
-    real_pi = get_real_pi(N)
+    with Etapa("π de referencia"):
+        real_pi = get_real_pi(N)
     results = {}
 
     # --- MODO EXACTO (Knuttzen Ontológico) ---
-    if args.exactly:
-        A = generar_semilla_rapida(N)
-        Lambda_raw = inversion_espectral_rapida(A, N)
-        Lambda_clean = np.where(Lambda_raw > 0.1, Lambda_raw, 0) # Filtro de ruido numérico
+    if args.exactly and args.cache:
+        with Etapa("campo cacheado", items=N):
+            _, J_x = campo_cacheado(N, args.cache, memoria_mb=args.memoria or 512)
+        with Etapa("corrección Möbius", items=1):
+            results['Exacto (Paridad)'] = pi_en_puntos(J_x, [N])[0]
+    elif args.exactly and args.memoria:
+        if args.directorio:
+            results['Exacto (Paridad)'] = exacto_segmentado(N, args.memoria, args.directorio)
+        else:
+            # Sin --directorio los archivos (~16 N bytes) son temporales y se borran al terminar
+            with tempfile.TemporaryDirectory(prefix="mfn_") as directorio:
+                results['Exacto (Paridad)'] = exacto_segmentado(N, args.memoria, directorio)
+    elif args.exactly:
+        with Etapa("semilla", items=N):
+            A = generar_semilla_rapida(N)
+        with Etapa("push-forward", items=N):
+            Lambda_raw = inversion_espectral_rapida(A, N)
         
         # Integración J(x)
-        inv_log = np.zeros(N + 1)
-        inv_log[2:] = 1.0 / np.log(np.arange(2, N + 1))
-        J_x = np.cumsum(Lambda_clean * inv_log)
+        with Etapa("J cumsum", items=N):
+            Lambda_clean = np.where(Lambda_raw > 0.1, Lambda_raw, 0) # Filtro de ruido numérico
+            inv_log = np.zeros(N + 1)
+            inv_log[2:] = 1.0 / np.log(np.arange(2, N + 1))
+            J_x = np.cumsum(Lambda_clean * inv_log)
         
-        pi_exact_arr = correccion_armonicos_exacta(J_x, N)
-        results['Exacto (Paridad)'] = pi_exact_arr[N]
+        # Sólo se consulta pi en N: O(log N) lecturas de J
+        with Etapa("corrección Möbius", items=1):
+            results['Exacto (Paridad)'] = pi_en_puntos(J_x, [N])[0]
+
+    # Checkpoints sobre el J en memoria o cacheado (el segmentado se rechaza arriba)
+    if args.exactly and args.checkpoints:
+        with Etapa("checkpoints", items=args.checkpoints):
+            xs = np.unique(np.geomspace(10, N, args.checkpoints).astype(np.int64))
+            for x, val in zip(xs, pi_en_puntos(J_x, xs)):
+                print(f"[CHECKPOINT] pi_MFN({x:,}) = {val:,.4f}")
 
     # --- MODO APROXIMADO (Ingeniería MFN) ---
     if args.aprox:
-        val_aprox = calculo_aproximado_mfn(N)
-        results['Aprox (Linear)'] = val_aprox
+        with Etapa("linearización"):
+            val_aprox = calculo_aproximado_mfn(N)
+            results['Aprox (Linear)'] = val_aprox
+            if args.inercia:
+                results['Aprox (Inercia)'] = calculo_aproximado_mfn(N, inercia=True)
+        if args.curva:
+            with Etapa("render", items=args.curva):
+                graficar_curva_error(N, args.curva, args.inercia)
 
     # Reporte
     print("\n" + "="*70)
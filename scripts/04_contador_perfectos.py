@@ -1,62 +1,54 @@
 import numpy as np
 import time
+import argparse
+from mfn_inversion import generar_semilla_rapida, push_forward, campo_cacheado, lambda_en_punto
+from mfn_perfil import Etapa, agregar_argumento_perfil, configurar_perfil
 
-def generar_semilla_rapida(N):
-    """
-    Genera la señal de Paridad alpha(n).
-    """
-    # Usamos float64 para máxima precisión en la cancelación
-    A = np.ones(N + 1, dtype=np.float64)
-    A[1] = 2.0
-    A[3::2] = 2.0 
-    return A
+# Mayor N para el que compensa construir el campo completo; por encima, evaluación puntual.
+LIMITE_CAMPO = 10**7
 
-def sismografo_espectral(N):
+def sismografo_espectral(N, cache=None):
     print(f"[MFN] Inicializando Sismógrafo de Paridad (N={N:,})...")
     
-    A = generar_semilla_rapida(N)
+    if cache:
+        # Campo persistente: sólo se calcula la parte que falte en disco
+        start_time = time.time()
+        with Etapa("campo cacheado", items=N):
+            Lambda, _ = campo_cacheado(N, cache)
+        print(f"[MFN] Campo espectral disponible en {time.time() - start_time:.4f}s.")
+        return Lambda
     
-    indices = np.arange(N + 1, dtype=np.float64)
-    indices[0] = 1.0
-    ln_n = np.log(indices)
-    
-    # --- CORRECCIÓN CRÍTICA ---
-    # Teorema 7.2: (Lambda * alpha) = +alpha * ln(n)
-    # Antes teníamos: B = A * (-ln_n)  <-- ERROR DE SIGNO
-    B = A * ln_n  # <-- SIGNO CORRECTO
-    
-    Lambda = B.copy()
-    inv_A1 = 1.0 / A[1] 
+    with Etapa("semilla", items=N):
+        A = generar_semilla_rapida(N)
+        
+        indices = np.arange(N + 1, dtype=np.float64)
+        indices[0] = 1.0
+        ln_n = np.log(indices)
+        
+        # --- CORRECCIÓN CRÍTICA ---
+        # Teorema 7.2: (Lambda * alpha) = +alpha * ln(n)
+        # Antes teníamos: B = A * (-ln_n)  <-- ERROR DE SIGNO
+        B = A * ln_n  # <-- SIGNO CORRECTO
     
     start_time = time.time()
     
-    # Algoritmo Push-Forward (Criba Aditiva)
-    for i in range(1, N + 1):
-        val = Lambda[i] * inv_A1
-        Lambda[i] = val
-        
-        if abs(val) < 1e-9: continue
-        
-        if 2 * i <= N:
-            # Optimización de slicing para velocidad
-            k_limit = N // i
-            multiples = np.arange(2 * i, (k_limit + 1) * i, i)
-            factors_A = A[2 : k_limit + 1]
-            
-            Lambda[multiples] -= val * factors_A
-            
+    # Algoritmo Push-Forward (Criba Aditiva) con el núcleo compartido
+    with Etapa("push-forward", items=N):
+        Lambda = push_forward(B, A)
+    
     elapsed = time.time() - start_time
     print(f"[MFN] Campo espectral generado en {elapsed:.4f}s.")
     return Lambda
 
-def verificar_mersenne(p, Lambda, N_limit):
+def verificar_mersenne(p, Lambda, N_limit, memo=None):
     Mp = 2**p - 1
     
-    if Mp > N_limit:
-        return Mp, 0.0, "OUT_OF_RANGE"
-    
-    tension_real = Lambda[Mp]
-    tension_teorica = np.log(Mp)
+    if Lambda is not None and Mp <= N_limit:
+        tension_real = Lambda[Mp]
+    else:
+        # Fuera del campo: Lambda(Mp) desde el retículo de divisores de Mp
+        tension_real = lambda_en_punto(Mp, memo=memo)
+    tension_teorica = np.log(float(Mp))
     
     # Tolerancia ajustada para punto flotante acumulado
     delta = abs(tension_real - tension_teorica)
@@ -70,38 +62,53 @@ def verificar_mersenne(p, Lambda, N_limit):
         return Mp, tension_real, "RUIDO (Disonante)"
 
 def main():
+    parser = argparse.ArgumentParser(description="Detector de Resonancia de Mersenne")
+    parser.add_argument("--cache", type=str, default=None, help="Carpeta de la caché persistente del campo Lambda")
+    parser.add_argument("--exponentes", type=int, nargs="+", default=[2, 3, 5, 7, 11, 13, 17, 19],
+                        help="Exponentes p a probar (p.ej. 31 61 para M31, M61)")
+    parser.add_argument("--puntual", action="store_true",
+                        help="No construir el campo: evaluar cada Lambda(Mp) sobre sus divisores")
+    agregar_argumento_perfil(parser)
+    args = parser.parse_args()
+    configurar_perfil(args)
+    
     # M19 = 524,287. N=550,000 es suficiente.
-    EXPONENTES_A_PROBAR = [2, 3, 5, 7, 11, 13, 17, 19]
-    max_mersenne = 2**(max(EXPONENTES_A_PROBAR)) - 1
-    N_TEST = int(max_mersenne * 1.05)
+    EXPONENTES_A_PROBAR = args.exponentes
+    en_campo = [p for p in EXPONENTES_A_PROBAR if 2**p - 1 <= LIMITE_CAMPO]
     
-    Lambda_field = sismografo_espectral(N_TEST)
+    Lambda_field, N_TEST = None, 0
+    if en_campo and not args.puntual:
+        max_mersenne = 2**(max(en_campo)) - 1
+        N_TEST = int(max_mersenne * 1.05)
+        Lambda_field = sismografo_espectral(N_TEST, cache=args.cache)
+    memo = {}
     
-    print("\n" + "="*85)
-    print(f"{'EXP (p)':<8} | {'MERSENNE (Mp)':<15} | {'TENSION (L)':<15} | {'ESTADO ESPECTRAL'}")
-    print("="*85)
+    print("\n" + "="*92)
+    print(f"{'EXP (p)':<8} | {'MERSENNE (Mp)':<22} | {'TENSION (L)':<15} | {'ESTADO ESPECTRAL'}")
+    print("="*92)
     
     total_perfectos = 0
     
-    for p in EXPONENTES_A_PROBAR:
-        Mp, tension, estado = verificar_mersenne(p, Lambda_field, N_TEST)
+    with Etapa("Mersenne", items=len(EXPONENTES_A_PROBAR)):
+        for p in EXPONENTES_A_PROBAR:
+            Mp, tension, estado = verificar_mersenne(p, Lambda_field, N_TEST, memo)
         
-        str_tension = f"{tension:.5f}"
+            str_tension = f"{tension:.5f}"
         
-        # Colores ANSI para terminal
-        COLOR_OK = "\033[92m" # Verde
-        COLOR_BAD = "\033[91m" # Rojo
-        COLOR_RESET = "\033[0m"
+            # Colores ANSI para terminal
+            COLOR_OK = "\033[92m" # Verde
+            COLOR_BAD = "\033[91m" # Rojo
+            COLOR_RESET = "\033[0m"
         
-        if "PERFECTO" in estado:
-            total_perfectos += 1
-            print(f"{COLOR_OK}{p:<8} | {Mp:<15} | {str_tension:<15} | >> {estado} <<{COLOR_RESET}")
-        elif "COMPUESTO" in estado:
-            print(f"{COLOR_BAD}{p:<8} | {Mp:<15} | {str_tension:<15} | {estado}{COLOR_RESET}")
-        else:
-            print(f"{p:<8} | {Mp:<15} | {str_tension:<15} | {estado}")
+            if "PERFECTO" in estado:
+                total_perfectos += 1
+                print(f"{COLOR_OK}{p:<8} | {Mp:<22} | {str_tension:<15} | >> {estado} <<{COLOR_RESET}")
+            elif "COMPUESTO" in estado:
+                print(f"{COLOR_BAD}{p:<8} | {Mp:<22} | {str_tension:<15} | {estado}{COLOR_RESET}")
+            else:
+                print(f"{p:<8} | {Mp:<22} | {str_tension:<15} | {estado}")
             
-    print("-" * 85)
+    print("-" * 92)
     print(f"Resultado: {total_perfectos} Números Perfectos detectados.")
     print("Validación: La Tensión coincide con ln(Mp) y M11 colapsa a 0.")
 
@@ -1,61 +1,79 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import math
-
-def calcular_omega_fast(n):
-    # Implementación rápida de d(2n)-4
-    if n == 1: return -2
-    m = 2 * n
-    divs = 0
-    for i in range(1, int(math.isqrt(m)) + 1):
-        if m % i == 0:
-            divs += 1
-            if i*i != m: divs += 1
-    return divs - 4
-
-def radical(n):
-    prod = 1
-    temp = n
-    d = 2
-    while d * d <= temp:
-        if temp % d == 0:
-            prod *= d
-            while temp % d == 0:
-                temp //= d
-        d += 1
-    if temp > 1:
-        prod *= temp
-    return prod
-
-def test_abc_tension(limit):
+import argparse
+from matplotlib.colors import LogNorm
+from mfn_abc import buscar_ternas_abc, agregar_ternas_abc, ternas_alta_calidad
+from mfn_perfil import Etapa, agregar_argumento_perfil, configurar_perfil
+
+def test_abc_tension(limit, procesos=None):
+    """
+    Ternas coprimas (a, b, c = a + b), c <= limit, como array (log rad(abc), Omega_ABC).
+    Motor dirigido por tablas (Omega y rad cribados) repartido en un pool de procesos.
+    """
     print(f"Buscando ternas ABC hasta {limit}...")
-    resultados = [] # (Radical, Tension)
-    
-    # Búsqueda simple (se puede optimizar)
-    for a in range(1, limit):
-        for b in range(a, limit):
-            c = a + b
-            if c > limit: break
-            
-            # Condición: coprimos
-            if math.gcd(a, b) != 1: continue
-            
-            # Calcular métricas MFN
-            tens_a = calcular_omega_fast(a)
-            tens_b = calcular_omega_fast(b)
-            tens_c = calcular_omega_fast(c)
-            
-            tension_total = tens_a + tens_b + tens_c
-            rad_abc = radical(a * b * c)
-            
-            # Log-Log para comparar con la conjetura estándar
-            resultados.append((math.log(rad_abc), tension_total))
-
-    return np.array(resultados)
-
-# Uso:
-# data = test_abc_tension(2000)
-# plt.scatter(data[:,0], data[:,1], alpha=0.5, s=2)
-# plt.xlabel("log(rad(abc))")
-# plt.ylabel("Tensión Armónica Total Omega_ABC")
-# plt.savefig('mfn_abc.png')
\ No newline at end of file
+    return buscar_ternas_abc(limit, procesos)
+
+def graficar_abc(resumen, salida='mfn_abc.png'):
+    """Nube ABC desde los agregados: densidad 2D, media, cuantil 0.99 y máximo por bin."""
+    t = resumen.tensiones()
+    fig, ax = plt.subplots(figsize=(12, 7))
+    densidad = np.where(resumen.hist > 0, resumen.hist, np.nan).T
+    malla = ax.pcolormesh(resumen.bordes(), np.append(t, t[-1] + 1) - 0.5, densidad,
+                          norm=LogNorm(), cmap='viridis', shading='flat')
+    fig.colorbar(malla, ax=ax, label='Ternas por celda')
+
+    x = resumen.centros()
+    ax.plot(x, resumen.media(), color='white', lw=1.2, label='Media')
+    ax.plot(x, resumen.cuantil(0.99), color='orange', lw=1, label='Cuantil 0.99')
+    ax.plot(x, resumen.maximo(), color='red', lw=1, label='Máximo')
+
+    ax.set_xlabel("log(rad(abc))")
+    ax.set_ylabel("Tensión Armónica Total Omega_ABC")
+    ax.set_title(f"Tensión ABC (c <= {resumen.limite:,}, {int(resumen.cuenta().sum()):,} ternas)")
+    ax.legend(loc='upper left')
+    plt.tight_layout()
+    plt.savefig(salida)
+    print(f"[INFO] Gráfico guardado en {salida}")
+
+def mostrar_alta_calidad(ternas, n_filas=25):
+    """Tabla de las ternas de mayor calidad con su tensión Omega_ABC."""
+    print("\n" + "="*96)
+    print(f"{'a':<16} | {'b':<16} | {'c':<16} | {'rad(abc)':<16} | {'CALIDAD':<9} | {'OMEGA_ABC'}")
+    print("="*96)
+    for a, b, c, rad, calidad, tension in ternas[:n_filas]:
+        print(f"{a:<16} | {b:<16} | {c:<16} | {rad:<16} | {calidad:<9.5f} | {tension}")
+    print("-" * 96)
+    print(f"[INFO] {len(ternas):,} ternas por encima del umbral de calidad.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de Tensión ABC (agregados en streaming)")
+    parser.add_argument("limite", type=int, help="Cota superior de c = a + b")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--bins", type=int, default=200, help="Bins en log(rad(abc))")
+    parser.add_argument("--volcado", type=str, default=None, help="Carpeta donde volcar las ternas crudas en archivos .npy")
+    parser.add_argument("--salida", type=str, default="mfn_abc.png", help="Imagen de salida")
+    parser.add_argument("--alta-calidad", action="store_true",
+                        help="Sólo ternas con c > rad(abc)^q, generadas desde números suaves (limite hasta ~10^12)")
+    parser.add_argument("--primo-max", type=int, default=7, help="Mayor primo de los números suaves (--alta-calidad)")
+    parser.add_argument("--calidad", type=float, default=1.0, help="Calidad mínima q = ln c / ln rad(abc) (--alta-calidad)")
+    agregar_argumento_perfil(parser)
+    args = parser.parse_args()
+    configurar_perfil(args)
+
+    if args.alta_calidad:
+        with Etapa("ternas alta calidad") as etapa:
+            ternas = ternas_alta_calidad(args.limite, args.primo_max, args.calidad)
+            etapa.items = len(ternas)
+        mostrar_alta_calidad(ternas)
+        return
+
+    print(f"Buscando ternas ABC hasta {args.limite}...")
+    with Etapa("ternas ABC") as etapa:
+        resumen = agregar_ternas_abc(args.limite, args.procesos, args.bins, args.volcado)
+        etapa.items = int(resumen.cuenta().sum())
+    print(f"[INFO] {int(resumen.cuenta().sum()):,} ternas coprimas; tensión máxima {np.nanmax(resumen.maximo()):.0f}")
+    with Etapa("render"):
+        graficar_abc(resumen, args.salida)
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,67 @@
 import numpy as np
-from scipy.integrate import quad
+import argparse
+import time
+import scipy.special
+from mfn_zeta import zeta_knuttzen
+from mfn_perfil import Etapa, agregar_argumento_perfil, configurar_perfil
 
-def zeta_knuttzen_approx(s):
-    """
-    Calcula la función Zeta de Riemann utilizando la aproximación de Knuttzen
-    (Teorema 6.7 y Definición 6.6).
-    Válido para Re(s) > 1.
-    """
-    # 1. Esqueleto Algebraico (Z_estruc)
-    # Z_estruc = (2 + (3 / 2^(s+1)) * ((s+1)/(s-1))) / (2 - 2^-s)
-    
-    num_alg = 2 + (3 / (2**(s + 1))) * ((s + 1) / (s - 1))
-    den_norm = 2 - 2**(-s)
-    
-    z_estruc = num_alg / den_norm
-    
-    # 2. Corrección Integral de Onda (I_cos)
-    # I_cos(s) = s * integral(2 -> inf) de [ R(x) / x^(s+1) ] dx
-    # Aproximación trigonométrica: R(x) approx -0.5 * cos(pi * x)
-    
-    def integrand_real(x, s_val):
-        # Parte Real del integrando: Re[ -0.5 * s * cos(pi*x) * x^(-s-1) ]
-        term = -0.5 * np.cos(np.pi * x) * (x ** (-s_val - 1))
-        return np.real(term * s_val) # Multiplicamos por s dentro o fuera
+def tabla_prueba(test_values, onda):
+    print(f"{'s':<10} | {'Zeta(s) Knuttzen':<25} | {'Zeta(s) Scipy (Ref)':<25}")
+    print("-" * 65)
 
-    def integrand_imag(x, s_val):
-        # Parte Imaginaria
-        term = -0.5 * np.cos(np.pi * x) * (x ** (-s_val - 1))
-        return np.imag(term * s_val)
+    z_k_vals = zeta_knuttzen(np.array(test_values, dtype=complex), onda)
 
-    # Integramos numéricamente de 2 a Infinito
-    # Usamos un límite superior grande finito para la integral oscilatoria numérica
-    limit_inf = 10000 
-    
-    int_real, _ = quad(integrand_real, 2, limit_inf, args=(s,))
-    int_imag, _ = quad(integrand_imag, 2, limit_inf, args=(s,))
-    
-    i_cos = int_real + 1j * int_imag
-    
-    # Término de corrección final
-    correction = i_cos / den_norm
-    
-    return z_estruc + correction
+    for s_val, z_k in zip(test_values, z_k_vals):
+        z_ref = scipy.special.zeta(s_val)
 
-# --- PRUEBA DEL SCRIPT ---
-# Valores de prueba (Problema de Basilea s=2 y un valor complejo)
-test_values = [2, 3, 2 + 10j, 4]
+        # Formateo para mostrar parte real si imag es despreciable
+        if np.isclose(np.imag(z_k), 0, atol=1e-4) and isinstance(s_val, (int, float)):
+            z_k_str = f"{np.real(z_k):.6f}"
+            z_ref_str = f"{np.real(z_ref):.6f}"
+        else:
+            z_k_str = f"{z_k:.4f}"
+            z_ref_str = f"{z_ref:.4f}"
 
-print(f"{'s':<10} | {'Zeta(s) Knuttzen':<25} | {'Zeta(s) Scipy (Ref)':<25}")
-print("-" * 65)
+        print(f"{str(s_val):<10} | {z_k_str:<25} | {z_ref_str:<25}")
 
-import scipy.special
+def barrido_malla(n_puntos, onda, sigma=(1.1, 4.0), t_max=50.0, semilla=0):
+    """Evalúa el esqueleto + onda en una malla aleatoria de s complejos y la compara con scipy."""
+    rng = np.random.default_rng(semilla)
+    s = rng.uniform(*sigma, n_puntos) + 1j * rng.uniform(-t_max, t_max, n_puntos)
+
+    t0 = time.time()
+    with Etapa(f"zeta Knuttzen ({onda})", items=n_puntos):
+        z_k = zeta_knuttzen(s, onda)
+    t_mfn = time.time() - t0
+
+    t0 = time.time()
+    with Etapa("zeta de referencia", items=n_puntos):
+        z_ref = scipy.special.zeta(s)
+    t_ref = time.time() - t0
+
+    error = np.abs(z_k - z_ref)
+    print(f"\n[INFO] Malla de {n_puntos:,} puntos (onda '{onda}'): {t_mfn:.2f}s  (scipy.special.zeta: {t_ref:.2f}s)")
+    print(f"[INFO] |Knuttzen - Zeta|: media {error.mean():.4e}, mediana {np.median(error):.4e}, máx {error.max():.4e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Aproximación de Riemann: esqueleto algebraico + corrección de onda")
+    parser.add_argument("--onda", choices=["coseno", "cuadrada"], default="coseno",
+                        help="R(x) ~ -0.5 cos(pi x) (forma cerrada) o la onda cuadrada exacta")
+    parser.add_argument("--malla", type=int, default=0, help="Puntos de una malla aleatoria a comparar con scipy (p.ej. 1000000)")
+    agregar_argumento_perfil(parser)
+    args = parser.parse_args()
+    configurar_perfil(args)
+
+    # --- PRUEBA DEL SCRIPT ---
+    # Valores de prueba (Problema de Basilea s=2 y un valor complejo)
+    with Etapa("tabla de prueba", items=4):
+        tabla_prueba([2, 3, 2 + 10j, 4], args.onda)
+
+    if args.onda == "coseno":
+        print("\nNota: La pequeña discrepancia se debe a la aproximación R(x) ~ -0.5cos(pi*x).")
 
-for s_val in test_values:
-    z_k = zeta_knuttzen_approx(s_val)
-    z_ref = scipy.special.zeta(s_val)
-    
-    # Formateo para mostrar parte real si imag es despreciable
-    if np.isclose(np.imag(z_k), 0, atol=1e-4) and isinstance(s_val, (int, float)):
-        z_k_str = f"{np.real(z_k):.6f}"
-        z_ref_str = f"{np.real(z_ref):.6f}"
-    else:
-        z_k_str = f"{z_k:.4f}"
-        z_ref_str = f"{z_ref:.4f}"
-        
-    print(f"{str(s_val):<10} | {z_k_str:<25} | {z_ref_str:<25}")
+    if args.malla:
+        barrido_malla(args.malla, args.onda)
 
-print("\nNota: La pequeña discrepancia se debe a la aproximación R(x) ~ -0.5cos(pi*x)")
-print("y a la integración numérica finita.")
+if __name__ == "__main__":
+    main()
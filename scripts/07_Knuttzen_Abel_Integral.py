@@ -1,11 +1,22 @@
+import sys
 import numpy as np
+import argparse
+import time
 import matplotlib
-matplotlib.use('Qt5Agg')
 import matplotlib.pyplot as plt
+from functools import lru_cache
+from mpmath import mp
 from matplotlib.widgets import Slider, Button
+from mfn_zeta import estructura_algebraica, I_osc_exacta, cota_cvz, tabla_log_k, terminos_cvz
+from mfn_zeta import escanear_paralelo, verificar_escaneo, FRACCION_PASO
+from mfn_perfil import Etapa, agregar_argumento_perfil, configurar_perfil
 
 # --- MOTOR MATEMÁTICO (Basado en Knuttzen, Sec 6) ---
 
+# Rango de los sliders (también el de la malla del mapa de calor).
+RANGO_SIGMA = (0.4, 1.0)
+RANGO_T = (10.0, 20.0)
+
 def calcular_estructura(sigma, t):
     """
     Calcula el término estructural S(s).
@@ -16,128 +27,267 @@ def calcular_estructura(sigma, t):
     term = 2 + 1.5 * (2**(-s)) * ((s + 1) / (s - 1))
     return term
 
-def calcular_oscilacion(sigma, t, n_terms=50000):
+@lru_cache(maxsize=4096)
+def _oscilacion_acelerada(sigma, t):
+    return complex(I_osc_exacta(complex(sigma, t)))
+
+def calcular_oscilacion(sigma, t, n_terms=None):
     """
     Calcula la integral oscilatoria I_osc(s) usando series vectorizadas.
     Ref: Teorema 6.6
-    La integral de R(x) se convierte en una suma alternada de diferencias de potencias.
+    La integral de R(x) se convierte en una suma alternada de diferencias de potencias:
+        0.5 * sum_{k>=2} (-1)^(k-1) (k^-s - (k+1)^-s) = eta(s) - 1 + 2^(-s-1)
+
+    Por defecto la serie alternada se acelera con Cohen-Villegas-Zagier: unas decenas
+    de términos con truncamiento < 1e-15 garantizado (cota total con redondeo en
+    cota_oscilacion). Los valores se cachean por (sigma, t). Con n_terms se usa la
+    suma directa truncada original.
     """
+    if n_terms is None:
+        return _oscilacion_acelerada(float(sigma), float(t))
+
     s = complex(sigma, t)
-    
-    # Vectorización para velocidad (Cálculo instantáneo de 50k términos)
-    k = np.arange(2, n_terms + 2)
-    
     # R(x) alterna signo: -0.5, 0.5, -0.5... comenzando en k=2
-    # El coeficiente es 0.5 * (-1)^(k-1)
-    signs = 0.5 * ((-1.0)**(k - 1))
-    
+    # El coeficiente es 0.5 * (-1)^(k-1); potencias desde la tabla precalculada de ln k
+    log_k = tabla_log_k(n_terms + 2)
+    potencias = np.exp(-s * log_k[1:])          # k^-s para k = 2..n_terms+2
+    signs = np.where(np.arange(n_terms) % 2 == 0, -0.5, 0.5)
     # Integral analítica por tramos: (k^-s - (k+1)^-s)
-    # Nota: El factor 's' de la integral se cancela con el denominador de la integración
-    diffs = (k**(-s)) - ((k + 1)**(-s))
-    
-    # Suma total
-    val = np.sum(signs * diffs)
-    
-    # Ajuste fino: I_osc debe oponerse a S(s). 
-    # En la identidad (S + I = 0), I = -S. Graficamos I tal cual sale de la fórmula.
-    return val
+    return np.sum(signs * (potencias[:-1] - potencias[1:]))
+
+def cota_oscilacion(sigma, t):
+    """(términos CVZ usados, cota garantizada del error) para I_osc(sigma + i t)."""
+    s = complex(sigma, t)
+    n = int(terminos_cvz(s))
+    return n, float(cota_cvz(s, n))
+
+def balance_malla(sigmas, ts):
+    """
+    [LOTE] |S(s)| - |I_osc(s)| sobre la malla sigmas x ts (filas = t), en una sola
+    evaluación vectorizada. Positivo = la estructura domina (estable).
+    """
+    S_grid, T_grid = np.meshgrid(sigmas, ts)
+    s = S_grid + 1j * T_grid
+    return np.abs(estructura_algebraica(s)) - np.abs(I_osc_exacta(s))
 
 # --- INTERFAZ GRÁFICA ---
 
-fig = plt.figure(figsize=(12, 6))
-fig.suptitle('Simulador de Resonancia de Knuttzen (Balance de Energía)', fontsize=14)
-
-# Configuración de los subgráficos
-ax_polar = fig.add_subplot(1, 2, 1) # Plano Complejo
-ax_bar = fig.add_subplot(1, 2, 2)   # Barras de Energía
-
-# Espacio para controles sliders
-plt.subplots_adjust(bottom=0.25)
-
-# --- VALORES INICIALES (Primer Cero de Riemann) ---
-init_sigma = 0.5
-init_t = 14.1347
-
-# --- FUNCIÓN DE DIBUJO ---
-def update(val):
-    sigma = s_sigma.val
-    t = s_t.val
-    
-    # 1. Cálculos
-    S_val = calcular_estructura(sigma, t)
-    I_val = calcular_oscilacion(sigma, t)
-    
-    # 2. Plot Polar (Vectores)
-    ax_polar.clear()
-    ax_polar.set_title(f"Plano Complejo (s = {sigma:.2f} + {t:.2f}i)")
-    
-    # Vector Azul: Estructura (S)
-    ax_polar.arrow(0, 0, S_val.real, S_val.imag, head_width=0.05, head_length=0.1, fc='blue', ec='blue', label='Estructura (Barrera)')
-    
-    # Vector Rojo: Oscilación (I_osc)
-    # IMPORTANTE: Para que haya balance cero, S + I = 0, por lo tanto I debe llegar al origen partiendo de S
-    # O visualmente: S y -I deben ser iguales. 
-    # Graficamos I_osc desde el origen para comparar magnitudes y fases.
-    ax_polar.arrow(0, 0, I_val.real, I_val.imag, head_width=0.05, head_length=0.1, fc='red', ec='red', label='Oscilación (I_osc)')
-    
-    # Círculo de referencia unitario y límites
-    limit = 2.5
-    ax_polar.set_xlim(-limit, limit)
-    ax_polar.set_ylim(-limit, limit)
-    ax_polar.grid(True)
-    ax_polar.legend(loc='upper right')
-    ax_polar.axhline(0, color='black', lw=0.5)
-    ax_polar.axvline(0, color='black', lw=0.5)
-
-    # 3. Plot Barras (Energía/Magnitud)
-    ax_bar.clear()
-    ax_bar.set_title("Comparación de Magnitud (Energía)")
-    
-    mag_S = abs(S_val)
-    mag_I = abs(I_val)
-    
-    bars = ax_bar.bar(['Estructura |S|', 'Oscilación |I|'], [mag_S, mag_I], color=['blue', 'red'])
-    ax_bar.set_ylim(0, 2.5)
-    
-    # Etiquetas de valor
-    ax_bar.text(0, mag_S + 0.05, f"{mag_S:.4f}", ha='center', color='blue', fontweight='bold')
-    ax_bar.text(1, mag_I + 0.05, f"{mag_I:.4f}", ha='center', color='red', fontweight='bold')
-    
-    # Indicador de Desigualdad
-    if mag_S > mag_I + 0.01: # Margen de tolerancia
-        status = "ESTABLE (HR Compatible)\nLa oscilación NO alcanza la barrera."
-        col = "green"
-    elif abs(mag_S - mag_I) < 0.05:
-        status = "RESONANCIA (Cero Posible)\nEnergías igualadas."
-        col = "orange"
-    else:
-        status = "INESTABLE (Contraejemplo)\nLa oscilación rompe la barrera."
-        col = "red"
-        
-    ax_bar.text(0.5, 2.0, status, ha='center', bbox=dict(facecolor='white', edgecolor=col, boxstyle='round'))
-
-# --- CONTROLES (SLIDERS) ---
-# Eje Sigma (Parte Real)
-ax_sigma = plt.axes([0.15, 0.1, 0.65, 0.03], facecolor='lightgoldenrodyellow')
-s_sigma = Slider(ax_sigma, 'Sigma (σ)', 0.4, 1.0, valinit=init_sigma, valstep=0.01)
-
-# Eje T (Parte Imaginaria - Altura)
-ax_t = plt.axes([0.15, 0.05, 0.65, 0.03], facecolor='lightgoldenrodyellow')
-s_t = Slider(ax_t, 'Tiempo (t)', 10.0, 20.0, valinit=init_t)
-
-# Conectar actualización
-s_sigma.on_changed(update)
-s_t.on_changed(update)
-
-# Botón de Reset al Cero de Riemann
-resetax = plt.axes([0.8, 0.025, 0.1, 0.04])
-button = Button(resetax, 'Ir al Cero', hovercolor='0.975')
-
-def reset(event):
-    s_sigma.set_val(0.5)
-    s_t.set_val(14.1347)
-button.on_clicked(reset)
-
-# Inicializar
-update(None)
-plt.show()
+def construir_interfaz(resolucion=(121, 201)):
+    fig = plt.figure(figsize=(17, 6))
+    fig.suptitle('Simulador de Resonancia de Knuttzen (Balance de Energía)', fontsize=14)
+
+    # Configuración de los subgráficos
+    ax_polar = fig.add_subplot(1, 3, 1) # Plano Complejo
+    ax_bar = fig.add_subplot(1, 3, 2)   # Barras de Energía
+    ax_mapa = fig.add_subplot(1, 3, 3)  # Mapa de calor |S| - |I|
+
+    # Espacio para controles sliders
+    plt.subplots_adjust(bottom=0.25)
+
+    # --- MAPA DE CALOR (se calcula una vez; el slider sólo mueve el marcador) ---
+    sigmas = np.linspace(*RANGO_SIGMA, resolucion[0])
+    ts = np.linspace(*RANGO_T, resolucion[1])
+    balance = balance_malla(sigmas, ts)
+    limite_color = np.abs(balance).max()
+    malla = ax_mapa.imshow(balance, cmap='RdBu', origin='lower', aspect='auto',
+                           extent=(*RANGO_SIGMA, *RANGO_T), vmin=-limite_color, vmax=limite_color)
+    ax_mapa.contour(sigmas, ts, balance, levels=[0.0], colors='black', linewidths=0.8)
+    fig.colorbar(malla, ax=ax_mapa, label='|S| - |I|')
+    ax_mapa.set_title("Balance |S| - |I| en la malla (σ, t)")
+    ax_mapa.set_xlabel('σ')
+    ax_mapa.set_ylabel('t')
+    marcador, = ax_mapa.plot([], [], 'o', color='gold', markeredgecolor='black', markersize=9)
+
+    # --- VALORES INICIALES (Primer Cero de Riemann) ---
+    init_sigma = 0.5
+    init_t = 14.1347
+
+    # --- CONTROLES (SLIDERS) ---
+    # Eje Sigma (Parte Real)
+    ax_sigma = plt.axes([0.15, 0.1, 0.65, 0.03], facecolor='lightgoldenrodyellow')
+    s_sigma = Slider(ax_sigma, 'Sigma (σ)', *RANGO_SIGMA, valinit=init_sigma, valstep=0.01)
+
+    # Eje T (Parte Imaginaria - Altura)
+    ax_t = plt.axes([0.15, 0.05, 0.65, 0.03], facecolor='lightgoldenrodyellow')
+    s_t = Slider(ax_t, 'Tiempo (t)', *RANGO_T, valinit=init_t)
+
+    # --- FUNCIÓN DE DIBUJO ---
+    def update(val):
+        sigma = s_sigma.val
+        t = s_t.val
+
+        # 1. Cálculos
+        S_val = calcular_estructura(sigma, t)
+        I_val = calcular_oscilacion(sigma, t)
+        n_cvz, cota = cota_oscilacion(sigma, t)
+
+        # 2. Plot Polar (Vectores)
+        ax_polar.clear()
+        ax_polar.set_title(f"Plano Complejo (s = {sigma:.2f} + {t:.2f}i)")
+
+        # Vector Azul: Estructura (S)
+        ax_polar.arrow(0, 0, S_val.real, S_val.imag, head_width=0.05, head_length=0.1, fc='blue', ec='blue', label='Estructura (Barrera)')
+
+        # Vector Rojo: Oscilación (I_osc)
+        # IMPORTANTE: Para que haya balance cero, S + I = 0, por lo tanto I debe llegar al origen partiendo de S
+        # O visualmente: S y -I deben ser iguales.
+        # Graficamos I_osc desde el origen para comparar magnitudes y fases.
+        ax_polar.arrow(0, 0, I_val.real, I_val.imag, head_width=0.05, head_length=0.1, fc='red', ec='red', label='Oscilación (I_osc)')
+
+        # Círculo de referencia unitario y límites
+        limit = 2.5
+        ax_polar.set_xlim(-limit, limit)
+        ax_polar.set_ylim(-limit, limit)
+        ax_polar.grid(True)
+        ax_polar.legend(loc='upper right')
+        ax_polar.axhline(0, color='black', lw=0.5)
+        ax_polar.axvline(0, color='black', lw=0.5)
+
+        # 3. Plot Barras (Energía/Magnitud)
+        ax_bar.clear()
+        ax_bar.set_title("Comparación de Magnitud (Energía)")
+
+        mag_S = abs(S_val)
+        mag_I = abs(I_val)
+
+        ax_bar.bar(['Estructura |S|', 'Oscilación |I|'], [mag_S, mag_I], color=['blue', 'red'])
+        ax_bar.set_ylim(0, 2.5)
+
+        # Etiquetas de valor
+        ax_bar.text(0, mag_S + 0.05, f"{mag_S:.4f}", ha='center', color='blue', fontweight='bold')
+        ax_bar.text(1, mag_I + 0.05, f"{mag_I:.4f}", ha='center', color='red', fontweight='bold')
+        ax_bar.text(0.5, 2.4, f"CVZ: {n_cvz} términos, error < {cota:.1e}", ha='center', fontsize=8)
+
+        # Indicador de Desigualdad
+        if mag_S > mag_I + 0.01: # Margen de tolerancia
+            status = "ESTABLE (HR Compatible)\nLa oscilación NO alcanza la barrera."
+            col = "green"
+        elif abs(mag_S - mag_I) < 0.05:
+            status = "RESONANCIA (Cero Posible)\nEnergías igualadas."
+            col = "orange"
+        else:
+            status = "INESTABLE (Contraejemplo)\nLa oscilación rompe la barrera."
+            col = "red"
+
+        ax_bar.text(0.5, 2.0, status, ha='center', bbox=dict(facecolor='white', edgecolor=col, boxstyle='round'))
+
+        # 4. Marcador en el mapa de calor (sin recalcular la malla)
+        marcador.set_data([sigma], [t])
+
+    # Conectar actualización
+    s_sigma.on_changed(update)
+    s_t.on_changed(update)
+
+    # Botón de Reset al Cero de Riemann
+    resetax = plt.axes([0.8, 0.025, 0.1, 0.04])
+    button = Button(resetax, 'Ir al Cero', hovercolor='0.975')
+
+    def reset(event):
+        s_sigma.set_val(0.5)
+        s_t.set_val(14.1347)
+    button.on_clicked(reset)
+
+    # Inicializar
+    update(None)
+    # Los widgets deben sobrevivir mientras la ventana esté abierta
+    fig._controles = (s_sigma, s_t, button)
+    return fig
+
+# --- ESCÁNER SIN INTERFAZ ---
+
+def conteo_ceros_riemann(T):
+    """N(T) de Riemann-von Mangoldt: T/2pi ln(T/2pi e) + 7/8."""
+    return T / (2 * np.pi) * np.log(T / (2 * np.pi * np.e)) + 7 / 8
+
+def ceros_conocidos(K):
+    """Ordenadas de los primeros K ceros no triviales de zeta (mpmath)."""
+    return np.array([float(mp.zetazero(n).imag) for n in range(1, K + 1)])
+
+def escanear_linea(sigmas, t0, t1, procesos=None, fraccion=FRACCION_PASO, K_ceros=0, salida=None):
+    """
+    Catálogo de puntos de resonancia |S| = |I_osc| para cada sigma en [t0, t1).
+    Con K_ceros > 0 cada punto se compara con el cero conocido de zeta más cercano.
+    """
+    with Etapa("ceros conocidos", items=K_ceros):
+        ceros = ceros_conocidos(K_ceros) if K_ceros else None
+    filas = []
+    for sigma in sigmas:
+        inicio = time.time()
+        with Etapa(f"escaneo sigma={sigma:g}") as etapa:
+            t_res, pendiente = escanear_paralelo(sigma, t0, t1, procesos, fraccion=fraccion)
+            etapa.items = len(t_res)
+        S = np.abs(estructura_algebraica(sigma + 1j * t_res))
+        print(f"[INFO] sigma={sigma:.3f}: {len(t_res):,} resonancias en [{t0:g}, {t1:g}) "
+              f"({time.time() - inicio:.2f}s); N(T) de Riemann en el rango: "
+              f"{conteo_ceros_riemann(t1) - conteo_ceros_riemann(max(t0, 2 * np.pi * np.e)):,.1f}")
+
+        cercano = np.full(len(t_res), np.nan)
+        if ceros is not None and len(ceros):
+            j = np.clip(np.searchsorted(ceros, t_res), 1, len(ceros) - 1)
+            izq, der = ceros[j - 1], ceros[j]
+            cercano = np.where(np.abs(t_res - izq) <= np.abs(t_res - der), izq, der)
+            cercano[t_res > ceros[-1] + 1] = np.nan
+            dist = np.abs(t_res - cercano)
+            if np.isfinite(dist).any():
+                print(f"[INFO]   distancia al cero más cercano: mediana {np.nanmedian(dist):.4f}, máx {np.nanmax(dist):.4f}")
+        filas.append(np.column_stack((np.full(len(t_res), sigma), t_res, pendiente, S, cercano)))
+
+    catalogo = np.concatenate(filas) if filas else np.zeros((0, 5))
+    if salida:
+        np.savetxt(salida, catalogo, delimiter=",", fmt="%.12g",
+                   header="sigma,t,pendiente,abs_S,cero_cercano", comments="")
+        print(f"[INFO] Catálogo guardado en {salida} ({len(catalogo):,} filas)")
+    return catalogo
+
+def verificar_catalogo(catalogo, t0, t1):
+    """
+    Control de regresión del escáner: por cada sigma, raíces del catálogo por
+    intervalo de Gram frente a un barrido denso. Devuelve las discrepancias.
+    """
+    discrepancias = []
+    for sigma in np.unique(catalogo[:, 0]):
+        with Etapa(f"verificación sigma={sigma:g}"):
+            bordes, escaneo, denso = verificar_escaneo(sigma, t0, t1, catalogo[catalogo[:, 0] == sigma, 1])
+        malas = np.flatnonzero(escaneo != denso)
+        print(f"[INFO] sigma={sigma:.3f}: {len(bordes) - 1:,} intervalos de Gram, "
+              f"{escaneo.sum():,} raíces escaneadas frente a {denso.sum():,} en el barrido denso")
+        for i in malas:
+            discrepancias.append(f"sigma={sigma:g}, t en [{bordes[i]:.4f}, {bordes[i + 1]:.4f}): "
+                                 f"{escaneo[i]} escaneadas, {denso[i]} en el barrido denso")
+    return discrepancias
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador de Resonancia de Knuttzen")
+    parser.add_argument("--escanear", type=float, nargs=2, metavar=("T0", "T1"),
+                        help="Sin interfaz: catálogo de resonancias |S| = |I| con t en [T0, T1)")
+    parser.add_argument("--sigma", type=float, nargs="+", default=[0.5], help="Valores de sigma a escanear")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos para repartir el eje t")
+    parser.add_argument("--fraccion", type=float, default=FRACCION_PASO,
+                        help="Paso base como fracción del espaciado medio entre ceros de zeta")
+    parser.add_argument("--ceros", type=int, default=0, help="Comparar con los primeros K ceros conocidos de zeta")
+    parser.add_argument("--salida", type=str, default="resonancias.csv", help="CSV del catálogo")
+    parser.add_argument("--verificar", action="store_true",
+                        help="Compara el catálogo con un barrido denso por intervalos de Gram (sale con 1 si difieren)")
+    agregar_argumento_perfil(parser)
+    args = parser.parse_args()
+    configurar_perfil(args)
+
+    if args.escanear:
+        catalogo = escanear_linea(args.sigma, *args.escanear, args.procesos, args.fraccion, args.ceros, args.salida)
+        if args.verificar:
+            discrepancias = verificar_catalogo(catalogo, *args.escanear)
+            if discrepancias:
+                print("[ALERTA] El escáner no coincide con el barrido denso:")
+                for d in discrepancias:
+                    print(f"  - {d}")
+                return 1
+            print("[INFO] Verificación por intervalos de Gram sin discrepancias.")
+        return 0
+
+    matplotlib.use('Qt5Agg')
+    with Etapa("interfaz"):
+        construir_interfaz()
+    plt.show()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,129 +1,109 @@
 import numpy as np
+import argparse
+import io
+import time
 import matplotlib.pyplot as plt
+from mfn_formato import KnuttzenDecoder, CodificadorCausal, CANALES
+from mfn_perfil import Etapa, agregar_argumento_perfil, configurar_perfil
 
-class KnuttzenDecoder:
-    def __init__(self):
-        # Definición de la Paleta Humana Estándar (K-STD)
-        # Mapea Pendiente (d(i)) -> Matiz Base (RGB Normalizado)
-        self.palette = {
-            1: [1.0, 1.0, 1.0],  # Pendiente 1: Estructura/Neutro (Blanco)
-            2: [0.0, 0.8, 1.0],  # Pendiente 2: Primos/Fundamental (Cian/Azul)
-            3: [1.0, 0.0, 0.3],  # Pendiente 3: Cuadrados/Singularidad (Rojo/Magenta)
-            4: [1.0, 0.8, 0.0],  # Pendiente 4+: Compuestos/Denso (Amarillo/Oro)
-        }
+# --- GENERACIÓN DE ARTEFACTO DE PRUEBA (SIMULACIÓN DE ARCHIVO .KNT) ---
+# Creamos una imagen sintética de 100x100
+# Fondo: Pendiente 1 (Cielo/Vacío)
+# Planeta: Pendiente 2 (Primos/Materia Pura)
+# Núcleo: Pendiente 3 (Cuadrados/Energía)
+# Anillos: Pendiente 4 (Compuestos/Polvo)
 
-    def _get_odd_seed(self, n):
-        """Extrae la semilla impar 'i' de n = i * 2^k."""
-        if n == 0: return 0
-        while n % 2 == 0:
-            n //= 2
-        return n
+def generar_artefacto(tamano=100):
+    """Artefacto sintético tamano x tamano (uint64), escalado desde el diseño de 100x100."""
+    escala = tamano / 100
+    y, x = np.mgrid[0:tamano, 0:tamano]
+    center_x = center_y = tamano / 2
+    dist = np.sqrt((x - center_x)**2 + (y - center_y)**2) / escala
 
-    def _get_slope_nabla(self, n):
-        """
-        Calcula la Pendiente Estructural Rigurosa: Nabla = d(i).
-        Esta es la constante física de la familia.
-        """
-        i_seed = self._get_odd_seed(n)
-        if i_seed == 1: return 1
-        
-        divisors = 0
-        limit = int(np.sqrt(i_seed))
-        for k in range(1, limit + 1):
-            if i_seed % k == 0:
-                divisors += 2 if k*k != i_seed else 1
-        return divisors
+    # Lógica de construcción del archivo (Encoder implícito)
+    # La 'k' (potencia de 2) simula sombras/profundidad
+    k_shadow = (dist / 5).astype(np.uint64)
 
-    def _calculate_intensity(self, n, slope):
-        """
-        Calcula la Intensidad basada en la 'Fricción con el Campo'.
-        Identidad General: Omega = (k+2)*slope - 4.
-        A mayor Omega, menor T(n) (más oscuro).
-        """
-        # Calcular k (Profundidad de iteración)
-        k = 0
-        temp = n
-        while temp > 0 and temp % 2 == 0:
-            temp //= 2
-            k += 1
-            
-        # Resonancia Total (Masa Estructural)
-        omega = (k + 2) * slope - 4
-        
-        # Modelo de Decaimiento de Señal (Simulación de T(n))
-        # La señal decae hiperbólicamente con la resistencia del campo.
-        # Factor 0.08 calibrado para rango dinámico visual.
-        intensity = 1.0 / (1.0 + 0.08 * omega)
-        return np.clip(intensity, 0, 1)
+    # Espacio (Gris/Neutro) -> i = 1, fondo más oscuro
+    artifact = np.uint64(1) << (k_shadow + np.uint64(2))
+    # Anillos (Dorado/Compuestos) -> i = 15
+    anillos = (35 < dist) & (dist < 45)
+    artifact[anillos] = np.uint64(15) << k_shadow[anillos]
+    # Planeta (Azul/Primos) -> i = 3
+    planeta = (10 <= dist) & (dist < 30)
+    artifact[planeta] = np.uint64(3) << k_shadow[planeta]
+    # Núcleo (Rojo/Cuadrados) -> i = 9 (3^2), menos sombra: núcleo brillante
+    nucleo = dist < 10
+    artifact[nucleo] = np.uint64(9) << (k_shadow[nucleo] // np.uint64(2))
+    return artifact
 
-    def decode(self, artifact_matrix):
-        """Procesa la matriz de enteros y devuelve imagen RGB."""
-        height, width = artifact_matrix.shape
-        img_rgb = np.zeros((height, width, 3))
+def ida_y_vuelta_codec(canal, datos):
+    """Codifica y decodifica 'datos' por flujos en memoria; informa MB/s y exactitud."""
+    codec = CodificadorCausal(canal)
+    print(f"[INFO] Canal '{canal}' (Nabla={codec.nabla}): núcleos {codec.nucleos.tolist()}, "
+          f"profundidades {codec.profundidades.tolist()}")
 
-        print(f"Decodificando Artefacto de {width}x{height}...")
+    palabras = io.BytesIO()
+    inicio = time.time()
+    with Etapa("codificar", items=len(datos)):
+        codec.codificar_flujo(io.BytesIO(datos), palabras)
+    t_cod = time.time() - inicio
 
-        for y in range(height):
-            for x in range(width):
-                n = artifact_matrix[y, x]
-                
-                # 1. Determinación de Clase (¿QUÉ ES?)
-                slope = self._get_slope_nabla(n)
-                
-                # 2. Determinación de Estado (¿CÓMO ESTÁ?)
-                intensity = self._calculate_intensity(n, slope)
-                
-                # 3. Mapeo a Interfaz Humana
-                # Si la pendiente es > 4, la tratamos como clase 4 (Compuesta densa)
-                palette_key = slope if slope <= 3 else 4
-                base_color = np.array(self.palette[palette_key])
-                
-                # Síntesis del Píxel: Color Base * Intensidad
-                final_pixel = base_color * intensity
-                img_rgb[y, x] = final_pixel
+    recuperado = io.BytesIO()
+    palabras.seek(0)
+    inicio = time.time()
+    with Etapa("decodificar", items=len(datos)):
+        codec.decodificar_flujo(palabras, recuperado)
+    t_dec = time.time() - inicio
 
-        return img_rgb
+    mb = len(datos) / 1e6
+    exacto = recuperado.getvalue() == datos
+    print(f"[INFO] {mb:.2f} MB -> {palabras.tell() / 1e6:.2f} MB de palabras uint64")
+    print(f"[INFO] Codificación: {mb / t_cod:.1f} MB/s | Decodificación: {mb / t_dec:.1f} MB/s | "
+          f"Ida y vuelta exacta: {'SÍ' if exacto else 'NO'}")
+    return exacto
 
-# --- GENERACIÓN DE ARTEFACTO DE PRUEBA (SIMULACIÓN DE ARCHIVO .KNT) ---
-# Creamos una imagen sintética de 100x100
-# Fondo: Pendiente 1 (Cielo/Vacío)
-# Planeta: Pendiente 2 (Primos/Materia Pura)
-# Núcleo: Pendiente 3 (Cuadrados/Energía)
-# Anillos: Pendiente 4 (Compuestos/Polvo)
+def main():
+    parser = argparse.ArgumentParser(description="Decodificador Espectral de Knuttzen")
+    parser.add_argument("--tamano", type=int, default=100, help="Lado del artefacto sintético")
+    parser.add_argument("--salida", type=str, default=None, help="Guardar la imagen en vez de mostrarla")
+    parser.add_argument("--codec", type=str, default=None, metavar="ARCHIVO",
+                        help="Ida y vuelta de un archivo por el Protocolo de Codificación Causal")
+    parser.add_argument("--codec-mb", type=float, default=None, metavar="MB",
+                        help="Ida y vuelta de MB megabytes aleatorios (benchmark del codec)")
+    parser.add_argument("--canal", choices=list(CANALES), default="primo", help="Canal del codec")
+    agregar_argumento_perfil(parser)
+    args = parser.parse_args()
+    configurar_perfil(args)
 
-artifact = np.zeros((100, 100), dtype=object)
-center_x, center_y = 50, 50
-
-for y in range(100):
-    for x in range(100):
-        dx, dy = x - center_x, y - center_y
-        dist = np.sqrt(dx**2 + dy**2)
-        
-        # Lógica de construcción del archivo (Encoder implícito)
-        # La 'k' (potencia de 2) simula sombras/profundidad
-        k_shadow = int(dist / 5) 
-        
-        if dist < 10: 
-            # Núcleo (Rojo/Cuadrados) -> i = 9 (3^2)
-            n = 9 * (2 ** (k_shadow // 2)) # Menos sombra, núcleo brillante
-        elif dist < 30:
-            # Planeta (Azul/Primos) -> i = 3
-            n = 3 * (2 ** k_shadow)
-        elif 35 < dist < 45:
-            # Anillos (Dorado/Compuestos) -> i = 15
-            n = 15 * (2 ** k_shadow)
+    if args.codec or args.codec_mb:
+        if args.codec:
+            with open(args.codec, "rb") as f:
+                datos = f.read()
         else:
-            # Espacio (Gris/Neutro) -> i = 1
-            n = 1 * (2 ** (k_shadow + 2)) # Fondo más oscuro
-            
-        artifact[y, x] = int(n)
+            datos = np.random.default_rng(0).integers(0, 256, int(args.codec_mb * 1e6), dtype=np.uint8).tobytes()
+        ida_y_vuelta_codec(args.canal, datos)
+        return
+
+    with Etapa("artefacto", items=args.tamano ** 2):
+        artifact = generar_artefacto(args.tamano)
+
+    # --- EJECUCIÓN ---
+    decoder = KnuttzenDecoder()
+    inicio = time.time()
+    with Etapa("decode", items=args.tamano ** 2):
+        imagen_recuperada = decoder.decode(artifact)
+    print(f"[INFO] Decodificado en {time.time() - inicio:.2f}s")
 
-# --- EJECUCIÓN ---
-decoder = KnuttzenDecoder()
-imagen_recuperada = decoder.decode(artifact)
+    with Etapa("render"):
+        plt.figure(figsize=(8, 8))
+        plt.imshow(imagen_recuperada)
+        plt.title("Visualización del Decodificador Espectral de Knuttzen\n(Datos generados puramente por estructura aritmética)")
+        plt.axis('off')
+        if args.salida:
+            plt.savefig(args.salida)
+    if not args.salida:
+        plt.show()
 
-plt.figure(figsize=(8, 8))
-plt.imshow(imagen_recuperada)
-plt.title("Visualización del Decodificador Espectral de Knuttzen\n(Datos generados puramente por estructura aritmética)")
-plt.axis('off')
-plt.show()
+if __name__ == "__main__":
+    main()
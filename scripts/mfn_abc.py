@@ -0,0 +1,387 @@
+import os
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from mfn_tablas import criba_omega, criba_radical, factorizar, primos_hasta, omega_fast
+from mfn_perfil import Progreso
+
+# Tablas del proceso actual (las rellena _iniciar_trabajador en cada proceso del pool).
+_tablas = {"limite": -1, "omega": None, "log_rad": None}
+
+
+def tablas_abc(limite):
+    """
+    [EXACTO] Tablas Omega(n) y ln rad(n) para 0 <= n <= limite, cribadas una vez.
+    Para a, b coprimos (y c = a + b) rad(abc) = rad(a) rad(b) rad(c), así que
+    ln rad(abc) es una suma de tres consultas sin factorizar el producto.
+    """
+    if _tablas["limite"] < limite:
+        rad = criba_radical(limite)
+        rad[0] = 1
+        _tablas["omega"] = criba_omega(limite).astype(np.int64)
+        _tablas["log_rad"] = np.log(rad.astype(np.float64))
+        _tablas["limite"] = limite
+    return _tablas["omega"], _tablas["log_rad"]
+
+
+def _iniciar_trabajador(limite):
+    tablas_abc(limite)
+
+
+def ternas_con_a(a, limite):
+    """
+    [EXACTO] Todas las ternas coprimas (a, b, c = a + b) con a <= b y c <= limite.
+    Devuelve (b, ln rad(abc), Omega(a) + Omega(b) + Omega(c)) como arrays.
+
+    La coprimalidad se marca tachando los múltiplos de cada primo de a en el rango
+    de b (un paso estridado por primo), en lugar de un gcd por pareja.
+    """
+    omega, log_rad = tablas_abc(limite)
+    b = np.arange(a, limite - a + 1)
+    if len(b) == 0:
+        vacio = np.zeros(0)
+        return b, vacio, vacio.astype(np.int64)
+
+    coprimo = np.ones(len(b), dtype=bool)
+    for p in factorizar(a):
+        coprimo[(-a) % p::p] = False
+    b = b[coprimo]
+    c = a + b
+
+    log_rad_abc = log_rad[a] + log_rad[b] + log_rad[c]
+    tension = omega[a] + omega[b] + omega[c]
+    return b, log_rad_abc, tension
+
+
+def _buscar_rango(args):
+    """Ternas para todos los a de [a0, a1), en orden: bloque (ln rad, tensión)."""
+    a0, a1, limite = args
+    partes = [ternas_con_a(a, limite)[1:] for a in range(a0, a1)]
+    if not partes:
+        return np.zeros((0, 2))
+    log_rad = np.concatenate([p[0] for p in partes])
+    tension = np.concatenate([p[1] for p in partes])
+    return np.column_stack((log_rad, tension.astype(np.float64)))
+
+
+def rangos_a(limite, n_rangos):
+    """
+    Reparte a en [1, limite // 2] en n_rangos intervalos contiguos de trabajo similar
+    (el número de b para cada a es ~ limite - 2a).
+    """
+    a_max = limite // 2
+    if a_max < 1:
+        return []
+    trabajo = np.cumsum(np.maximum(limite - 2 * np.arange(1, a_max + 1) + 1, 1))
+    cortes = np.searchsorted(trabajo, trabajo[-1] * np.arange(1, n_rangos) / n_rangos) + 1
+    bordes = np.unique(np.concatenate(([1], cortes, [a_max + 1])))
+    return [(int(lo), int(hi)) for lo, hi in zip(bordes[:-1], bordes[1:])]
+
+
+def buscar_ternas_abc(limite, procesos=None, rangos_por_proceso=4):
+    """
+    [EXACTO] Búsqueda ABC dirigida por tablas: todas las ternas coprimas a <= b,
+    c = a + b <= limite, como array (ln rad(abc), Omega_ABC) en el orden (a, b).
+    Los rangos de a se reparten en un pool de procesos; cada proceso criba sus
+    tablas una sola vez al arrancar.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    rangos = rangos_a(limite, procesos * rangos_por_proceso)
+    args = [(lo, hi, limite) for lo, hi in rangos]
+
+    if procesos == 1:
+        bloques = [_buscar_rango(a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                                 initargs=(limite,)) as pool:
+            bloques = list(pool.map(_buscar_rango, args))
+
+    if not bloques:
+        return np.zeros((0, 2))
+    return np.concatenate(bloques)
+
+
+# --- MODO STREAMING (agregados de memoria constante) ---
+
+# Omega(n) >= -2 para n >= 1, así que Omega_ABC >= -6: origen del eje de tensión.
+TENSION_MINIMA = -6
+
+# Puntos por archivo al volcar las ternas crudas a disco.
+PUNTOS_POR_ARCHIVO = 1 << 22
+
+
+class ResumenABC:
+    """
+    Histograma 2D en línea de Omega_ABC frente a ln rad(abc): bins uniformes en
+    ln rad sobre [0, 3 ln limite] y un bin por valor entero de la tensión.
+    Como la tensión es entera, cuenta, media, máximo y cuantiles por bin salen
+    exactos del histograma. Memoria O(n_bins * rango de tensión).
+    """
+
+    def __init__(self, limite, n_bins=200):
+        self.limite = limite
+        self.n_bins = n_bins
+        self.x_max = 3 * np.log(max(limite, 2))
+        self.hist = np.zeros((n_bins, 16), dtype=np.int64)
+
+    def bins(self, log_rad):
+        idx = (np.asarray(log_rad) * (self.n_bins / self.x_max)).astype(np.int64)
+        return np.minimum(idx, self.n_bins - 1)
+
+    def _ampliar(self, n_tension):
+        if n_tension > self.hist.shape[1]:
+            self.hist = np.pad(self.hist, ((0, 0), (0, n_tension - self.hist.shape[1])))
+
+    def actualizar(self, log_rad, tension):
+        """Acumula un bloque de ternas (un solo bincount sobre el índice 2D)."""
+        if len(tension) == 0:
+            return
+        t = np.asarray(tension, dtype=np.int64) - TENSION_MINIMA
+        self._ampliar(int(t.max()) + 1)
+        ancho = self.hist.shape[1]
+        plano = np.bincount(self.bins(log_rad) * ancho + t, minlength=self.hist.size)
+        self.hist += plano.reshape(self.hist.shape)
+
+    def combinar(self, otro):
+        """Suma otro resumen de la misma rejilla (p.ej. el de otro proceso)."""
+        self._ampliar(otro.hist.shape[1])
+        self.hist[:, :otro.hist.shape[1]] += otro.hist
+        return self
+
+    def tensiones(self):
+        return TENSION_MINIMA + np.arange(self.hist.shape[1])
+
+    def bordes(self):
+        return np.linspace(0, self.x_max, self.n_bins + 1)
+
+    def centros(self):
+        b = self.bordes()
+        return 0.5 * (b[:-1] + b[1:])
+
+    def cuenta(self):
+        return self.hist.sum(axis=1)
+
+    def media(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (self.hist @ self.tensiones()) / self.cuenta()
+
+    def maximo(self):
+        """Tensión máxima por bin (NaN en bins vacíos)."""
+        ocupado = self.hist > 0
+        ultimo = self.hist.shape[1] - 1 - np.argmax(ocupado[:, ::-1], axis=1)
+        return np.where(ocupado.any(axis=1), self.tensiones()[ultimo], np.nan)
+
+    def cuantil(self, q):
+        """Cuantil q (0..1) exacto de la tensión por bin (NaN en bins vacíos)."""
+        acumulado = np.cumsum(self.hist, axis=1)
+        total = acumulado[:, -1]
+        objetivo = np.ceil(q * total).clip(min=1)
+        idx = (acumulado < objetivo[:, None]).sum(axis=1)
+        idx = np.minimum(idx, self.hist.shape[1] - 1)
+        return np.where(total > 0, self.tensiones()[idx], np.nan)
+
+
+class VolcadoABC:
+    """
+    Vuelca ternas crudas (ln rad, tensión) a archivos .npy de tamaño fijo:
+    <directorio>/<prefijo>_<parte>.npy, con columnas float64. Memoria O(puntos_por_archivo).
+    """
+
+    def __init__(self, directorio, prefijo="abc", puntos_por_archivo=PUNTOS_POR_ARCHIVO):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.prefijo = prefijo
+        self.puntos_por_archivo = puntos_por_archivo
+        self.pendientes = []
+        self.n_pendientes = 0
+        self.partes = 0
+
+    def escribir(self, log_rad, tension):
+        self.pendientes.append(np.column_stack((log_rad, np.asarray(tension, dtype=np.float64))))
+        self.n_pendientes += len(log_rad)
+        while self.n_pendientes >= self.puntos_por_archivo:
+            bloque = np.concatenate(self.pendientes)
+            self._guardar(bloque[:self.puntos_por_archivo])
+            resto = bloque[self.puntos_por_archivo:]
+            self.pendientes = [resto]
+            self.n_pendientes = len(resto)
+
+    def _guardar(self, bloque):
+        ruta = os.path.join(self.directorio, f"{self.prefijo}_{self.partes:05d}.npy")
+        np.save(ruta, bloque)
+        self.partes += 1
+
+    def cerrar(self):
+        if self.n_pendientes:
+            self._guardar(np.concatenate(self.pendientes))
+        self.pendientes = []
+        self.n_pendientes = 0
+
+
+def _agregar_rango(args):
+    """Recorre a en [a0, a1) terna a terna y devuelve sólo el ResumenABC del rango."""
+    a0, a1, limite, n_bins, volcado, puntos_por_archivo = args
+    resumen = ResumenABC(limite, n_bins)
+    sumidero = VolcadoABC(volcado, f"abc_{a0:010d}", puntos_por_archivo) if volcado else None
+    for a in range(a0, a1):
+        _, log_rad, tension = ternas_con_a(a, limite)
+        resumen.actualizar(log_rad, tension)
+        if sumidero:
+            sumidero.escribir(log_rad, tension)
+    if sumidero:
+        sumidero.cerrar()
+    return resumen
+
+
+def agregar_ternas_abc(limite, procesos=None, n_bins=200, volcado=None,
+                       puntos_por_archivo=PUNTOS_POR_ARCHIVO, rangos_por_proceso=4):
+    """
+    [EXACTO] Misma búsqueda que buscar_ternas_abc sin materializar las ternas:
+    cada proceso agrega sus rangos de a en un ResumenABC y los resúmenes se suman.
+    Con 'volcado' (carpeta) cada rango escribe además sus puntos crudos en archivos
+    abc_<a0>_<parte>.npy, que en orden alfabético siguen el orden (a, b).
+    Memoria O(limite + n_bins * rango de tensión + puntos_por_archivo) por proceso.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    rangos = rangos_a(limite, procesos * rangos_por_proceso)
+    args = [(lo, hi, limite, n_bins, volcado, puntos_por_archivo) for lo, hi in rangos]
+
+    total = ResumenABC(limite, n_bins)
+    # Los rangos de a están equilibrados en trabajo: el progreso cuenta rangos
+    progreso = Progreso("ternas ABC", len(args))
+    if procesos == 1:
+        for i, a in enumerate(args, 1):
+            total.combinar(_agregar_rango(a))
+            progreso(i)
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                                 initargs=(limite,)) as pool:
+            for i, resumen in enumerate(pool.map(_agregar_rango, args), 1):
+                total.combinar(resumen)
+                progreso(i)
+    return total
+
+
+# --- BÚSQUEDA DE ALTA CALIDAD (ternas desde números suaves) ---
+
+# Primos para separar la parte pequeña de b antes de factorizar el cofactor.
+PRIMOS_CRIBA_B = 1000
+
+# Candidatos por lote al completar rad(z) (acota la memoria temporal).
+LOTE_CANDIDATOS = 1 << 18
+
+
+def numeros_suaves(limite, primos):
+    """
+    [EXACTO] Todos los n <= limite cuyos factores primos están en 'primos'.
+    Devuelve (n, rad(n), máscara) ordenados por n; la máscara tiene un bit por primo
+    de la base en palabras uint64 (forma (len(n), ceil(#primos / 64))), así que
+    gcd(x, y) = 1 equivale a que ninguna palabra de máscara_x & máscara_y sea no nula.
+    """
+    primos = [int(p) for p in primos]
+    n = np.ones(1, dtype=np.int64)
+    rad = np.ones(1, dtype=np.int64)
+    mascara = np.zeros((1, max(1, -(-len(primos) // 64))), dtype=np.uint64)
+    for indice, p in enumerate(primos):
+        palabra, bit = divmod(indice, 64)
+        partes_n, partes_rad, partes_mascara = [n], [rad], [mascara]
+        potencia = p
+        while potencia <= limite:
+            cabe = n <= limite // potencia
+            partes_n.append(n[cabe] * potencia)
+            partes_rad.append(rad[cabe] * p)
+            nueva = mascara[cabe]
+            nueva[:, palabra] |= np.uint64(1 << bit)
+            partes_mascara.append(nueva)
+            potencia *= p
+        n = np.concatenate(partes_n)
+        rad = np.concatenate(partes_rad)
+        mascara = np.concatenate(partes_mascara)
+    orden = np.argsort(n)
+    return n[orden], rad[orden], mascara[orden]
+
+
+def _cota_radical(z, primos_b):
+    """
+    Separa z = s * m con s libre de primos > primos_b[-1] y devuelve (rad(s), m, cota)
+    con cota <= rad(m): exacta si m < P^2 (m es 1 o primo) y m^(1/k) si no, con
+    k = floor(log_P m) el máximo número de factores primos (> P) de m.
+    """
+    rad_s = np.ones(len(z), dtype=np.int64)
+    m = z.copy()
+    for p in primos_b:
+        divide = m % p == 0
+        if not divide.any(): continue
+        rad_s[divide] *= p
+        while divide.any():
+            m[divide] //= p
+            divide &= m % p == 0
+    P = float(primos_b[-1])
+    cota = m.astype(np.float64)
+    compuesto = m >= P * P
+    k = np.floor(np.log(cota[compuesto]) / np.log(P))
+    cota[compuesto] = cota[compuesto] ** (1.0 / k)
+    return rad_s, m, cota
+
+
+def _evaluar_candidatos(x, z, c, rad_xy, calidad_minima, primos_b, ternas):
+    """Completa rad(z) de un lote de candidatos y guarda en 'ternas' los de calidad suficiente."""
+    rad_s, m, cota = _cota_radical(z, primos_b)
+    margen = np.log(c.astype(np.float64)) / calidad_minima - np.log(rad_xy.astype(np.float64))
+    candidato = np.flatnonzero(np.log(rad_s * cota) < margen + 1e-12)
+
+    for xv, cv, rxy, rs, mv in zip(x[candidato], c[candidato], rad_xy[candidato],
+                                   rad_s[candidato], m[candidato]):
+        cv, mv = int(cv), int(mv)
+        rad_m = mv if mv < PRIMOS_CRIBA_B ** 2 else math.prod(factorizar(mv))
+        rad_abc = int(rxy) * int(rs) * rad_m
+        if rad_abc < 2: continue
+        calidad = math.log(cv) / math.log(rad_abc)
+        if calidad <= calidad_minima: continue
+        a = min(int(xv), cv - int(xv))
+        ternas[(a, cv)] = (a, cv - a, cv, rad_abc, calidad)
+
+
+def ternas_alta_calidad(c_max, primo_max=7, calidad_minima=1.0):
+    """
+    [EXACTO] Ternas ABC coprimas con c <= c_max, calidad q = ln c / ln rad(abc)
+    por encima de 'calidad_minima' y al menos dos de a, b, c con primos <= primo_max.
+
+    Se recorren los pares x < y de números suaves coprimos y se prueban
+    c = y (b = y - x) y c = x + y. Como rad(abc) = rad(x) rad(y) rad(z), el par se
+    descarta si rad(x) rad(y) ya supera c^(1/q); el tercer número z sólo se
+    factoriza (Pollard rho) si la cota inferior de rad(z) aún permite la terna.
+    Coste ~ (número de suaves)^2 en vez de los O(c_max^2) pares ordinarios.
+
+    Devuelve una lista de (a, b, c, rad(abc), calidad, Omega_ABC) por calidad decreciente.
+    """
+    S, rad_S, mascara_S = numeros_suaves(c_max, primos_hasta(primo_max))
+    log_rad_S = np.log(rad_S.astype(np.float64))
+    primos_b = primos_hasta(PRIMOS_CRIBA_B)
+    inv_q = 1.0 / calidad_minima
+
+    ternas = {}
+    lote, n_lote = [], 0
+    for j in range(1, len(S)):
+        y = int(S[j])
+        x = S[:j]
+        coprimo = ~(mascara_S[:j] & mascara_S[j]).any(axis=1)
+        log_rad_xy = log_rad_S[:j] + log_rad_S[j]
+
+        # (z, c): diferencia x + z = y, o suma x + y = z
+        for z, c in ((y - x, np.full(j, y, dtype=np.int64)), (x + y, x + y)):
+            # rad(z) >= 1: poda por el radical de los dos números suaves
+            ok = coprimo & (c <= c_max) & (log_rad_xy < inv_q * np.log(c.astype(np.float64)))
+            if not ok.any(): continue
+            lote.append((x[ok], z[ok], c[ok], rad_S[:j][ok] * rad_S[j]))
+            n_lote += len(lote[-1][0])
+
+        if n_lote >= LOTE_CANDIDATOS or j == len(S) - 1:
+            if lote:
+                _evaluar_candidatos(*(np.concatenate(col) for col in zip(*lote)),
+                                    calidad_minima, primos_b, ternas)
+            lote, n_lote = [], 0
+
+    resultado = [t + (omega_fast(t[0]) + omega_fast(t[1]) + omega_fast(t[2]),)
+                 for t in ternas.values()]
+    return sorted(resultado, key=lambda t: -t[4])
@@ -0,0 +1,295 @@
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import importlib.util
+from contextlib import redirect_stdout
+import numpy as np
+
+# --- SUITE DE RENDIMIENTO DE LOS CAMINOS CALIENTES MFN ---
+#
+# Cada caso prepara sus entradas fuera del cronómetro y devuelve una función sin
+# argumentos que ejecuta sólo el camino caliente. El tamaño 'n' se barre por
+# décadas (10^3 ... 10^8, recortado al tope de cada caso); de cada medida se
+# guarda el tiempo de pared (mejor de varias repeticiones) y el pico de memoria
+# (tracemalloc, en una pasada aparte para no inflar el tiempo).
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Referencia por defecto (generada con --guardar)
+REFERENCIA = os.path.normpath(os.path.join(DIRECTORIO, "..", "resources", "benchmark_referencia.json"))
+
+# Tiempos por debajo de este umbral son ruido: no entran en el ajuste ni en la comparación.
+TIEMPO_MINIMO = 2e-3
+
+# Umbrales de alerta: cociente de tiempos normalizados y aumento del exponente.
+TOLERANCIA_TIEMPO = 1.5
+TOLERANCIA_EXPONENTE = 0.15
+
+_scripts = {}
+
+
+def cargar_script(nombre):
+    """Importa un script numerado (p.ej. '03_contador_primos') como módulo, sin ejecutar su main."""
+    if nombre not in _scripts:
+        ruta = os.path.join(DIRECTORIO, nombre + ".py")
+        spec = importlib.util.spec_from_file_location("mfn_script_" + nombre[:2], ruta)
+        modulo = importlib.util.module_from_spec(spec)
+        if DIRECTORIO not in sys.path:
+            sys.path.insert(0, DIRECTORIO)
+        spec.loader.exec_module(modulo)
+        _scripts[nombre] = modulo
+    return _scripts[nombre]
+
+
+# --- CASOS ---
+# Cada preparador recibe el tamaño n y devuelve la función a cronometrar.
+
+def _caso_omega_fast(n):
+    from mfn_tablas import omega_fast
+    ns = range(10**12, 10**12 + n)
+    return lambda: [omega_fast(x) for x in ns]
+
+def _caso_calcular_T(n):
+    calcular_T = cargar_script("01_espectro_t").calcular_T
+    return lambda: [calcular_T(x) for x in range(3, n + 3)]
+
+def _caso_simular_sismografo(n):
+    simular = cargar_script("02_sismografo").simular_sismografo
+    return lambda: simular(n)
+
+def _caso_inversion_espectral(n):
+    from mfn_inversion import generar_semilla_rapida
+    inversion = cargar_script("03_contador_primos").inversion_espectral_rapida
+    A = generar_semilla_rapida(n)
+    return lambda: inversion(A, n)
+
+def _caso_correccion_armonicos(n):
+    correccion = cargar_script("03_contador_primos").correccion_armonicos_exacta
+    J = np.log1p(np.arange(n + 1, dtype=np.float64))
+    return lambda: correccion(J, n)
+
+def _caso_sismografo_espectral(n):
+    sismografo = cargar_script("04_contador_perfectos").sismografo_espectral
+    return lambda: sismografo(n)
+
+def _caso_abc_tension(n):
+    abc = cargar_script("05_abc_tension").test_abc_tension
+    return lambda: abc(n, procesos=1)
+
+def _caso_zeta_knuttzen(n):
+    from mfn_zeta import zeta_knuttzen as zeta
+    rng = np.random.default_rng(0)
+    s = rng.uniform(1.1, 4.0, n) + 1j * rng.uniform(-50.0, 50.0, n)
+    return lambda: zeta(s)
+
+def _caso_calcular_oscilacion(n):
+    modulo = cargar_script("07_Knuttzen_Abel_Integral")
+    rng = np.random.default_rng(0)
+    puntos = list(zip(rng.uniform(0.4, 1.0, n), rng.uniform(10.0, 20.0, n)))
+    def ejecutar():
+        # Caché vacía: se mide el cálculo, no la consulta memorizada
+        modulo._oscilacion_acelerada.cache_clear()
+        return [modulo.calcular_oscilacion(sigma, t) for sigma, t in puntos]
+    return ejecutar
+
+def _caso_decode(n):
+    from mfn_formato import KnuttzenDecoder
+    lado = max(1, int(round(np.sqrt(n))))
+    artefacto = cargar_script("08_Generador_Imagen_Omega").generar_artefacto(lado)
+    return lambda: KnuttzenDecoder().decode(artefacto)
+
+# nombre -> (preparador, tope de n por defecto, qué es n)
+CASOS = {
+    "omega_fast":                  (_caso_omega_fast, 10**4, "llamadas escalares con n ~ 10^12"),
+    "calcular_T":                  (_caso_calcular_T, 10**4, "valores de T(n) en Decimal"),
+    "simular_sismografo":          (_caso_simular_sismografo, 10**6, "pasos N"),
+    "inversion_espectral_rapida":  (_caso_inversion_espectral, 10**7, "N del campo"),
+    "correccion_armonicos_exacta": (_caso_correccion_armonicos, 10**7, "N del potencial J"),
+    "sismografo_espectral":        (_caso_sismografo_espectral, 10**7, "N del campo"),
+    "test_abc_tension":            (_caso_abc_tension, 10**4, "límite c <= L"),
+    "zeta_knuttzen_approx":        (_caso_zeta_knuttzen, 10**6, "puntos s complejos"),
+    "calcular_oscilacion":         (_caso_calcular_oscilacion, 10**4, "puntos (sigma, t)"),
+    "KnuttzenDecoder.decode":      (_caso_decode, 10**7, "píxeles"),
+}
+
+
+def tamanos_por_decadas(tope, desde=10**3, hasta=10**8):
+    """10^3, 10^4, ... hasta min(tope, hasta)."""
+    tamanos = []
+    n = desde
+    while n <= min(tope, hasta):
+        tamanos.append(n)
+        n *= 10
+    return tamanos
+
+
+def calibracion(repeticiones=5):
+    """
+    Tiempo de una carga fija (numpy + bucle Python) en esta máquina. Los tiempos
+    se comparan divididos por ella, así que la referencia vale entre máquinas.
+    """
+    x = np.random.default_rng(0).random(1 << 20)
+    mejor = np.inf
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        np.sort(x)
+        np.cumsum(np.sqrt(x))
+        sum(i * i for i in range(200_000))
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def medir(nombre, n, repeticiones=3, memoria=True):
+    """
+    Mide un caso en tamaño n: mejor tiempo de pared de 'repeticiones' ejecuciones
+    y pico de memoria (MB) de una pasada con tracemalloc. Silencia los [INFO] del caso.
+    """
+    preparador = CASOS[nombre][0]
+    with redirect_stdout(io.StringIO()):
+        funcion = preparador(n)
+        segundos = np.inf
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            segundos = min(segundos, time.perf_counter() - inicio)
+            # Un caso lento no se repite: el ruido relativo ya es pequeño
+            if segundos > 2.0:
+                break
+
+        pico_mb = None
+        if memoria:
+            tracemalloc.start()
+            funcion()
+            pico_mb = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+    return {"n": n, "segundos": segundos, "pico_mb": pico_mb}
+
+
+def ajustar_exponente(medidas):
+    """
+    Ajuste log-log t ~ c n^b sobre las medidas por encima de TIEMPO_MINIMO.
+    Devuelve (b, c), o (None, None) si quedan menos de dos puntos.
+    """
+    puntos = [(m["n"], m["segundos"]) for m in medidas if m["segundos"] >= TIEMPO_MINIMO]
+    if len(puntos) < 2:
+        return None, None
+    log_n, log_t = np.log(np.array(puntos, dtype=np.float64)).T
+    b, log_c = np.polyfit(log_n, log_t, 1)
+    return float(b), float(np.exp(log_c))
+
+
+def ejecutar_suite(casos=None, tope=None, repeticiones=3, memoria=True):
+    """
+    Barre cada caso por décadas y ajusta su exponente de escalado.
+    'tope' sustituye el n máximo por defecto de cada caso (p.ej. 10**4 para una
+    pasada rápida, 10**8 para el barrido completo).
+    Devuelve un dict serializable a JSON con máquina, calibración y resultados.
+    """
+    resultados = {}
+    for nombre in casos or CASOS:
+        _, tope_caso, unidad = CASOS[nombre]
+        medidas = []
+        for n in tamanos_por_decadas(tope or tope_caso):
+            medida = medir(nombre, n, repeticiones, memoria)
+            medidas.append(medida)
+            pico = "" if medida["pico_mb"] is None else f", pico {medida['pico_mb']:.1f} MB"
+            print(f"[INFO] {nombre:<28} n={n:<10,} {medida['segundos']:.4f}s{pico}")
+        b, c = ajustar_exponente(medidas)
+        resultados[nombre] = {"unidad": unidad, "medidas": medidas, "exponente": b, "coeficiente": c}
+
+    return {
+        "maquina": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "calibracion": calibracion(),
+        "resultados": resultados,
+    }
+
+
+def comparar(actual, referencia, tolerancia=TOLERANCIA_TIEMPO, tolerancia_exponente=TOLERANCIA_EXPONENTE):
+    """
+    Regresiones de 'actual' frente a 'referencia': tiempos normalizados por la
+    calibración que crecen más de 'tolerancia' veces en algún n común, y exponentes
+    (ajustados sobre los mismos n) que aumentan más de 'tolerancia_exponente'.
+    Devuelve una lista de mensajes.
+    """
+    escala = actual["calibracion"] / referencia["calibracion"]
+    alertas = []
+    for nombre, res in actual["resultados"].items():
+        ref = referencia["resultados"].get(nombre)
+        if ref is None:
+            continue
+        t_ref = {m["n"]: m["segundos"] for m in ref["medidas"]}
+        for m in res["medidas"]:
+            if m["n"] not in t_ref or max(m["segundos"], t_ref[m["n"]]) < TIEMPO_MINIMO:
+                continue
+            cociente = m["segundos"] / (t_ref[m["n"]] * escala)
+            if cociente > tolerancia:
+                alertas.append(f"{nombre} n={m['n']:,}: {cociente:.2f}x más lento que la referencia")
+        # El exponente de la referencia se reajusta sobre los n de esta corrida
+        b_ref, _ = ajustar_exponente([m for m in ref["medidas"] if m["n"] in {a["n"] for a in res["medidas"]}])
+        if res["exponente"] is not None and b_ref is not None:
+            if res["exponente"] - b_ref > tolerancia_exponente:
+                alertas.append(f"{nombre}: exponente {res['exponente']:.2f} (referencia {b_ref:.2f})")
+    return alertas
+
+
+def mostrar_resumen(suite):
+    print(f"\n{'CASO':<28} | {'n MÁX':<10} | {'TIEMPO':<10} | {'PICO MB':<9} | {'EXPONENTE':<9} | n")
+    print("-" * 100)
+    for nombre, res in suite["resultados"].items():
+        ultima = res["medidas"][-1]
+        b = "-" if res["exponente"] is None else f"{res['exponente']:.2f}"
+        pico = "-" if ultima["pico_mb"] is None else f"{ultima['pico_mb']:.1f}"
+        print(f"{nombre:<28} | {ultima['n']:<10,} | {ultima['segundos']:<10.4f} | {pico:<9} | {b:<9} | {res['unidad']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de rendimiento MFN: escalado por décadas y comparación con referencia")
+    parser.add_argument("--casos", nargs="+", choices=list(CASOS), default=None, help="Casos a medir (por defecto, todos)")
+    parser.add_argument("--tope", type=float, default=None, help="n máximo para todos los casos en vez del tope de cada uno (p.ej. 1e4 o 1e8)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por medida (se toma la mejor)")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir el pico de memoria (tracemalloc)")
+    parser.add_argument("--referencia", type=str, default=REFERENCIA, help="JSON de referencia")
+    parser.add_argument("--guardar", action="store_true", help="Guardar esta corrida como nueva referencia")
+    parser.add_argument("--json", type=str, default=None, help="Guardar los resultados en este JSON")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_TIEMPO, help="Cociente de tiempo que dispara la alerta")
+    args = parser.parse_args()
+
+    suite = ejecutar_suite(args.casos, int(args.tope) if args.tope else None, args.repeticiones, not args.sin_memoria)
+    mostrar_resumen(suite)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(suite, f, indent=1)
+
+    if args.guardar:
+        with open(args.referencia, "w") as f:
+            json.dump(suite, f, indent=1)
+        print(f"\n[INFO] Referencia guardada en {args.referencia}")
+        return 0
+
+    if not os.path.exists(args.referencia):
+        print(f"\n[INFO] Sin referencia en {args.referencia} (usar --guardar)")
+        return 0
+
+    with open(args.referencia) as f:
+        referencia = json.load(f)
+    alertas = comparar(suite, referencia, args.tolerancia)
+    print(f"\n[INFO] Calibración: {suite['calibracion']:.4f}s (referencia {referencia['calibracion']:.4f}s)")
+    if alertas:
+        print("[ALERTA] Regresiones de rendimiento:")
+        for alerta in alertas:
+            print(f"  - {alerta}")
+        return 1
+    print("[INFO] Sin regresiones frente a la referencia.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
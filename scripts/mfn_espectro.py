@@ -0,0 +1,165 @@
+import numpy as np
+from decimal import Decimal, localcontext
+from mpmath import mp
+from mfn_tablas import criba_divisores, numero_divisores, factorizar, divisores_desde_factorizacion
+
+# Umbral para decidir entre cribar d(n) hasta max(i) o consultar cada semilla suelta.
+MARGEN_CRIBA_SEMILLAS = 10**6
+
+
+def valuacion_2_adica(ns):
+    """
+    Descompone cada n = i * 2^k (n >= 1) con trucos de bits.
+    Devuelve (i, k) como arrays int64.
+    """
+    ns = np.asarray(ns, dtype=np.int64)
+    bajo = ns & -ns
+    k = np.log2(bajo).astype(np.int64)
+    return ns >> k, k
+
+
+def _divisores_semillas(impares):
+    """d(i) para un array de semillas impares: criba si es densa, consulta escalar si no."""
+    tope = int(impares.max()) if len(impares) else 0
+    if tope <= 4 * len(impares) + MARGEN_CRIBA_SEMILLAS:
+        return criba_divisores(tope)[impares].astype(np.int64)
+    unicos, inversa = np.unique(impares, return_inverse=True)
+    d_unicos = np.array([numero_divisores(int(i)) for i in unicos], dtype=np.int64)
+    return d_unicos[inversa]
+
+
+def _serie_T_por_clase(k, D, tol, max_terminos):
+    """
+    [EXACTO] Suma T para clases (k, D) con Omega(n 2^j) = (k+j+2) D - 4.
+    El factor j-ésimo es 1 / ((k+j+2) D - 3), que sólo depende de la clase.
+
+    Semántica idéntica a calcular_T / estimar_T: se suma el término y se corta
+    cuando es < tol, tras max_terminos términos, o al llegar a un denominador nulo
+    (n = 1, 2). Devuelve (T, cota) con la cota del resto truncado.
+    """
+    k = k.astype(np.float64)
+    D = D.astype(np.float64)
+    suma = np.ones(len(k))
+    prod = np.ones(len(k))
+    activo = np.ones(len(k), dtype=bool)
+    cortado = np.zeros(len(k), dtype=bool)
+    j_sig = np.full(len(k), float(max_terminos - 1))
+
+    for j in range(max_terminos - 1):
+        if not activo.any():
+            break
+        denom = (k + j + 2) * D - 3
+        nulo = activo & (denom == 0)
+        cortado |= nulo
+        activo &= ~nulo
+
+        prod[activo] *= 1.0 / denom[activo]
+        suma[activo] += prod[activo]
+
+        cerrado = activo & (np.abs(prod) < tol)
+        j_sig[cerrado] = j + 1
+        activo &= ~cerrado
+
+    # Cota del resto: los denominadores crecen con j, así que lo que falta está
+    # acotado por una geométrica de razón r = 1 / ((k+J+2) D - 3) desde el último término.
+    denom_sig = (k + j_sig + 2) * D - 3
+    cota = np.full(len(k), np.inf)
+    convergente = denom_sig > 1
+    r = 1.0 / denom_sig[convergente]
+    cota[convergente] = np.abs(prod[convergente]) * r / (1 - r)
+    cota[cortado] = 0.0
+    return suma, cota
+
+
+def _T_desde_clases(k, D, tol, max_terminos):
+    """Agrupa por clase (k, D) única, suma cada serie una sola vez y reexpande."""
+    clave = k * (int(D.max()) + 1 if len(D) else 1) + D
+    _, idx, inversa = np.unique(clave, return_index=True, return_inverse=True)
+    T_u, cota_u = _serie_T_por_clase(k[idx], D[idx], tol, max_terminos)
+    return T_u[inversa], cota_u[inversa]
+
+
+def T_batch(ns, tol=1e-16, max_terminos=100):
+    """
+    [EXACTO] Evalúa T(n) para un array de n >= 1 de una vez.
+    Usa la identidad de duplicación: con n = i 2^k, todos los términos de la serie
+    dependen sólo de (k, d(i)), así que la serie se suma una vez por clase.
+
+    Devuelve (T, cota_error): la cota acota lo que falta de la serie tras truncar.
+    """
+    ns = np.asarray(ns, dtype=np.int64)
+    if np.any(ns < 1):
+        raise ValueError("T(n) sólo está definido para n >= 1")
+    impares, k = valuacion_2_adica(ns)
+    D = _divisores_semillas(impares)
+    return _T_desde_clases(k, D, tol, max_terminos)
+
+
+def T_array(N, tol=1e-16, max_terminos=100):
+    """
+    [EXACTO] T(n) para todo 0 <= n <= N, con d(n) cribado una sola vez.
+    Devuelve (T, cota_error) de longitud N+1; la posición 0 queda en NaN.
+    """
+    d_tab = criba_divisores(N)
+    ns = np.arange(1, N + 1, dtype=np.int64)
+
+    T = np.full(N + 1, np.nan)
+    cota = np.full(N + 1, np.nan)
+    T[1:], cota[1:] = T_desde_divisores(ns, d_tab[1:], tol, max_terminos)
+    return T, cota
+
+
+def T_desde_divisores(ns, d, tol=1e-16, max_terminos=100):
+    """
+    T(n) cuando d(n) ya es conocido (p.ej. desde la criba segmentada):
+    d(i) de la semilla impar sale de d(n) = (k+1) d(i) sin volver a cribar.
+    """
+    ns = np.asarray(ns, dtype=np.int64)
+    _, k = valuacion_2_adica(ns)
+    D = np.asarray(d, dtype=np.int64) // (k + 1)
+    return _T_desde_clases(k, D, tol, max_terminos)
+
+
+def T_precision(n, digitos=50, backend="decimal", max_terminos=100_000):
+    """
+    [EXACTO] T(n) en alta precisión para n arbitrariamente grande.
+    Factoriza n una sola vez (Pollard rho): con n = i 2^k y D = d(i), el término
+    j-ésimo del producto es 1 / ((k+j+2) D - 3), sin evaluar Omega(n 2^j).
+
+    Criterio de parada: se detiene cuando la cota geométrica del resto,
+    t_j * r / (1 - r), cae por debajo de 10^-digitos * |T|.
+    'backend' es "decimal" o "mpmath". Devuelve (T, cota_resto).
+    """
+    if n < 1:
+        raise ValueError("T(n) sólo está definido para n >= 1")
+    factores = factorizar(n)
+    k = factores.pop(2, 0)
+    D = divisores_desde_factorizacion(factores)
+
+    if backend == "decimal":
+        with localcontext() as ctx:
+            ctx.prec = digitos + 10
+            return _T_precision_serie(k, D, digitos, max_terminos, Decimal, Decimal(10) ** -digitos)
+    if backend == "mpmath":
+        with mp.workdps(digitos + 10):
+            return _T_precision_serie(k, D, digitos, max_terminos, mp.mpf, mp.mpf(10) ** -digitos)
+    raise ValueError(f"Backend desconocido: {backend!r} (usar 'decimal' o 'mpmath')")
+
+
+def _T_precision_serie(k, D, digitos, max_terminos, num, eps):
+    """Suma la serie de la clase (k, D) en el tipo numérico 'num' hasta la tolerancia."""
+    suma = num(1)
+    prod = num(1)
+    for j in range(max_terminos):
+        denom = (k + j + 2) * D - 3
+        if denom == 0:
+            # Misma convención que calcular_T: la serie se corta (n = 1, 2)
+            return suma, num(0)
+        prod /= num(denom)
+        suma += prod
+        denom_sig = denom + D
+        if denom_sig > 1:
+            cota = abs(prod) / num(denom_sig - 1)
+            if cota < eps * abs(suma):
+                return suma, cota
+    raise ArithmeticError(f"T(n) no alcanzó {digitos} dígitos en {max_terminos} términos")
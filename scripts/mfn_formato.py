@@ -0,0 +1,332 @@
+import numpy as np
+from mfn_tablas import criba_divisores, numero_divisores
+from mfn_espectro import T_batch
+from mfn_perfil import Progreso
+
+# Filas por tile al decodificar: acota la memoria temporal (~100 B por píxel del tile).
+FILAS_TILE = 512
+
+# Semillas por debajo de este límite se resuelven con la tabla cribada de d(n);
+# las mayores, por factorización (Pollard rho) de cada semilla distinta.
+LIMITE_TABLA_SEMILLAS = 1 << 24
+
+# --- FORMATO ESPECTRAL: PROTOCOLO DE CODIFICACIÓN CAUSAL ---
+
+# Canal (tipo de dato) -> clase Nabla = d(i) de los núcleos que lo transportan
+CANALES = {"base": 1, "primo": 2, "seguridad": 4}
+
+# Niveles de intensidad por palabra: 2^BITS_PROFUNDIDAD profundidades k distintas
+BITS_PROFUNDIDAD = 4
+
+# Núcleos por canal (2^BITS_INDICE); el canal base sólo tiene el núcleo 1
+BITS_INDICE = 4
+
+# Palabras uint64 por trozo al codificar/decodificar flujos (8 MB por trozo)
+PALABRAS_POR_TROZO = 1 << 20
+
+class KnuttzenDecoder:
+    def __init__(self):
+        # Definición de la Paleta Humana Estándar (K-STD)
+        # Mapea Pendiente (d(i)) -> Matiz Base (RGB Normalizado)
+        self.palette = {
+            1: [1.0, 1.0, 1.0],  # Pendiente 1: Estructura/Neutro (Blanco)
+            2: [0.0, 0.8, 1.0],  # Pendiente 2: Primos/Fundamental (Cian/Azul)
+            3: [1.0, 0.0, 0.3],  # Pendiente 3: Cuadrados/Singularidad (Rojo/Magenta)
+            4: [1.0, 0.8, 0.0],  # Pendiente 4+: Compuestos/Denso (Amarillo/Oro)
+        }
+        # Tabla de consulta de la paleta: fila = min(pendiente, 4); la fila 0 (n = 0) es negra
+        self._lut = np.zeros((5, 3))
+        for clave, color in self.palette.items():
+            self._lut[clave] = color
+        self._d_tab = None
+        self._d_grandes = {}
+
+    def _get_odd_seed(self, n):
+        """Extrae la semilla impar 'i' de n = i * 2^k."""
+        if n == 0: return 0
+        while n % 2 == 0:
+            n //= 2
+        return n
+
+    def _get_slope_nabla(self, n):
+        """
+        Calcula la Pendiente Estructural Rigurosa: Nabla = d(i).
+        Esta es la constante física de la familia.
+        """
+        i_seed = self._get_odd_seed(n)
+        if i_seed == 1: return 1
+        
+        divisors = 0
+        limit = int(np.sqrt(i_seed))
+        for k in range(1, limit + 1):
+            if i_seed % k == 0:
+                divisors += 2 if k*k != i_seed else 1
+        return divisors
+
+    def _calculate_intensity(self, n, slope):
+        """
+        Calcula la Intensidad basada en la 'Fricción con el Campo'.
+        Identidad General: Omega = (k+2)*slope - 4.
+        A mayor Omega, menor T(n) (más oscuro).
+        """
+        # Calcular k (Profundidad de iteración)
+        k = 0
+        temp = n
+        while temp > 0 and temp % 2 == 0:
+            temp //= 2
+            k += 1
+            
+        # Resonancia Total (Masa Estructural)
+        omega = (k + 2) * slope - 4
+        
+        # Modelo de Decaimiento de Señal (Simulación de T(n))
+        # La señal decae hiperbólicamente con la resistencia del campo.
+        # Factor 0.08 calibrado para rango dinámico visual.
+        intensity = 1.0 / (1.0 + 0.08 * omega)
+        return np.clip(intensity, 0, 1)
+
+    def _tabla_divisores(self, tope):
+        """Tabla d(n) cribada, ampliada bajo demanda (se reutiliza entre tiles)."""
+        if self._d_tab is None or len(self._d_tab) <= tope:
+            self._d_tab = criba_divisores(max(tope, 2 * (0 if self._d_tab is None else len(self._d_tab)), 1024))
+        return self._d_tab
+
+    def _pendientes_semillas(self, semillas):
+        """d(i) para un array de semillas impares (uint64): tabla si caben, factorización si no."""
+        slope = np.zeros(semillas.shape, dtype=np.int64)
+        pequenas = semillas < LIMITE_TABLA_SEMILLAS
+        if pequenas.any():
+            sp = semillas[pequenas].astype(np.int64)
+            slope[pequenas] = self._tabla_divisores(int(sp.max()))[sp]
+        if not pequenas.all():
+            unicas, inversa = np.unique(semillas[~pequenas], return_inverse=True)
+            d_unicas = np.empty(len(unicas), dtype=np.int64)
+            for j, i_seed in enumerate(unicas):
+                i_seed = int(i_seed)
+                if i_seed not in self._d_grandes:
+                    self._d_grandes[i_seed] = numero_divisores(i_seed)
+                d_unicas[j] = self._d_grandes[i_seed]
+            slope[~pequenas] = d_unicas[inversa]
+        return slope
+
+    def clasificar(self, tile):
+        """
+        [EXACTO] Lectura estructural de un bloque de enteros (uint64), con arrays:
+          - n = i * 2^k: 2^k = n & -n, k = log2(2^k) (exacto en float64), i = n >> k
+          - Nabla = d(i) por tabla o factorización de semillas distintas
+        Devuelve (k, semillas, Nabla, cero); en n = 0 se toma i = 1, k = 0.
+        """
+        n = np.asarray(tile, dtype=np.uint64)
+        cero = n == 0
+        bajo = n & (~n + np.uint64(1))
+        bajo[cero] = 1
+        k = np.log2(bajo.astype(np.float64)).astype(np.int64)
+        semillas = n >> k.astype(np.uint64)
+        semillas[cero] = 1
+        return k, semillas, self._pendientes_semillas(semillas), cero
+
+    def decode_tile(self, tile):
+        """
+        [EXACTO] Decodifica un bloque de enteros (uint64) en RGB:
+          - (k, Nabla) por clasificar()
+          - Omega = (k+2) Nabla - 4, intensidad = clip(1 / (1 + 0.08 Omega), 0, 1)
+          - color = LUT de paleta[min(Nabla, 4)] * intensidad
+        Los píxeles n = 0 (sin semilla) salen negros.
+        """
+        k, _, slope, cero = self.clasificar(tile)
+        omega = (k + 2) * slope - 4
+        intensity = np.clip(1.0 / (1.0 + 0.08 * omega), 0, 1)
+
+        rgb = self._lut[np.minimum(slope, 4)] * intensity[..., None]
+        rgb[cero] = 0.0
+        return rgb
+
+    def decode(self, artifact_matrix, filas_tile=FILAS_TILE, salida=None):
+        """
+        Procesa la matriz de enteros y devuelve imagen RGB.
+        Se recorre por tiles de filas_tile filas, así que la memoria temporal no
+        depende del tamaño del artefacto; 'salida' puede ser un array (o memmap)
+        (H, W, 3) preasignado. Las matrices object con enteros > 2^64 se decodifican
+        píxel a píxel con la ruta escalar.
+        """
+        height, width = artifact_matrix.shape
+        img_rgb = np.zeros((height, width, 3)) if salida is None else salida
+
+        print(f"Decodificando Artefacto de {width}x{height}...")
+
+        progreso = Progreso("decode", height)
+        for y0 in range(0, height, filas_tile):
+            progreso(y0)
+            tile = artifact_matrix[y0:y0 + filas_tile]
+            try:
+                img_rgb[y0:y0 + filas_tile] = self.decode_tile(tile)
+            except OverflowError:
+                img_rgb[y0:y0 + filas_tile] = self._decode_escalar(tile)
+
+        return img_rgb
+
+    def _decode_escalar(self, tile):
+        """Ruta original píxel a píxel (enteros arbitrariamente grandes)."""
+        height, width = tile.shape
+        img_rgb = np.zeros((height, width, 3))
+        for y in range(height):
+            for x in range(width):
+                n = int(tile[y, x])
+                if n == 0: continue
+
+                # 1. Determinación de Clase (¿QUÉ ES?)
+                slope = self._get_slope_nabla(n)
+
+                # 2. Determinación de Estado (¿CÓMO ESTÁ?)
+                intensity = self._calculate_intensity(n, slope)
+
+                # 3. Mapeo a Interfaz Humana
+                # Si la pendiente es > 4, la tratamos como clase 4 (Compuesta densa)
+                palette_key = slope if slope <= 3 else 4
+                base_color = np.array(self.palette[palette_key])
+
+                # Síntesis del Píxel: Color Base * Intensidad
+                img_rgb[y, x] = base_color * intensity
+        return img_rgb
+
+
+def nucleos_canal(nabla, cantidad):
+    """Los 'cantidad' primeros núcleos impares m con d(m) = nabla (códigos del canal)."""
+    if nabla == 1:
+        return np.ones(1, dtype=np.uint64)
+    tope = 64 * cantidad
+    while True:
+        d_tab = criba_divisores(tope)
+        m = np.arange(1, tope + 1, 2)
+        nucleos = m[d_tab[m] == nabla][:cantidad]
+        if len(nucleos) == cantidad:
+            return nucleos.astype(np.uint64)
+        tope *= 4
+
+
+def tabla_estabilidad(nabla, profundidad_max):
+    """
+    [EXACTO] T(m 2^k) para k = 0..profundidad_max de cualquier núcleo m de la clase nabla.
+    Por la identidad Omega(m 2^j) = (k+j+2) d(m) - 4 la serie depende sólo de (k, nabla),
+    así que una tabla por canal sirve para todas sus palabras.
+    """
+    m = int(nucleos_canal(nabla, 1)[0])
+    k = np.arange(profundidad_max + 1, dtype=np.int64)
+    T, _ = T_batch(m << k)
+    return T
+
+
+class CodificadorCausal:
+    """
+    Codec del Formato Espectral (Protocolo de Codificación Causal):
+      - Canal: los bytes viajan en núcleos m de la clase Nabla del canal
+        (base Nabla=1: potencias de 2; primo Nabla=2; seguridad Nabla=4: semiprimos y p^3).
+      - Intensidad: cada nivel q se escribe como la profundidad k mínima con
+        T(m 2^k) - 1 <= eps_q (estabilidad alcanzada), buscada en la tabla del canal.
+    Cada palabra uint64 n = m * 2^k lleva BITS_INDICE bits en el índice de m
+    (0 en el canal base) y BITS_PROFUNDIDAD bits en el nivel. El decodificador lee
+    (k, Nabla, m) con KnuttzenDecoder.clasificar y rechaza palabras fuera del canal.
+    """
+
+    def __init__(self, canal="primo", epsilones=None, decoder=None):
+        if canal not in CANALES:
+            raise ValueError(f"Canal desconocido: {canal!r} (usar {', '.join(CANALES)})")
+        self.canal = canal
+        self.nabla = CANALES[canal]
+        self.decoder = KnuttzenDecoder() if decoder is None else decoder
+
+        bits_indice = 0 if self.nabla == 1 else BITS_INDICE
+        self.bits_simbolo = bits_indice + BITS_PROFUNDIDAD
+        if 8 % self.bits_simbolo:
+            raise ValueError(f"Símbolos de {self.bits_simbolo} bits no dividen el byte")
+        self.simbolos_por_byte = 8 // self.bits_simbolo
+        self.nucleos = nucleos_canal(self.nabla, 1 << bits_indice)
+
+        self.profundidades = self._profundidades(epsilones)
+
+        # Tablas inversas: núcleo -> índice, profundidad -> nivel (-1 = fuera del canal)
+        self._indice = np.full(int(self.nucleos.max()) + 2, -1, dtype=np.int64)
+        self._indice[self.nucleos.astype(np.int64)] = np.arange(len(self.nucleos))
+        self._nivel = np.full(int(self.profundidades.max()) + 2, -1, dtype=np.int64)
+        self._nivel[self.profundidades] = np.arange(len(self.profundidades))
+
+    def _profundidades(self, epsilones):
+        """
+        Profundidad k de cada nivel: la mínima con T(m 2^k) - 1 <= eps_q, por búsqueda
+        binaria en la tabla de estabilidad (estrictamente decreciente desde k0).
+        Sin 'epsilones', la escalera es la propia tabla: nivel q -> k0 + q.
+        """
+        niveles = 1 << BITS_PROFUNDIDAD
+        k_tope = 63 - int(self.nucleos.max()).bit_length()
+        T = tabla_estabilidad(self.nabla, k_tope)
+        crece = np.flatnonzero(np.diff(T) >= 0)
+        k0 = int(crece[-1]) + 1 if len(crece) else 0
+        exceso = T[k0:] - 1
+
+        if epsilones is None:
+            if len(exceso) < niveles:
+                raise ValueError("La tabla de estabilidad no alcanza todos los niveles")
+            epsilones = exceso[:niveles]
+        epsilones = np.asarray(epsilones, dtype=np.float64)
+        if epsilones.shape != (niveles,):
+            raise ValueError(f"Se esperan {niveles} umbrales de estabilidad")
+
+        k = k0 + np.searchsorted(-exceso, -epsilones, side="left")
+        if np.any(k > k_tope) or np.any(np.diff(k) <= 0):
+            raise ValueError("Los umbrales no dan profundidades distintas y crecientes dentro de 64 bits")
+        return k.astype(np.int64)
+
+    def codificar(self, datos):
+        """[EXACTO] Bytes (o array uint8) -> array uint64 de palabras n = m * 2^k."""
+        datos = np.frombuffer(datos, dtype=np.uint8) if not isinstance(datos, np.ndarray) else datos.astype(np.uint8, copy=False)
+        b = self.bits_simbolo
+        desplazamientos = b * np.arange(self.simbolos_por_byte - 1, -1, -1, dtype=np.uint8)
+        simbolos = ((datos[:, None] >> desplazamientos) & ((1 << b) - 1)).ravel()
+
+        nivel = simbolos & ((1 << BITS_PROFUNDIDAD) - 1)
+        indice = simbolos >> BITS_PROFUNDIDAD
+        return self.nucleos[indice] << self.profundidades[nivel].astype(np.uint64)
+
+    def decodificar(self, palabras):
+        """[EXACTO] Array uint64 de palabras -> bytes. ValueError si alguna está fuera del canal."""
+        palabras = np.asarray(palabras, dtype=np.uint64)
+        if len(palabras) % self.simbolos_por_byte:
+            raise ValueError("Número de palabras incompleto para el último byte")
+
+        k, semillas, nabla, cero = self.decoder.clasificar(palabras)
+        # Las tablas inversas acaban en -1: semillas y profundidades fuera de rango caen ahí
+        indice = self._indice[np.minimum(semillas, len(self._indice) - 1).astype(np.intp)]
+        nivel = self._nivel[np.minimum(k, len(self._nivel) - 1)]
+        mala = cero | (nabla != self.nabla) | (indice < 0) | (nivel < 0)
+        if mala.any():
+            malas = np.flatnonzero(mala)
+            raise ValueError(f"{len(malas)} palabras fuera del canal '{self.canal}' (primera en {malas[0]})")
+
+        simbolos = ((indice << BITS_PROFUNDIDAD) | nivel).reshape(-1, self.simbolos_por_byte)
+        desplazamientos = self.bits_simbolo * np.arange(self.simbolos_por_byte - 1, -1, -1)
+        return (simbolos << desplazamientos).sum(axis=1).astype(np.uint8).tobytes()
+
+    def codificar_flujo(self, origen, destino, palabras_por_trozo=PALABRAS_POR_TROZO):
+        """Lee bytes de 'origen' y escribe palabras uint64 little-endian en 'destino', por trozos."""
+        bytes_trozo = max(1, palabras_por_trozo // self.simbolos_por_byte)
+        total = 0
+        while True:
+            bloque = origen.read(bytes_trozo)
+            if not bloque:
+                return total
+            destino.write(self.codificar(bloque).astype("<u8").tobytes())
+            total += len(bloque)
+
+    def decodificar_flujo(self, origen, destino, palabras_por_trozo=PALABRAS_POR_TROZO):
+        """Inversa de codificar_flujo: palabras uint64 little-endian -> bytes, por trozos."""
+        palabras_trozo = max(1, palabras_por_trozo // self.simbolos_por_byte) * self.simbolos_por_byte
+        total = 0
+        while True:
+            bloque = origen.read(8 * palabras_trozo)
+            if not bloque:
+                return total
+            if len(bloque) % 8:
+                raise ValueError("Flujo truncado: longitud no múltiplo de 8 bytes")
+            datos = self.decodificar(np.frombuffer(bloque, dtype="<u8"))
+            destino.write(datos)
+            total += len(datos)
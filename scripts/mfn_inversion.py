@@ -0,0 +1,316 @@
+import os
+import json
+import math
+import numpy as np
+from mfn_tablas import factorizar
+from mfn_perfil import Progreso, peso_logaritmico
+
+# Umbral bajo el cual un valor no se propaga a sus múltiplos (ruido numérico).
+UMBRAL_PROPAGACION = 1e-9
+
+
+def generar_semilla_rapida(N):
+    """
+    [EXACTO] Genera la señal base de paridad alpha(n).
+    A(n) = 2 (impar/base), 1 (par).
+    """
+    # Usamos float64 para máxima precisión en la cancelación
+    A = np.ones(N + 1, dtype=np.float64)
+    A[1] = 2.0
+    A[3::2] = 2.0
+    return A
+
+
+def push_forward(X, A, umbral=UMBRAL_PROPAGACION):
+    """
+    [EXACTO] Núcleo de la inversión de Dirichlet (Lambda * A)(n) = X(n), in situ.
+    Al entrar X contiene el lado derecho; al salir contiene Lambda.
+    Complejidad: O(N log N) operaciones, O(sqrt N) iteraciones del intérprete.
+
+    Dos fases sin reservar memoria por índice:
+      1. i < S ~ sqrt(2N): cada i empuja a sus múltiplos con una vista X[2i::i].
+      2. i >= S, por bloques [L, 2L): los múltiplos 2i de un bloque caen fuera de él,
+         así que el bloque entero se cierra de golpe y se propaga con un paso
+         estridado por cada multiplicador j: X[jL : j*hi : j] -= A[j] * Lambda[L:hi].
+    """
+    N = len(X) - 1
+    if N < 1:
+        return X
+    inv_A1 = 1.0 / A[1]
+    S = min(N + 1, max(2, math.isqrt(2 * N)))
+    buffer = np.empty(N)
+    progreso = Progreso("push-forward", N, peso=peso_logaritmico)
+
+    # Fase 1: índices pequeños, un paso estridado por i
+    for i in range(1, S):
+        progreso(i)
+        val = X[i] * inv_A1
+        X[i] = val
+        if abs(val) < umbral: continue
+        k_limit = N // i
+        if k_limit < 2: continue
+        tmp = buffer[:k_limit - 1]
+        np.multiply(A[2:k_limit + 1], val, out=tmp)
+        X[2 * i::i] -= tmp
+
+    # Fase 2: bloques diádicos [L, 2L)
+    L = S
+    while L <= N:
+        hi = min(2 * L, N + 1)
+        bloque = X[L:hi]
+        bloque *= inv_A1
+        vals = buffer[:hi - L]
+        np.copyto(vals, bloque)
+        vals[np.abs(vals) < umbral] = 0.0
+
+        for j in range(2, N // L + 1):
+            tope = min(hi, N // j + 1)
+            m = tope - L
+            tmp = buffer[N - m:]
+            np.multiply(vals[:m], A[j], out=tmp)
+            X[j * L:j * tope:j] -= tmp
+        L = hi
+        progreso(hi)
+    return X
+
+
+# --- EVALUACIÓN PUNTUAL (retículo de divisores) ---
+
+def alpha_paridad(n):
+    """alpha(n) escalar de la semilla de paridad: 2 si n es impar (o n = 1), 1 si es par."""
+    return 2.0 if n % 2 == 1 else 1.0
+
+
+def lambda_en_punto(n, factores=None, signo=1.0, umbral=UMBRAL_PROPAGACION, memo=None):
+    """
+    [EXACTO] Lambda(n) de la inversión (Lambda * alpha)(n) = signo * alpha(n) ln n
+    sin construir el campo: sólo intervienen los divisores de n.
+
+    Recorre el retículo de divisores en orden creciente y resuelve cada m | n con
+        Lambda(m) = (signo alpha(m) ln m - sum_{d | m, d < m} Lambda(d) alpha(m/d)) / alpha(1),
+    descartando los Lambda(d) con |Lambda(d)| < umbral igual que push_forward.
+    Coste O(prod (e_p + 1)(e_p + 2) / 2) en vez de O(n log n); 'memo' ({m: Lambda(m)})
+    puede compartirse entre llamadas. 'factores' es {p: e}; si falta se factoriza n.
+    """
+    if factores is None:
+        factores = factorizar(n)
+    memo = {} if memo is None else memo
+    if n in memo:
+        return memo[n]
+
+    primos = sorted(factores)
+    # Divisores como (valor, exponentes), ordenados: todo divisor propio va antes
+    reticulo = [(1, ())]
+    for p in primos:
+        reticulo = [(v * p ** e, exps + (e,)) for v, exps in reticulo for e in range(factores[p] + 1)]
+    reticulo.sort()
+
+    inv_A1 = 1.0 / alpha_paridad(1)
+    for m, exps in reticulo:
+        if m in memo: continue
+        # Divisores propios de m: sub-vectores de exponentes
+        subdivisores = [1]
+        for p, e in zip(primos, exps):
+            subdivisores = [d * p ** f for d in subdivisores for f in range(e + 1)]
+        total = signo * alpha_paridad(m) * math.log(m)
+        for d in subdivisores:
+            if d == m: continue
+            val = memo[d]
+            if abs(val) < umbral: continue
+            total -= val * alpha_paridad(m // d)
+        memo[m] = total * inv_A1
+    return memo[n]
+
+
+# --- MODO SEGMENTADO (fuera de núcleo) ---
+
+# Bytes de RAM por entero de segmento: X, ln n, alpha, temporales (float64).
+BYTES_POR_ENTERO = 48
+
+
+def semilla_paridad_tramo(lo, hi):
+    """alpha(n) para lo <= n < hi sin materializar la semilla completa."""
+    n = np.arange(lo, hi)
+    A = np.where(n % 2 == 1, 2.0, 1.0)
+    if lo <= 1 < hi:
+        A[1 - lo] = 2.0
+    return A
+
+
+def _log_tramo(lo, hi):
+    """ln n sobre [lo, hi) con ln 0 := 0 (misma convención que el modo en RAM)."""
+    n = np.arange(lo, hi, dtype=np.float64)
+    if lo == 0:
+        n[0] = 1.0
+    return np.log(n)
+
+
+def tamano_segmento(memoria_mb):
+    """Enteros por segmento para un presupuesto de memoria dado (MB)."""
+    return max(1024, int(memoria_mb * 2**20) // BYTES_POR_ENTERO)
+
+
+def inversion_segmentada(N, ruta, memoria_mb=512, signo=1.0, umbral=UMBRAL_PROPAGACION):
+    """
+    [EXACTO] Inversión de Dirichlet (Lambda * alpha)(n) = signo * alpha(n) ln n
+    por segmentos, con Lambda volcado a un .npy mapeado en memoria ('ruta').
+    La RAM máxima la fija memoria_mb, no N.
+    """
+    Lam = np.lib.format.open_memmap(ruta, mode="w+", dtype=np.float64, shape=(N + 1,))
+    extender_inversion(Lam, 0, memoria_mb, signo, umbral)
+    Lam.flush()
+    return Lam
+
+
+def extender_inversion(Lam, desde, memoria_mb=512, signo=1.0, umbral=UMBRAL_PROPAGACION):
+    """
+    [EXACTO] Completa Lam[desde:] suponiendo Lam[:desde] ya resuelto.
+
+    Si desde = 0, el primer segmento [0, M) se resuelve en RAM con push_forward.
+    Para cada segmento siguiente [lo, hi) con hi <= 2 lo, ningún divisor propio de
+    un n del segmento cae dentro de él, y las contribuciones de los divisores
+    previos i = n / j llegan por dos vías:
+      - j <= J (pull): Lambda[lo/j : hi/j] se lee contiguo y se resta estridado.
+      - j > J (push): cada i < hi/J no nulo se propaga a sus múltiplos del segmento.
+    Con J ~ sqrt(hi) ambas cuestan O(sqrt(hi)) iteraciones por segmento.
+    """
+    N = len(Lam) - 1
+    M = tamano_segmento(memoria_mb)
+    inv_A1 = 1.0 / semilla_paridad_tramo(1, 2)[0]
+
+    lo = desde
+    if lo == 0:
+        hi = min(N + 1, M)
+        A = semilla_paridad_tramo(0, hi)
+        X = signo * A * _log_tramo(0, hi)
+        Lam[:hi] = push_forward(X, A, umbral)
+        del A, X
+        lo = hi
+
+    progreso = Progreso("inversión segmentada", N, peso=peso_logaritmico)
+    while lo <= N:
+        progreso(lo)
+        hi = min(N + 1, lo + M, 2 * lo)
+        X = signo * semilla_paridad_tramo(lo, hi) * _log_tramo(lo, hi)
+        J = max(2, math.isqrt(hi))
+
+        # Pull: multiplicadores pequeños j, fuentes i en [ceil(lo/j), ceil(hi/j))
+        for j in range(2, J + 1):
+            i0 = -(-lo // j)
+            i1 = -(-hi // j)
+            if i1 <= i0: continue
+            fuente = np.array(Lam[i0:i1])
+            fuente[np.abs(fuente) < umbral] = 0.0
+            a_j = 2.0 if j % 2 == 1 else 1.0
+            X[j * i0 - lo::j][:i1 - i0] -= a_j * fuente
+
+        # Push: divisores pequeños i con multiplicador j > J
+        tope_i = (hi - 1) // (J + 1)
+        bajos = np.array(Lam[:tope_i + 1])
+        for i in np.flatnonzero(np.abs(bajos) >= umbral):
+            i = int(i)
+            if i == 0: continue
+            j0 = max(J + 1, -(-lo // i))
+            j1 = (hi - 1) // i
+            if j1 < j0: continue
+            X[j0 * i - lo:j1 * i - lo + 1:i] -= bajos[i] * semilla_paridad_tramo(j0, j1 + 1)
+
+        Lam[lo:hi] = X * inv_A1
+        lo = hi
+    return Lam
+
+
+def integrar_J_segmentado(Lam, ruta, memoria_mb=512, filtro=0.1):
+    """
+    [EXACTO] J(x) = sum_{n <= x} Lambda_clean(n) / ln n por segmentos, volcado a 'ruta'.
+    Lambda_clean aplica el mismo filtro de ruido (> filtro) que el modo en RAM.
+    """
+    J = np.lib.format.open_memmap(ruta, mode="w+", dtype=np.float64, shape=(len(Lam),))
+    extender_J(Lam, J, 0, memoria_mb, filtro)
+    J.flush()
+    return J
+
+
+def extender_J(Lam, J, desde, memoria_mb=512, filtro=0.1):
+    """Completa J[desde:] continuando la suma acumulada desde J[desde - 1]."""
+    N = len(Lam) - 1
+    M = tamano_segmento(memoria_mb)
+    acumulado = float(J[desde - 1]) if desde > 0 else 0.0
+    progreso = Progreso("J cumsum", N)
+    for lo in range(desde, N + 1, M):
+        progreso(lo)
+        hi = min(N + 1, lo + M)
+        L = np.array(Lam[lo:hi])
+        inv_log = np.zeros(hi - lo)
+        inicio_log = max(lo, 2)
+        if inicio_log < hi:
+            inv_log[inicio_log - lo:] = 1.0 / _log_tramo(inicio_log, hi)
+        tramo = np.cumsum(np.where(L > filtro, L, 0) * inv_log)
+        tramo += acumulado
+        J[lo:hi] = tramo
+        acumulado = float(tramo[-1])
+    return J
+
+
+# --- CACHÉ PERSISTENTE DEL CAMPO ---
+
+# Carpeta por defecto de la caché (sobrescribible con la variable MFN_CACHE).
+DIRECTORIO_CACHE = os.environ.get("MFN_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "mfn"))
+
+
+def _clave_cache(semilla, signo, umbral, filtro):
+    return f"{semilla}_s{signo:+g}_u{umbral:g}_f{filtro:g}"
+
+
+def _abrir_crudo(ruta, n_elementos):
+    """Abre (creando o ampliando el archivo) un vector float64 crudo mapeado en memoria."""
+    with open(ruta, "ab") as f:
+        if f.tell() < n_elementos * 8:
+            f.truncate(n_elementos * 8)
+    return np.memmap(ruta, dtype=np.float64, mode="r+", shape=(n_elementos,))
+
+
+def campo_cacheado(N, directorio=None, signo=1.0, umbral=UMBRAL_PROPAGACION, filtro=0.1,
+                   memoria_mb=512):
+    """
+    [EXACTO] Devuelve (Lambda, J) hasta N desde una caché en disco mapeada en memoria,
+    con clave (semilla, signo, umbral, filtro).
+
+    - N ya cubierto: sólo se mapean los archivos (coste de E/S).
+    - N mayor: los archivos crecen in situ y sólo se resuelve [N_previo + 1, N]
+      con el motor segmentado, reutilizando el prefijo guardado.
+    El N registrado en el .json se actualiza al final, tras volcar los datos.
+    """
+    directorio = directorio or DIRECTORIO_CACHE
+    os.makedirs(directorio, exist_ok=True)
+    clave = _clave_cache("paridad", signo, umbral, filtro)
+    ruta_L = os.path.join(directorio, f"lambda_{clave}.f64")
+    ruta_J = os.path.join(directorio, f"J_{clave}.f64")
+    ruta_meta = os.path.join(directorio, f"campo_{clave}.json")
+
+    N_previo = -1
+    if os.path.exists(ruta_meta):
+        with open(ruta_meta) as f:
+            N_previo = json.load(f)["N"]
+
+    if N > N_previo:
+        print(f"[CACHE] Extendiendo campo {clave} de N={max(N_previo, 0):,} a N={N:,}...")
+        Lam = _abrir_crudo(ruta_L, N + 1)
+        J = _abrir_crudo(ruta_J, N + 1)
+        extender_inversion(Lam, N_previo + 1, memoria_mb, signo, umbral)
+        extender_J(Lam, J, N_previo + 1, memoria_mb, filtro)
+        Lam.flush()
+        J.flush()
+        del Lam, J
+
+        tmp = ruta_meta + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"N": N, "semilla": "paridad", "signo": signo,
+                       "umbral": umbral, "filtro": filtro}, f)
+        os.replace(tmp, ruta_meta)
+    else:
+        print(f"[CACHE] Campo {clave} disponible hasta N={N_previo:,}; mapeando...")
+
+    Lam = np.memmap(ruta_L, dtype=np.float64, mode="r", shape=(N + 1,))
+    J = np.memmap(ruta_J, dtype=np.float64, mode="r", shape=(N + 1,))
+    return Lam, J
@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import math
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage, el pico de RSS se omite
+    resource = None
+
+# --- PERFIL POR ETAPAS (--profile) ---
+#
+# Con el perfil activo cada etapa con nombre emite, al cerrarse, una línea JSON con
+# tiempo de pared y de CPU, memoria (RSS actual y pico del proceso, o pico de
+# tracemalloc dentro de la etapa) y rendimiento en ítems/s. Los bucles largos
+# emiten además líneas de progreso con ETA, como mucho una cada INTERVALO_PROGRESO.
+# Inactivo (por defecto) no escribe nada y cuesta una comprobación por llamada.
+
+# Segundos mínimos entre dos informes de progreso de un mismo bucle.
+INTERVALO_PROGRESO = 2.0
+
+_estado = {"salida": None, "tracemalloc": False, "pila": []}
+
+
+def activar_perfil(destino="-", memoria="rss"):
+    """
+    Activa el perfil. destino: '-' (stderr) o ruta de un archivo JSON lines (se añade).
+    memoria: 'rss' (getrusage, sin coste) o 'tracemalloc' (pico por etapa, más lento).
+    """
+    _estado["salida"] = sys.stderr if destino == "-" else open(destino, "a")
+    _estado["tracemalloc"] = memoria == "tracemalloc"
+    if _estado["tracemalloc"] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def perfil_activo():
+    return _estado["salida"] is not None
+
+
+def agregar_argumento_perfil(parser):
+    """Añade --profile [ARCHIVO] y --profile-memoria a un ArgumentParser."""
+    parser.add_argument("--profile", nargs="?", const="-", default=None, metavar="ARCHIVO",
+                        help="Emite etapas y progreso como JSON lines (a stderr, o añadidas a ARCHIVO)")
+    parser.add_argument("--profile-memoria", choices=["rss", "tracemalloc"], default="rss",
+                        help="Medida de memoria de las etapas del perfil")
+
+
+def configurar_perfil(args):
+    """Activa el perfil si el script se lanzó con --profile."""
+    if getattr(args, "profile", None):
+        activar_perfil(args.profile, args.profile_memoria)
+
+
+def _emitir(registro):
+    salida = _estado["salida"]
+    salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    salida.flush()
+
+
+def _rss_mb():
+    """RSS actual en MB (Linux, /proc); None donde no está disponible."""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError):
+        return None
+
+
+def _rss_pico_mb():
+    """Pico de RSS del proceso en MB (ru_maxrss: KB en Linux, bytes en macOS); None sin 'resource'."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / 2**20 if sys.platform == "darwin" else pico / 2**10, 1)
+
+
+class Etapa:
+    """
+    Tramo con nombre, como gestor de contexto:
+        with Etapa("push-forward", items=N) as e: ...
+    'items' (también asignable dentro del bloque) da el rendimiento en ítems/s.
+    Las etapas anidadas registran a su padre.
+    """
+
+    def __init__(self, nombre, items=None):
+        self.nombre = nombre
+        self.items = items
+        self._pico_hijos = 0
+
+    def __enter__(self):
+        if not perfil_activo():
+            return self
+        pila = _estado["pila"]
+        self._padre = pila[-1] if pila else None
+        pila.append(self)
+        if _estado["tracemalloc"]:
+            self._base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._cpu = time.process_time()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not perfil_activo() or not _estado["pila"] or _estado["pila"][-1] is not self:
+            return False
+        pared = time.perf_counter() - self._inicio
+        cpu = time.process_time() - self._cpu
+        _estado["pila"].pop()
+
+        registro = {"tipo": "etapa", "etapa": self.nombre,
+                    "padre": self._padre.nombre if self._padre else None,
+                    "pared_s": round(pared, 6), "cpu_s": round(cpu, 6)}
+        # Las medidas de RSS no disponibles en la plataforma se omiten del registro
+        for campo, valor in (("rss_mb", _rss_mb()), ("rss_pico_mb", _rss_pico_mb())):
+            if valor is not None:
+                registro[campo] = valor
+        if _estado["tracemalloc"]:
+            # El pico de una etapa incluye el de sus hijas (que reinician el contador)
+            pico = max(tracemalloc.get_traced_memory()[1], self._pico_hijos)
+            registro["mem_pico_mb"] = round((pico - self._base) / 2**20, 3)
+            if self._padre is not None:
+                self._padre._pico_hijos = max(self._padre._pico_hijos, pico)
+        if self.items is not None:
+            registro["items"] = self.items
+            registro["items_s"] = round(self.items / pared, 1) if pared > 0 else None
+        if exc[0] is not None:
+            registro["error"] = exc[0].__name__
+        _emitir(registro)
+        return False
+
+
+class Progreso:
+    """
+    Avance de un bucle largo con ETA: progreso(hecho) informa como mucho cada
+    'intervalo' segundos. 'peso' convierte posiciones en trabajo cuando el coste
+    no es uniforme (p.ej. math.log en el push-forward, donde el índice i cuesta N/i).
+    """
+
+    def __init__(self, nombre, total, peso=None, intervalo=INTERVALO_PROGRESO):
+        self.nombre = nombre
+        self.total = total
+        self.peso = peso
+        self.intervalo = intervalo
+        self._inicio = time.perf_counter()
+        self._ultimo = self._inicio
+
+    def __call__(self, hecho):
+        if _estado["salida"] is None:
+            return
+        ahora = time.perf_counter()
+        if ahora - self._ultimo < self.intervalo:
+            return
+        self._ultimo = ahora
+
+        if self.peso is None:
+            fraccion = hecho / self.total if self.total else 1.0
+        else:
+            fraccion = self.peso(hecho) / self.peso(self.total)
+        fraccion = min(max(fraccion, 0.0), 1.0)
+        transcurrido = ahora - self._inicio
+        eta = transcurrido * (1 - fraccion) / fraccion if fraccion > 0 else None
+        _emitir({"tipo": "progreso", "etapa": self.nombre, "hecho": hecho, "total": self.total,
+                 "fraccion": round(fraccion, 4), "transcurrido_s": round(transcurrido, 3),
+                 "items_s": round(hecho / transcurrido, 1) if transcurrido > 0 else None,
+                 "eta_s": None if eta is None else round(eta, 1)})
+
+
+def peso_logaritmico(n):
+    """Trabajo acumulado ~ ln n de las cribas armónicas (sum N/i)."""
+    return math.log(max(n, 1) + 1)
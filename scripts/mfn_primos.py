@@ -0,0 +1,196 @@
+import math
+import numpy as np
+from functools import lru_cache
+from mpmath import mp
+from scipy.special import expi
+from mfn_tablas import primos_hasta
+
+
+def raiz_entera(x, k):
+    """[EXACTO] floor(x^(1/k)) en aritmética entera (sin error de truncación en potencias perfectas)."""
+    if x < 2 or k == 1:
+        return x
+    # Newton entero desde una cota superior: decrece hasta floor(x^(1/k))
+    r = 1 << -(-x.bit_length() // k)
+    while True:
+        s = ((k - 1) * r + x // r ** (k - 1)) // k
+        if s >= r:
+            return r
+        r = s
+
+
+@lru_cache(maxsize=None)
+def _tope_raiz_int64(k):
+    """c_k = floor((2^63 - 1)^(1/k)): mayor r con r^k representable en int64."""
+    return raiz_entera(2**63 - 1, k)
+
+
+def raices_enteras(n, k):
+    """
+    [EXACTO] floor(n^(1/k)) elemento a elemento para un array int64 no negativo
+    (todo n < 2^63, cualquier k). Estimación en float corregida con potencias enteras
+    exactas. Con c_k = floor((2^63 - 1)^(1/k)): si max(n) < c_k^k, r + 1 <= c_k y las
+    potencias caben en int64; si no, r se acota por c_k y r + 1 > c_k implica
+    (r + 1)^k > n sin calcularlo.
+    """
+    n = np.asarray(n, dtype=np.int64)
+    if k == 1:
+        return n.copy()
+    c_k = _tope_raiz_int64(k)
+    r = np.floor(n.astype(np.float64) ** (1.0 / k)).astype(np.int64)
+    if n.size == 0 or int(n.max()) < c_k ** k:
+        r -= r ** k > n
+        r += (r + 1) ** k <= n
+        return r
+    np.minimum(r, c_k, out=r)
+    r -= r ** k > n
+    siguiente = r + 1
+    r += (siguiente <= c_k) & (np.minimum(siguiente, c_k) ** k <= n)
+    return r
+
+
+def tabla_mobius(K):
+    """[EXACTO] mu(n) para 0 <= n <= K por criba (mu[0] = 0), en int8."""
+    mu = np.ones(K + 1, dtype=np.int8)
+    mu[0] = 0
+    for p in primos_hasta(K):
+        p = int(p)
+        mu[p::p] *= -1
+        mu[p * p::p * p] = 0
+    return mu
+
+
+def pi_en_puntos(J_counts, xs):
+    """
+    [EXACTO] pi(x) = sum_{k <= log2 x} mu(k)/k J(floor(x^(1/k))) en cada x de 'xs'.
+    Sólo lee O(log x) posiciones de J por consulta, así que J puede estar en disco
+    (memmap). Coste: O(#consultas * log x) tras construir J.
+    """
+    xs = [int(x) for x in np.atleast_1d(xs)]
+    max_k = max((x.bit_length() - 1 for x in xs), default=1)
+    mu = tabla_mobius(max(max_k, 1))
+
+    resultado = np.zeros(len(xs))
+    for q, x in enumerate(xs):
+        if x < 2: continue
+        total = 0.0
+        for k in range(1, x.bit_length()):
+            if mu[k] == 0: continue
+            total += float(J_counts[raiz_entera(x, k)]) * int(mu[k]) / k
+        resultado[q] = total
+    return resultado
+
+
+def pi_lucy(x):
+    """[EXACTO] pi(x) combinatorio por la DP de Lucy (ver pi_lucy_tabla)."""
+    if x < 2:
+        return 0
+    return int(pi_lucy_tabla(x)[1])
+
+
+def pi_lucy_tabla(x):
+    """
+    [EXACTO] Tabla de la DP de Lucy (criba de Legendre sobre los valores floor(x/i)):
+    alto[i] = pi(x // i) para 1 <= i <= r = isqrt(x), todos de una pasada.
+    Tiempo O(x^(3/4)), memoria O(sqrt x). Requiere x >= 2.
+
+    S(v) = #{2 <= n <= v : n sin factores < p}; al cribar con el primo p,
+    S(v) -= S(v // p) - S(p - 1) para todo v >= p^2. Los valores v se guardan en
+    dos arrays: 'bajo'[v] para v <= r y 'alto'[i] = S(x // i) para i <= r.
+    Cada primo actualiza todos sus v de una vez leyendo valores previos.
+    """
+    r = raiz_entera(x, 2)
+    i = np.arange(r + 1, dtype=np.int64)
+    bajo = i - 1
+    bajo[0] = 0
+    alto = np.zeros(r + 1, dtype=np.int64)
+    alto[1:] = x // i[1:] - 1
+
+    for p in range(2, r + 1):
+        if bajo[p] == bajo[p - 1]: continue
+        c = bajo[p - 1]
+        p2 = p * p
+
+        # Parte alta: v = x // i >= p^2  <=>  i <= x // p^2
+        # (i p <= r lee de 'alto', el resto de 'bajo'; el corte es un prefijo)
+        tope = min(r, x // p2)
+        k = min(tope, r // p)
+        ip = i[k + 1:tope + 1] * p
+        sub = np.concatenate((alto[p:k * p + 1:p], bajo[x // ip]))
+        alto[1:tope + 1] -= sub - c
+
+        # Parte baja: p^2 <= v <= r
+        if p2 <= r:
+            v = i[p2:]
+            bajo[p2:] -= bajo[v // p] - c
+    return alto
+
+
+def pi_real(x, limite_criba=10**7):
+    """
+    Referencia exacta de pi(x): criba booleana para x pequeño y DP de Lucy por encima.
+    """
+    if x <= limite_criba:
+        sieve = np.ones(x + 1, dtype=bool); sieve[:2] = False
+        for i in range(2, raiz_entera(x, 2) + 1):
+            if sieve[i]: sieve[i*i::i] = False
+        return int(np.sum(sieve))
+    return pi_lucy(x)
+
+
+# --- LINEARIZACIÓN MFN EN LOTE (--aprox) ---
+
+# Constante Gaussiana T_p = 1 + sqrt(pi/2) e^(1/2) erf(1/sqrt 2) (Teorema 4.2)
+TP_GAUSS = 1 + math.sqrt(math.pi / 2) * math.exp(0.5) * math.erf(1 / math.sqrt(2))
+
+# Error relativo de redondeo asumido para scipy.special.expi en float64.
+EPS_LI = 8 * np.finfo(np.float64).eps
+
+
+def pi_aprox_batch(xs, inercia=False, tol=1e-3, dps=30):
+    """
+    [APROX] Linearización MFN para un array de x de una vez:
+        pi(x) ~ sum_{k <= log2 x} mu(k)/k * J(x^(1/k)),   J(y) = Li(y) [- T_p ln ln y]
+    El término de inercia (Sección 12 del paper) se activa con inercia=True.
+
+    Niveles de precisión: todo se evalúa vectorizado en float64 con
+    li(y) = Ei(ln y); sólo los x cuyo error de redondeo estimado supera 'tol'
+    (unidades de pi) se recalculan con mpmath a 'dps' dígitos.
+    """
+    xs = np.atleast_1d(np.asarray(xs, dtype=np.float64))
+    max_k = int(np.log2(max(xs.max(), 2)))
+    mu = tabla_mobius(max_k)
+    log2_x = np.floor(np.log2(np.maximum(xs, 1.0)))
+
+    total = np.zeros(len(xs))
+    magnitud = np.zeros(len(xs))
+    for k in range(1, max_k + 1):
+        if mu[k] == 0: continue
+        activo = log2_x >= k
+        y = xs[activo] ** (1.0 / k)
+        J = expi(np.log(y))
+        if inercia:
+            J = J - TP_GAUSS * np.log(np.log(y))
+        total[activo] += (int(mu[k]) / k) * J
+        magnitud[activo] += np.abs(J) / k
+
+    for q in np.flatnonzero(EPS_LI * magnitud > tol):
+        total[q] = _pi_aprox_mpmath(xs[q], inercia, dps)
+    return total
+
+
+def _pi_aprox_mpmath(x, inercia, dps):
+    """Nivel de alta precisión: la misma suma con mp.li a 'dps' dígitos."""
+    with mp.workdps(dps):
+        x = mp.mpf(x)
+        limit_k = int(mp.floor(mp.log(x, 2)))
+        mu = tabla_mobius(limit_k)
+        total = mp.mpf(0)
+        for k in range(1, limit_k + 1):
+            if mu[k] == 0: continue
+            y = mp.power(x, mp.mpf(1) / k)
+            J = mp.li(y)
+            if inercia:
+                J -= TP_GAUSS * mp.log(mp.log(y))
+            total += mp.mpf(int(mu[k])) / k * J
+        return float(total)
@@ -0,0 +1,88 @@
+import numpy as np
+
+# Resolución por defecto (px de ancho) cuando no se pasa una figura.
+PIXELES_DEFECTO = 1400
+
+
+def pixeles_figura(fig):
+    """Ancho en píxeles de la figura al dpi de guardado."""
+    return int(fig.get_figwidth() * fig.dpi)
+
+
+def envolvente_desde_bins(centros, y_min, y_max):
+    """
+    Convierte un resumen min/max por bin en una polilínea que sube y baja en cada
+    bin: a resolución de píxel es indistinguible del trazo completo.
+    Los bins vacíos (min = +inf) se descartan.
+    """
+    validos = np.isfinite(y_min) & np.isfinite(y_max)
+    x = np.repeat(np.asarray(centros)[validos], 2)
+    y = np.empty(len(x))
+    y[0::2] = np.asarray(y_min)[validos]
+    y[1::2] = np.asarray(y_max)[validos]
+    return x, y
+
+
+def reducir_minmax(x, y, n_pixeles=PIXELES_DEFECTO):
+    """
+    Reduce una serie ordenada en x a su envolvente min/max por píxel.
+    Devuelve (centros, y_min, y_max) con a lo sumo n_pixeles bins.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) == 0:
+        return x, y, y
+    span = x[-1] - x[0]
+    if span <= 0:
+        return x[:1], y.min(keepdims=True), y.max(keepdims=True)
+
+    idx = np.minimum(((x - x[0]) * n_pixeles / span).astype(np.int64), n_pixeles - 1)
+    arranques = np.concatenate(([0], np.flatnonzero(np.diff(idx)) + 1))
+    centros = x[0] + (idx[arranques] + 0.5) * span / n_pixeles
+    return centros, np.minimum.reduceat(y, arranques), np.maximum.reduceat(y, arranques)
+
+
+def envolvente_minmax(x, y, n_pixeles=PIXELES_DEFECTO):
+    """Polilínea min/max lista para plt.plot, con <= 2 * n_pixeles puntos."""
+    return envolvente_desde_bins(*reducir_minmax(x, y, n_pixeles))
+
+
+def lttb(x, y, n_muestras=PIXELES_DEFECTO):
+    """
+    Largest-Triangle-Three-Buckets: elige n_muestras puntos reales de la serie
+    maximizando el área del triángulo con el punto anterior y la media del
+    bucket siguiente. Conserva picos aislados mejor que un submuestreo regular.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    L = len(x)
+    if n_muestras >= L or n_muestras < 3:
+        return x, y
+
+    bordes = np.linspace(1, L - 1, n_muestras - 1).astype(np.int64)
+    elegidos = np.empty(n_muestras, dtype=np.int64)
+    elegidos[0] = 0
+    a = 0
+    for i in range(n_muestras - 2):
+        lo, hi = bordes[i], bordes[i + 1]
+        sig_lo = hi
+        sig_hi = bordes[i + 2] if i + 2 < len(bordes) else L
+        media_x = x[sig_lo:sig_hi].mean()
+        media_y = y[sig_lo:sig_hi].mean()
+
+        area = np.abs((x[a] - media_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (media_y - y[a]))
+        a = lo + int(np.argmax(area))
+        elegidos[i + 1] = a
+    elegidos[-1] = L - 1
+    return x[elegidos], y[elegidos]
+
+
+def reducir_serie(x, y, n_pixeles=PIXELES_DEFECTO, metodo="minmax"):
+    """Aplica el reductor elegido ('minmax', 'lttb' o 'completo')."""
+    if metodo == "minmax":
+        return envolvente_minmax(x, y, n_pixeles)
+    if metodo == "lttb":
+        return lttb(x, y, n_pixeles)
+    if metodo == "completo":
+        return np.asarray(x), np.asarray(y)
+    raise ValueError(f"Método de reducción desconocido: {metodo!r}")
@@ -0,0 +1,430 @@
+import os
+import json
+import time
+import socket
+import asyncio
+import argparse
+import http.client
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from mfn_tablas import preparar_tablas, omega_fast, numero_divisores, factorizar
+from mfn_espectro import T_desde_divisores, T_batch
+from mfn_inversion import generar_semilla_rapida, push_forward, campo_cacheado, lambda_en_punto
+from mfn_primos import tabla_mobius, pi_en_puntos, pi_aprox_batch
+from mfn_perfil import Etapa, agregar_argumento_perfil, configurar_perfil
+
+# --- SERVICIO LOCAL DE CONSULTAS MFN ---
+#
+# Un proceso de larga vida carga (o construye) una vez las tablas d, Omega, mu,
+# Lambda y J hasta N y responde consultas puntuales y por lotes desde memoria, por
+# HTTP/JSON en localhost o en un socket Unix:
+#   GET  /omega?n=12,13          POST /T  {"n": [3, 4, 5]}
+#   GET  /pi?x=1000000           GET  /mersenne?p=31,61
+# Las consultas concurrentes de una misma operación se agrupan en una sola
+# evaluación vectorizada por vuelta del bucle de eventos; los valores fuera de las
+# tablas (factorización, retículo de divisores) van a un pool de procesos.
+
+PUERTO = 8765
+
+# N por defecto de las tablas calientes (~250 MB en total).
+N_SERVICIO = 10**7
+
+# Espera (s) antes de evaluar un lote; 0 = agrupar sólo lo llegado en la misma vuelta.
+VENTANA_LOTE = 0.0
+
+# Plazo (s) de una tarea del pool; al vencer se reinicia el pool y la consulta falla con 504.
+PLAZO_POOL = 30.0
+
+# Mayor exponente aceptado en /mersenne (2^p - 1 se construye entero antes de factorizar).
+LIMITE_P_MERSENNE = 10_000
+
+# Operación -> nombre del parámetro de entrada
+PARAMETROS = {"omega": "n", "d": "n", "mu": "n", "T": "n", "lambda": "n",
+              "mersenne": "p", "pi": "x", "pi_aprox": "x"}
+
+FRASES_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error",
+               504: "Gateway Timeout"}
+
+
+# --- FUERA DE TABLA (se ejecutan en el pool) ---
+
+def _omega_fuera(ns):
+    return [omega_fast(n) for n in ns]
+
+def _d_fuera(ns):
+    return [numero_divisores(n) for n in ns]
+
+def _mu_fuera(ns):
+    resultado = []
+    for n in ns:
+        exps = factorizar(n).values()
+        resultado.append(0 if any(e > 1 for e in exps) else (-1) ** len(exps))
+    return resultado
+
+def _T_fuera(ns):
+    return T_batch(np.array(ns, dtype=np.int64))[0].tolist()
+
+def _lambda_fuera(ns):
+    return [lambda_en_punto(n) for n in ns]
+
+def _mersenne_fuera(ps):
+    return _lambda_fuera([(1 << p) - 1 for p in ps])
+
+_FUERA = {"omega": _omega_fuera, "d": _d_fuera, "mu": _mu_fuera, "T": _T_fuera, "lambda": _lambda_fuera,
+          "mersenne": _mersenne_fuera}
+
+
+class TablasMFN:
+    """
+    Tablas calientes hasta N: d y Omega (criba por bloques), mu (criba), Lambda por
+    push-forward en RAM (o desde la caché persistente de campo_cacheado) y su
+    potencial J filtrado (Lambda > 0.1), con el mismo convenio que los scripts 03/04.
+    """
+
+    def __init__(self, N, cache=None, memoria_mb=512):
+        self.N = N
+        with Etapa("tablas d/Omega", items=N):
+            self.d, self.omega = preparar_tablas(N)
+        with Etapa("tabla mu", items=N):
+            self.mu = tabla_mobius(N)
+        with Etapa("campo Lambda/J", items=N):
+            if cache:
+                self.Lambda, self.J = campo_cacheado(N, cache, memoria_mb=memoria_mb)
+            else:
+                A = generar_semilla_rapida(N)
+                ln_n = np.log(np.maximum(np.arange(N + 1, dtype=np.float64), 1.0))
+                self.Lambda = push_forward(A * ln_n, A)
+                inv_log = np.zeros(N + 1)
+                inv_log[2:] = 1.0 / ln_n[2:]
+                self.J = np.cumsum(np.where(self.Lambda > 0.1, self.Lambda, 0) * inv_log)
+
+    def en_tabla(self, op, ns):
+        """[EXACTO] Evaluación vectorizada de 'op' para un array int64 de índices <= N."""
+        if op == "omega":
+            return self.omega[ns].astype(np.int64)
+        if op == "d":
+            return self.d[ns].astype(np.int64)
+        if op == "mu":
+            return self.mu[ns].astype(np.int64)
+        if op == "lambda":
+            return np.asarray(self.Lambda[ns])
+        if op == "T":
+            return T_desde_divisores(ns, self.d[ns])[0]
+        if op == "pi":
+            return pi_en_puntos(self.J, ns)
+        raise ValueError(f"Operación sin tabla: {op}")
+
+
+class Agrupador:
+    """
+    Cola de una operación: las consultas que llegan mientras el lote está abierto
+    se concatenan, se evalúan con una sola llamada y cada una recibe su tramo, o
+    su propio error: un fallo de una consulta no alcanza a las demás del lote.
+    """
+
+    def __init__(self, servicio, op):
+        self.servicio = servicio
+        self.op = op
+        self.pendientes = []
+        self.abierto = False
+
+    def pedir(self, valores):
+        bucle = asyncio.get_running_loop()
+        futuro = bucle.create_future()
+        self.pendientes.append((valores, futuro))
+        if not self.abierto:
+            self.abierto = True
+            vaciar = lambda: asyncio.ensure_future(self._vaciar())
+            if self.servicio.ventana > 0:
+                bucle.call_later(self.servicio.ventana, vaciar)
+            else:
+                bucle.call_soon(vaciar)
+        return futuro
+
+    async def _vaciar(self):
+        lote, self.pendientes, self.abierto = self.pendientes, [], False
+        try:
+            resultados = await self.servicio.evaluar(self.op, [vals for vals, _ in lote])
+        except Exception as error:
+            resultados = [error] * len(lote)
+        self.servicio.estadisticas["lotes"] += 1
+        for (_, futuro), resultado in zip(lote, resultados):
+            if futuro.done():
+                continue
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+
+class ServicioMFN:
+    """Consultas sobre TablasMFN: en memoria dentro de N, en el pool fuera de N."""
+
+    def __init__(self, tablas, procesos=None, ventana=VENTANA_LOTE, plazo=PLAZO_POOL):
+        self.tablas = tablas
+        self.ventana = ventana
+        self.plazo = plazo
+        self.procesos = procesos or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.procesos)
+        # Una tarea por proceso: el plazo corre desde que la tarea tiene un proceso libre
+        self.cupos = asyncio.Semaphore(self.procesos)
+        self.agrupadores = {op: Agrupador(self, op) for op in PARAMETROS}
+        self.estadisticas = {"consultas": 0, "valores": 0, "lotes": 0, "al_pool": 0,
+                             "plazos_vencidos": 0, "inicio": time.time()}
+
+    def validar(self, op, valores):
+        """ValueError si la consulta no es evaluable; se comprueba antes de entrar en un lote."""
+        if op == "pi_aprox":
+            return
+        if op == "mersenne":
+            if any(not 2 <= p <= LIMITE_P_MERSENNE for p in valores):
+                raise ValueError(f"'mersenne' requiere 2 <= p <= {LIMITE_P_MERSENNE:,}")
+            return
+        minimo = 1 if op in ("T", "mu", "lambda") else 0
+        if any(v < minimo for v in valores):
+            raise ValueError(f"'{op}' requiere valores >= {minimo}")
+        if op == "pi" and any(v > self.tablas.N for v in valores):
+            raise ValueError(f"pi exacto sólo hasta N={self.tablas.N:,} (usar pi_aprox)")
+        if op == "T" and any(v >= 2**63 for v in valores):
+            raise ValueError("'T' requiere n < 2^63")
+
+    async def consultar(self, op, valores):
+        """Punto de entrada (también desde Python): lista de valores -> lista de resultados."""
+        if op not in PARAMETROS:
+            raise KeyError(op)
+        self.validar(op, valores)
+        self.estadisticas["consultas"] += 1
+        self.estadisticas["valores"] += len(valores)
+        return await self.agrupadores[op].pedir(valores)
+
+    def en_memoria(self, op, valores):
+        """Resultados vectorizados de todo lo que cabe en las tablas; None donde hace falta el pool."""
+        if op == "pi_aprox":
+            return pi_aprox_batch(np.array(valores, dtype=np.float64)).tolist()
+        op_tabla = "lambda" if op == "mersenne" else op
+        ns = [(1 << p) - 1 for p in valores] if op == "mersenne" else valores
+        dentro = [i for i, v in enumerate(ns) if v <= self.tablas.N]
+        resultados = [None] * len(valores)
+        if dentro:
+            tabla = self.tablas.en_tabla(op_tabla, np.array([ns[i] for i in dentro], dtype=np.int64))
+            for i, r in zip(dentro, tabla.tolist()):
+                resultados[i] = r
+        return resultados
+
+    async def evaluar(self, op, lote):
+        """
+        Un lote agrupado (lista de consultas, cada una una lista de valores): una
+        evaluación vectorizada en memoria para todo el lote y una tarea del pool con
+        plazo por consulta para sus valores fuera de N. Devuelve, por consulta, su
+        lista de resultados o la excepción que la hizo fallar.
+        """
+        try:
+            planos = self.en_memoria(op, [v for vals in lote for v in vals])
+        except Exception as error:
+            if len(lote) == 1:
+                return [error]
+            # Un fallo inesperado del lote se aísla evaluando cada consulta por separado
+            return [(await self.evaluar(op, [vals]))[0] for vals in lote]
+
+        resultados, tareas, i = [], {}, 0
+        for k, vals in enumerate(lote):
+            resultados.append(planos[i:i + len(vals)])
+            i += len(vals)
+            fuera = [j for j, r in enumerate(resultados[k]) if r is None]
+            if fuera:
+                tareas[k] = fuera
+        if tareas:
+            entradas = [[lote[k][j] for j in fuera] for k, fuera in tareas.items()]
+            self.estadisticas["al_pool"] += sum(len(e) for e in entradas)
+            calculados = await asyncio.gather(*(self.en_pool(_FUERA[op], e) for e in entradas),
+                                              return_exceptions=True)
+            for (k, fuera), calculo in zip(tareas.items(), calculados):
+                if isinstance(calculo, Exception):
+                    resultados[k] = calculo
+                else:
+                    for j, r in zip(fuera, calculo):
+                        resultados[k][j] = r
+        return resultados
+
+    async def en_pool(self, funcion, valores):
+        """
+        funcion(valores) en el pool con plazo self.plazo, contado desde que obtiene
+        un proceso (la espera en cola no cuenta). Un proceso no se puede interrumpir:
+        al vencer el plazo se reinicia el pool (terminando sus procesos) y se lanza
+        TimeoutError. Las tareas ajenas que mueren con él se reintentan una vez.
+        """
+        bucle = asyncio.get_running_loop()
+        async with self.cupos:
+            for intento in range(2):
+                pool = self.pool
+                try:
+                    return await asyncio.wait_for(bucle.run_in_executor(pool, funcion, valores), self.plazo)
+                except asyncio.TimeoutError:
+                    self.estadisticas["plazos_vencidos"] += 1
+                    self.reiniciar_pool(pool)
+                    raise TimeoutError(f"cálculo fuera de tabla sin terminar en {self.plazo:g}s") from None
+                except BrokenProcessPool:
+                    self.reiniciar_pool(pool)
+                    if intento:
+                        raise
+
+    def reiniciar_pool(self, pool):
+        """Sustituye 'pool' (si sigue vigente) por uno nuevo y termina sus procesos."""
+        if pool is not self.pool:
+            return
+        self.pool = ProcessPoolExecutor(max_workers=self.procesos)
+        terminar = getattr(pool, "terminate_workers", None)
+        if terminar is not None:
+            terminar()
+            return
+        for proceso in list((getattr(pool, "_processes", None) or {}).values()):
+            proceso.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- HTTP/JSON ---
+
+    async def despachar(self, metodo, destino, cuerpo):
+        """(estado HTTP, objeto JSON) de una petición."""
+        url = urlsplit(destino)
+        op = url.path.strip("/")
+        if op in ("", "estado"):
+            return 200, dict(self.estadisticas, N=self.tablas.N, operaciones=list(PARAMETROS),
+                             activo_s=time.time() - self.estadisticas["inicio"])
+        if op not in PARAMETROS:
+            return 404, {"error": f"operación desconocida: {op}"}
+
+        nombre = PARAMETROS[op]
+        try:
+            if metodo == "POST":
+                valor = json.loads(cuerpo or b"{}")[nombre]
+            else:
+                valor = [v for texto in parse_qs(url.query)[nombre] for v in texto.split(",")]
+                valor = valor[0] if len(valor) == 1 else valor
+            escalar = not isinstance(valor, list)
+            convertir = float if op == "pi_aprox" else int
+            valores = [convertir(v) for v in ([valor] if escalar else valor)]
+            resultados = await self.consultar(op, valores)
+        except TimeoutError as error:
+            return 504, {"error": f"{type(error).__name__}: {error}"}
+        except (KeyError, ValueError, TypeError, json.JSONDecodeError) as error:
+            return 400, {"error": f"{type(error).__name__}: {error}"}
+        return 200, {"op": op, nombre: valores[0] if escalar else valores,
+                     "resultado": resultados[0] if escalar else resultados}
+
+    async def atender(self, lector, escritor):
+        """Conexión HTTP/1.1 con keep-alive: una petición tras otra hasta que se cierre."""
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                metodo, destino, _ = linea.decode("latin-1").split(" ", 2)
+                cabeceras = {}
+                while True:
+                    cabecera = await lector.readline()
+                    if cabecera in (b"\r\n", b"\n", b""):
+                        break
+                    clave, _, valor = cabecera.decode("latin-1").partition(":")
+                    cabeceras[clave.strip().lower()] = valor.strip()
+                cuerpo = await lector.readexactly(int(cabeceras.get("content-length", 0) or 0))
+
+                try:
+                    estado, respuesta = await self.despachar(metodo, destino, cuerpo)
+                except Exception as error:
+                    estado, respuesta = 500, {"error": f"{type(error).__name__}: {error}"}
+                datos = json.dumps(respuesta).encode()
+                escritor.write(f"HTTP/1.1 {estado} {FRASES_HTTP[estado]}\r\n"
+                               f"Content-Type: application/json\r\nContent-Length: {len(datos)}\r\n\r\n".encode() + datos)
+                await escritor.drain()
+                if cabeceras.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host="127.0.0.1", puerto=PUERTO, unix=None):
+        if unix:
+            servidor = await asyncio.start_unix_server(self.atender, path=unix)
+            print(f"[INFO] Servicio MFN escuchando en {unix} (N={self.tablas.N:,})")
+        else:
+            servidor = await asyncio.start_server(self.atender, host, puerto)
+            print(f"[INFO] Servicio MFN escuchando en http://{host}:{puerto} (N={self.tablas.N:,})")
+        async with servidor:
+            await servidor.serve_forever()
+
+
+# --- CLIENTE ---
+
+class _ConexionUnix(http.client.HTTPConnection):
+    """HTTPConnection sobre un socket Unix (el host sólo va en la cabecera Host)."""
+
+    def __init__(self, ruta):
+        super().__init__("localhost")
+        self.ruta = ruta
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.ruta)
+
+
+class ClienteMFN:
+    """Cliente HTTP bloqueante con conexión persistente, por TCP o por socket Unix ('unix')."""
+
+    def __init__(self, host="127.0.0.1", puerto=PUERTO, unix=None):
+        self.conexion = _ConexionUnix(unix) if unix else http.client.HTTPConnection(host, puerto)
+
+    def consultar(self, op, valores):
+        cuerpo = json.dumps({PARAMETROS[op]: valores})
+        self.conexion.request("POST", "/" + op, cuerpo, {"Content-Type": "application/json"})
+        respuesta = json.loads(self.conexion.getresponse().read())
+        if "error" in respuesta:
+            raise ValueError(respuesta["error"])
+        return respuesta["resultado"]
+
+    def cerrar(self):
+        self.conexion.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de consultas MFN con tablas calientes")
+    parser.add_argument("--N", type=float, default=N_SERVICIO, help="Alcance de las tablas d, Omega, mu, Lambda y J")
+    parser.add_argument("--cache", type=str, default=None, help="Carpeta de la caché persistente de Lambda/J")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--unix", type=str, default=None, help="Socket Unix en vez de TCP (servidor y --consulta)")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool para valores fuera de tabla")
+    parser.add_argument("--ventana", type=float, default=VENTANA_LOTE, help="Segundos de espera para agrupar lotes")
+    parser.add_argument("--plazo", type=float, default=PLAZO_POOL,
+                        help="Segundos máximos de un cálculo fuera de tabla (al vencer se reinicia el pool)")
+    parser.add_argument("--consulta", nargs="+", metavar=("OP", "VALOR"),
+                        help="Cliente: consulta un servicio en marcha (p.ej. --consulta omega 12 13)")
+    agregar_argumento_perfil(parser)
+    args = parser.parse_args()
+    configurar_perfil(args)
+
+    if args.consulta:
+        op, *valores = args.consulta
+        convertir = float if op == "pi_aprox" else int
+        cliente = ClienteMFN(args.host, args.puerto, args.unix)
+        for v, r in zip(valores, cliente.consultar(op, [convertir(v) for v in valores])):
+            print(f"{op}({v}) = {r}")
+        cliente.cerrar()
+        return
+
+    inicio = time.time()
+    tablas = TablasMFN(int(args.N), args.cache)
+    print(f"[INFO] Tablas calientes hasta N={int(args.N):,} en {time.time() - inicio:.2f}s")
+    servicio = ServicioMFN(tablas, args.procesos, args.ventana, args.plazo)
+    try:
+        asyncio.run(servicio.servir(args.host, args.puerto, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
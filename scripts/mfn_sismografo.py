@@ -0,0 +1,269 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy.signal import lfilter
+from mfn_tablas import segmentos_divisores_omega
+from mfn_espectro import T_desde_divisores
+from mfn_perfil import Progreso
+
+# Constantes del modelo (Sección 10 del paper)
+TP_CONST = 2.410142264
+K_MF = 1.5645
+
+# Enteros por tramo del barrido. Acota el error de redondeo de las sumas acumuladas
+# dentro del tramo y la memoria de cada proceso.
+TRAMO_SISMOGRAFO = 1 << 20
+
+# Truncación de T(n) usada por la simulación (la misma que estimar_T).
+TOL_T = 1e-6
+TERMINOS_T = 10
+
+
+def coeficientes_afines(lo, hi, tol=TOL_T, max_terminos=TERMINOS_T):
+    """
+    [EXACTO] Coeficientes de Psi(n) = a_n Psi(n-1) + b_n sobre [lo, hi), lo >= 3.
+      - primo:     a_n = 1/Tp, b_n = 0      [Descarga]
+      - compuesto: a_n = 1,    b_n = T(n)   [Carga]
+    Devuelve (n, es_primo, b); a_n queda implícito en es_primo.
+    """
+    ((n, d, _),) = segmentos_divisores_omega(lo, hi, bloque=hi - lo)
+    es_primo = d == 2
+    b, _ = T_desde_divisores(n, d, tol, max_terminos)
+    b[es_primo] = 0.0
+    return n, es_primo, b
+
+
+def barrido_tramo(es_primo, b, psi_inicial, tp=TP_CONST):
+    """
+    [EXACTO] Aplica la recurrencia afín a un tramo partiendo de psi_inicial.
+
+    Entre dos primos Psi sólo acumula T(n), así que basta una suma acumulada.
+    En cada primo g-ésimo: y_g = (y_{g-1} + S_g) / Tp, con S_g la carga del hueco
+    anterior; es un filtro IIR de orden 1 que lfilter resuelve en C.
+    """
+    C = np.cumsum(b)
+    pos_primos = np.flatnonzero(es_primo)
+
+    # Carga acumulada de cada hueco entre primos consecutivos
+    C_en_primo = C[pos_primos]
+    S = np.diff(C_en_primo, prepend=0.0)
+    if len(S):
+        y, _ = lfilter([1.0 / tp], [1.0, -1.0 / tp], S, zi=[psi_inicial / tp])
+    else:
+        y = S
+
+    # Psi(n) = Psi(último primo <= n) + carga acumulada desde ese primo
+    g = np.cumsum(es_primo)
+    base = np.concatenate(([psi_inicial], y))[g]
+    C_base = np.concatenate(([0.0], C_en_primo))[g]
+    return base + (C - C_base)
+
+
+def mapa_tramo(lo, hi, tp=TP_CONST, tol=TOL_T, max_terminos=TERMINOS_T):
+    """
+    Compone los mapas afines del tramo en uno solo: Psi(hi-1) = A Psi(lo-1) + B.
+    Devuelve (n_primos, B) con A = Tp^(-n_primos).
+    """
+    _, es_primo, b = coeficientes_afines(lo, hi, tol, max_terminos)
+    psi = barrido_tramo(es_primo, b, 0.0, tp)
+    return int(np.count_nonzero(es_primo)), float(psi[-1])
+
+
+def _tramo_con_inicio(args):
+    lo, hi, psi_inicial, tp, tol, max_terminos = args
+    _, es_primo, b = coeficientes_afines(lo, hi, tol, max_terminos)
+    return barrido_tramo(es_primo, b, psi_inicial, tp)
+
+
+def _mapa_tramo_args(args):
+    return mapa_tramo(*args)
+
+
+def tramos(N, tramo=TRAMO_SISMOGRAFO, inicio=3):
+    """Particiona [inicio, N] en intervalos semiabiertos [lo, hi)."""
+    return [(lo, min(lo + tramo, N + 1)) for lo in range(inicio, N + 1, tramo)]
+
+
+def combinar_mapas(mapas, psi_inicial=0.0, tp=TP_CONST):
+    """
+    [EXACTO] Composición secuencial de los mapas de tramo (escaneo de prefijos).
+    Devuelve el Psi de entrada de cada tramo y el Psi final.
+    """
+    entradas = []
+    psi = psi_inicial
+    for n_primos, B in mapas:
+        entradas.append(psi)
+        psi = psi * tp ** (-n_primos) + B
+    return entradas, psi
+
+
+class _SinPool:
+    """Sustituto secuencial de ProcessPoolExecutor (procesos = 1)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, funcion, iterable):
+        return map(funcion, iterable)
+
+
+def simular_sismografo_paralelo(N, procesos=None, tramo=TRAMO_SISMOGRAFO, tp=TP_CONST,
+                                tol=TOL_T, max_terminos=TERMINOS_T):
+    """
+    [EXACTO] Sismógrafo Psi_E como escaneo paralelo de prefijos de mapas afines.
+      1. Cada proceso reduce su tramo a (n_primos, B).
+      2. Se componen los mapas en orden para obtener el Psi de entrada de cada tramo.
+      3. Cada proceso rehace su tramo con la entrada correcta.
+    Mismo resultado que simular_sismografo salvo el orden de redondeo.
+    Devuelve (psi, log_trend) de longitud N+1, con Psi(2) = 0.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    intervalos = tramos(N, tramo)
+    psi = np.zeros(N + 1)
+
+    # Dos pasadas por tramo (mapa y barrido): el progreso cuenta ambas
+    progreso = Progreso("sismógrafo", 2 * len(intervalos))
+    args_mapas = [(lo, hi, tp, tol, max_terminos) for lo, hi in intervalos]
+    with ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else _SinPool() as pool:
+        mapas = []
+        for mapa in pool.map(_mapa_tramo_args, args_mapas):
+            mapas.append(mapa)
+            progreso(len(mapas))
+        entradas, _ = combinar_mapas(mapas, 0.0, tp)
+        bloques = []
+        for bloque in pool.map(_tramo_con_inicio, [(lo, hi, e, tp, tol, max_terminos)
+                                                   for (lo, hi), e in zip(intervalos, entradas)]):
+            bloques.append(bloque)
+            progreso(len(mapas) + len(bloques))
+
+    for (lo, hi), bloque in zip(intervalos, bloques):
+        psi[lo:hi] = bloque
+
+    log_trend = np.zeros(N + 1)
+    log_trend[3:] = K_MF * np.log(np.arange(3, N + 1, dtype=np.float64))
+    return psi, log_trend
+
+
+# --- MODO STREAMING (estado mínimo: (n, Psi(n))) ---
+
+def flujo_sismografo(N, tramo=TRAMO_SISMOGRAFO, desde=3, psi_inicial=0.0, tp=TP_CONST,
+                     tol=TOL_T, max_terminos=TERMINOS_T):
+    """
+    [EXACTO] Generador de bloques (n, Psi(n), residuo) para desde <= n <= N.
+    psi_inicial es Psi(desde - 1): con (desde, psi_inicial) de un checkpoint
+    la simulación continúa exactamente donde quedó. Memoria O(tramo).
+    """
+    psi = psi_inicial
+    for lo, hi in tramos(N, tramo, inicio=desde):
+        n, es_primo, b = coeficientes_afines(lo, hi, tol, max_terminos)
+        bloque = barrido_tramo(es_primo, b, psi, tp)
+        psi = float(bloque[-1])
+        yield n, bloque, bloque - K_MF * np.log(n.astype(np.float64))
+
+
+class ResumenSismografo:
+    """
+    Decimación en línea a un número fijo de bins sobre [inicio, fin]:
+    min / max / media de Psi y del residuo por bin. Memoria O(n_bins).
+    """
+
+    SERIES = ("psi", "residuo")
+
+    def __init__(self, inicio, fin, n_bins=2000):
+        self.inicio = inicio
+        self.fin = fin
+        self.n_bins = n_bins
+        self.cuenta = np.zeros(n_bins, dtype=np.int64)
+        self.datos = {}
+        for serie in self.SERIES:
+            self.datos[serie + "_min"] = np.full(n_bins, np.inf)
+            self.datos[serie + "_max"] = np.full(n_bins, -np.inf)
+            self.datos[serie + "_suma"] = np.zeros(n_bins)
+
+    def bins(self, n):
+        """Índice de bin de cada n (bins de igual anchura en n)."""
+        total = self.fin - self.inicio + 1
+        return ((n - self.inicio) * self.n_bins) // total
+
+    def actualizar(self, n, psi, residuo):
+        """Acumula un bloque ordenado de n; los bins de un bloque son contiguos."""
+        idx = self.bins(n)
+        cortes = np.flatnonzero(np.diff(idx)) + 1
+        arranques = np.concatenate(([0], cortes))
+        b = idx[arranques]
+        self.cuenta[b] += np.diff(np.append(arranques, len(idx)))
+        for serie, valores in zip(self.SERIES, (psi, residuo)):
+            self.datos[serie + "_min"][b] = np.minimum(self.datos[serie + "_min"][b], np.minimum.reduceat(valores, arranques))
+            self.datos[serie + "_max"][b] = np.maximum(self.datos[serie + "_max"][b], np.maximum.reduceat(valores, arranques))
+            self.datos[serie + "_suma"][b] += np.add.reduceat(valores, arranques)
+
+    def centros(self):
+        """n central de cada bin (para graficar)."""
+        total = self.fin - self.inicio + 1
+        return self.inicio + (np.arange(self.n_bins) + 0.5) * total / self.n_bins
+
+    def media(self, serie):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.datos[serie + "_suma"] / self.cuenta
+
+    def a_dict(self):
+        return dict(self.datos, cuenta=self.cuenta,
+                    meta=np.array([self.inicio, self.fin, self.n_bins], dtype=np.int64))
+
+    @classmethod
+    def desde_dict(cls, d):
+        inicio, fin, n_bins = (int(v) for v in d["meta"])
+        resumen = cls(inicio, fin, n_bins)
+        resumen.cuenta = np.array(d["cuenta"])
+        for clave in resumen.datos:
+            resumen.datos[clave] = np.array(d[clave])
+        return resumen
+
+
+def guardar_checkpoint(ruta, n, psi, resumen):
+    """Escritura atómica del estado (n, Psi(n)) más el resumen decimado."""
+    tmp = ruta + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, estado=np.array([n, psi], dtype=np.float64), **resumen.a_dict())
+    os.replace(tmp, ruta)
+
+
+def cargar_checkpoint(ruta):
+    """Devuelve (n, Psi(n), resumen) de un checkpoint guardado."""
+    with np.load(ruta) as d:
+        n, psi = d["estado"]
+        return int(n), float(psi), ResumenSismografo.desde_dict(d)
+
+
+def ejecutar_sismografo(N, n_bins=2000, checkpoint=None, cada=50, tramo=TRAMO_SISMOGRAFO,
+                        tp=TP_CONST, tol=TOL_T, max_terminos=TERMINOS_T):
+    """
+    Corrida en streaming hasta N con memoria constante.
+    Si 'checkpoint' existe y corresponde a la misma corrida, se reanuda desde él;
+    se reescribe cada 'cada' tramos y al terminar. Devuelve el ResumenSismografo.
+    """
+    desde, psi = 3, 0.0
+    resumen = ResumenSismografo(3, N, n_bins)
+    if checkpoint and os.path.exists(checkpoint):
+        n_prev, psi_prev, previo = cargar_checkpoint(checkpoint)
+        if (previo.inicio, previo.fin, previo.n_bins) != (3, N, n_bins):
+            raise ValueError(f"El checkpoint {checkpoint} corresponde a otra corrida "
+                             f"(N={previo.fin}, bins={previo.n_bins})")
+        desde, psi, resumen = n_prev + 1, psi_prev, previo
+        print(f"[INFO] Reanudando desde n={n_prev:,} (Psi={psi:.6f})")
+
+    progreso = Progreso("sismógrafo", N)
+    for i, (n, bloque, residuo) in enumerate(flujo_sismografo(N, tramo, desde, psi, tp, tol, max_terminos), 1):
+        resumen.actualizar(n, bloque, residuo)
+        progreso(int(n[-1]))
+        if checkpoint and i % cada == 0:
+            guardar_checkpoint(checkpoint, int(n[-1]), float(bloque[-1]), resumen)
+            print(f"[INFO] Checkpoint en n={int(n[-1]):,}")
+        desde, psi = int(n[-1]) + 1, float(bloque[-1])
+
+    if checkpoint:
+        guardar_checkpoint(checkpoint, desde - 1, psi, resumen)
+    return resumen
@@ -0,0 +1,337 @@
+import math
+import argparse
+import numpy as np
+from mfn_perfil import Etapa, Progreso, agregar_argumento_perfil, configurar_perfil
+
+# Tamaño de bloque de la criba (elementos). Acota la memoria temporal del núcleo.
+BLOQUE_CRIBA = 1 << 22
+
+# Cotas de dtype a partir de los máximos conocidos de d(n):
+#   max d(n) para n < 10^15 es 26880, para n < 10^17 es 64512.
+# d(2n) <= 2 d(n), por lo que Omega = d(2n) - 4 cabe en int16 si 2N < 10^15.
+LIMITE_D_UINT16 = 10**17
+LIMITE_OMEGA_INT16 = 10**15 // 2
+
+# Caché de tablas calientes para las consultas escalares (ver preparar_tablas).
+_cache = {"d": None, "omega": None}
+
+
+def dtype_divisores(N):
+    """Dtype entero mínimo que contiene d(n) para todo n <= N."""
+    return np.uint16 if N < LIMITE_D_UINT16 else np.uint32
+
+
+def dtype_omega(N):
+    """Dtype entero mínimo que contiene Omega(n) = d(2n) - 4 para todo n <= N."""
+    return np.int16 if N < LIMITE_OMEGA_INT16 else np.int32
+
+
+def primos_hasta(N):
+    """Criba de Eratóstenes clásica. Devuelve los primos <= N como int64."""
+    if N < 2:
+        return np.zeros(0, dtype=np.int64)
+    es_primo = np.ones(N + 1, dtype=bool)
+    es_primo[:2] = False
+    es_primo[4::2] = False
+    for i in range(3, math.isqrt(N) + 1, 2):
+        if es_primo[i]:
+            es_primo[i*i::2*i] = False
+    return np.flatnonzero(es_primo).astype(np.int64)
+
+
+def _bloque_divisores(a, b, primos):
+    """
+    [EXACTO] Núcleo de la criba multiplicativa sobre el intervalo [a, b), a >= 1.
+    'primos' debe contener todos los primos <= isqrt(b - 1).
+
+    Devuelve (d, v2) con d(n) en uint32 y la valuación 2-ádica v2(n) en uint8.
+    La parte factorizada de cada n se acumula por multiplicación; lo que sobra
+    tras los primos pequeños es 1 o un único primo > sqrt(b), que aporta factor 2.
+    """
+    L = b - a
+    d = np.ones(L, dtype=np.uint32)
+    parte = np.ones(L, dtype=np.int64)
+    cuenta = np.zeros(L, dtype=np.uint8)
+    v2 = None
+
+    for p in primos:
+        p = int(p)
+        s = (-a) % p
+        if s >= L:
+            continue
+        pe = p
+        while pe < b:
+            s_e = (-a) % pe
+            if s_e >= L:
+                break
+            cuenta[s_e::pe] += 1
+            parte[s_e::pe] *= p
+            pe *= p
+        if p == 2:
+            v2 = cuenta[s::p].copy()
+        d[s::p] *= cuenta[s::p].astype(np.uint32) + 1
+        cuenta[s::p] = 0
+
+    n = np.arange(a, b, dtype=np.int64)
+    d[parte != n] *= 2
+
+    v2_total = np.zeros(L, dtype=np.uint8)
+    if v2 is not None:
+        v2_total[(-a) % 2::2] = v2
+    return d, v2_total
+
+
+def _omega_desde_d(d, v2):
+    """Omega(n) = d(2n) - 4 = d(n)(v2+2)/(v2+1) - 4, sin cribar hasta 2N."""
+    v = v2.astype(np.int64)
+    return (d.astype(np.int64) * (v + 2)) // (v + 1) - 4
+
+
+def segmentos_divisores_omega(a, b, bloque=BLOQUE_CRIBA):
+    """
+    [EXACTO] Criba segmentada en streaming sobre [a, b), con a >= 1.
+    Genera tuplas (n, d(n), Omega(n)) por bloques de como mucho 'bloque' enteros.
+
+    La memoria queda acotada por el bloque (más los primos <= sqrt(b)), no por b,
+    y el consumidor puede cortar la iteración en cualquier momento.
+    Ej.: for n, d, om in segmentos_divisores_omega(10**12, 10**12 + 10**9): ...
+    """
+    if a < 1 or b < a:
+        raise ValueError(f"Intervalo inválido [{a}, {b}): se requiere 1 <= a <= b")
+    if bloque < 1:
+        raise ValueError(f"El bloque debe ser positivo (recibido {bloque})")
+
+    tipo_d = dtype_divisores(b)
+    tipo_om = dtype_omega(b)
+    primos = primos_hasta(math.isqrt(b - 1)) if b > 1 else primos_hasta(0)
+    for inicio in range(a, b, bloque):
+        fin = min(inicio + bloque, b)
+        d, v2 = _bloque_divisores(inicio, fin, primos)
+        n = np.arange(inicio, fin, dtype=np.int64)
+        yield n, d.astype(tipo_d), _omega_desde_d(d, v2).astype(tipo_om)
+
+
+def tablas_divisores_omega(N, bloque=BLOQUE_CRIBA):
+    """
+    [EXACTO] Construye d(n) y Omega(n) = d(2n) - 4 para todo 0 <= n <= N.
+    Complejidad: O(N log log N), procesado por bloques de tamaño 'bloque'.
+
+    Convención en n = 0: d[0] = 0, Omega[0] = -4 (la misma que daba omega_fast).
+    """
+    d_tab = np.zeros(N + 1, dtype=dtype_divisores(N))
+    om_tab = np.full(N + 1, -4, dtype=dtype_omega(N))
+    if N < 1:
+        return d_tab, om_tab
+
+    for n, d, om in segmentos_divisores_omega(1, N + 1, bloque):
+        d_tab[n[0]:n[-1] + 1] = d
+        om_tab[n[0]:n[-1] + 1] = om
+    return d_tab, om_tab
+
+
+def histograma_omega(a, b, bloque=BLOQUE_CRIBA):
+    """
+    Espectro de Omega sobre [a, b) en memoria constante.
+    Devuelve (conteos, n_primos): conteos[v] = #{n : Omega(n) = v - 4}
+    y el número de primos del intervalo (d(n) = 2, la 'descarga' del sismógrafo).
+    """
+    conteos = np.zeros(0, dtype=np.int64)
+    n_primos = 0
+    progreso = Progreso("histograma Omega", b - a)
+    for n, d, om in segmentos_divisores_omega(a, b, bloque):
+        progreso(int(n[0]) - a)
+        parcial = np.bincount(om.astype(np.int64) + 4)
+        if len(parcial) > len(conteos):
+            conteos = np.pad(conteos, (0, len(parcial) - len(conteos)))
+        conteos[:len(parcial)] += parcial
+        n_primos += int(np.count_nonzero(d == 2))
+    return conteos, n_primos
+
+
+def criba_divisores(N):
+    """Array d(n) para 0 <= n <= N (d[0] = 0)."""
+    return tablas_divisores_omega(N)[0]
+
+
+def criba_omega(N):
+    """Array Omega(n) = d(2n) - 4 para 0 <= n <= N."""
+    return tablas_divisores_omega(N)[1]
+
+
+def criba_radical(N):
+    """Array rad(n) = producto de los primos distintos de n, 0 <= n <= N (rad[0] = 0)."""
+    rad = np.ones(N + 1, dtype=np.int64)
+    rad[0] = 0
+    for p in primos_hasta(N):
+        rad[p::p] *= p
+    return rad
+
+
+def preparar_tablas(N):
+    """
+    Precalienta la caché usada por omega_fast / numero_divisores hasta N.
+    Llamar antes de cualquier bucle sobre rangos para que cada consulta sea O(1).
+    """
+    d_actual = _cache["d"]
+    if d_actual is not None and len(d_actual) > N:
+        return _cache["d"], _cache["omega"]
+    d_tab, om_tab = tablas_divisores_omega(N)
+    _cache["d"] = d_tab
+    _cache["omega"] = om_tab
+    return d_tab, om_tab
+
+
+def parte_impar(n):
+    """Descompone n = i * 2^k y devuelve (i, k). Para n = 0 devuelve (0, 0)."""
+    if n == 0:
+        return 0, 0
+    k = (n & -n).bit_length() - 1
+    return n >> k, k
+
+
+# Primos para la división de prueba previa a Pollard rho.
+_PRIMOS_PEQUENOS = [int(p) for p in primos_hasta(1000)]
+
+# Bases de Miller-Rabin: deterministas para n < 3.3 * 10^24.
+_BASES_MR = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def es_primo_probable(n):
+    """Test de Miller-Rabin (determinista para n < 3.3e24, probabilístico por encima)."""
+    if n < 2:
+        return False
+    for p in _PRIMOS_PEQUENOS[:13]:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _BASES_MR:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _pollard_rho(n):
+    """Encuentra un factor no trivial de n compuesto e impar (variante de Brent)."""
+    for c in range(1, n):
+        y, m, g, r, q = 2, 128, 1, 1, 1
+        f = lambda v: (v * v + c) % n
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = f(y)
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = f(y)
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = f(ys)
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+    raise ArithmeticError(f"Pollard rho no encontró factor de {n}")
+
+
+def factorizar(n):
+    """
+    Factorización completa {p: e} de n >= 1.
+    División de prueba hasta 1000 y Pollard rho + Miller-Rabin para el resto,
+    así que n del orden de 10^30 se factoriza en milisegundos salvo semiprimos duros.
+    """
+    factores = {}
+    for p in _PRIMOS_PEQUENOS:
+        if p * p > n:
+            break
+        while n % p == 0:
+            factores[p] = factores.get(p, 0) + 1
+            n //= p
+    pendientes = [n] if n > 1 else []
+    while pendientes:
+        m = pendientes.pop()
+        if m < 1000 * 1000 or es_primo_probable(m):
+            factores[m] = factores.get(m, 0) + 1
+            continue
+        f = _pollard_rho(m)
+        pendientes += [f, m // f]
+    return factores
+
+
+def divisores_desde_factorizacion(factores):
+    """d(n) = prod (e_p + 1)."""
+    total = 1
+    for e in factores.values():
+        total *= e + 1
+    return total
+
+
+def _divisores_por_factorizacion(n):
+    """d(n) para n >= 1 a partir de su factorización (sin división hasta sqrt(n))."""
+    return divisores_desde_factorizacion(factorizar(n))
+
+
+def numero_divisores(n):
+    """Consulta escalar de d(n). Usa la tabla caliente si n está dentro."""
+    d_tab = _cache["d"]
+    if d_tab is not None and n < len(d_tab):
+        return int(d_tab[n])
+    if n == 0:
+        return 0
+    i, k = parte_impar(n)
+    if d_tab is not None and i < len(d_tab):
+        return (k + 1) * int(d_tab[i])
+    return (k + 1) * _divisores_por_factorizacion(i)
+
+
+def omega_fast(n):
+    """
+    Calcula Omega(n) = d(2n) - 4.
+    Identidad de duplicación: si n = i * 2^k con i impar, Omega(n) = (k+2) d(i) - 4,
+    así que sólo hace falta d de la semilla impar (tabla o factorización).
+    """
+    om_tab = _cache["omega"]
+    if om_tab is not None and n < len(om_tab):
+        return int(om_tab[n])
+    if n == 0:
+        return -4
+    i, k = parte_impar(n)
+    d_tab = _cache["d"]
+    if d_tab is not None and i < len(d_tab):
+        d_i = int(d_tab[i])
+    else:
+        d_i = _divisores_por_factorizacion(i)
+    return (k + 2) * d_i - 4
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Espectro Omega(n) segmentado sobre [a, b)")
+    parser.add_argument("a", type=int, help="Inicio del intervalo (incluido)")
+    parser.add_argument("b", type=int, help="Fin del intervalo (excluido)")
+    parser.add_argument("--bloque", type=int, default=BLOQUE_CRIBA, help="Enteros por segmento")
+    agregar_argumento_perfil(parser)
+    args = parser.parse_args()
+    configurar_perfil(args)
+
+    with Etapa("histograma Omega", items=args.b - args.a):
+        conteos, n_primos = histograma_omega(args.a, args.b, args.bloque)
+    total = int(conteos.sum())
+    print(f"Intervalo [{args.a:,}, {args.b:,}) -> {total:,} enteros, {n_primos:,} primos")
+    print(f"{'OMEGA':<8} | {'CONTEO':<15} | {'FRACCIÓN'}")
+    print("-" * 40)
+    for v in np.flatnonzero(conteos):
+        print(f"{v - 4:<8} | {conteos[v]:<15,} | {conteos[v] / total:.6f}")
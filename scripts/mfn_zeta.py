@@ -0,0 +1,461 @@
+import os
+import numpy as np
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from scipy.special import loggamma, zeta as zeta_scipy
+
+# Tolerancia relativa de las series y fracciones continuas (float64).
+TOL_ZETA = 1e-15
+
+# Máximo de iteraciones de las fracciones continuas / series por punto.
+MAX_ITER_ZETA = 2000
+
+# Iteraciones entre compactaciones del lote activo de la fracción continua.
+COMPACTAR_CADA = 8
+
+
+def _complejo(s):
+    return np.asarray(s, dtype=np.complex128)
+
+
+def estructura_algebraica(s):
+    """[EXACTO] S_alg(s) = 2 + 1.5 * 2^(-s) * (s+1)/(s-1) (Teorema 6.4), vectorizado."""
+    s = _complejo(s)
+    return 2 + 1.5 * 2.0 ** (-s) * ((s + 1) / (s - 1))
+
+
+def impedancia_binaria(s):
+    """[EXACTO] Z_bin(s) = 2 - 2^(-s)."""
+    return 2 - 2.0 ** (-_complejo(s))
+
+
+# --- ONDA COSENO: FORMA CERRADA REGULARIZADA ---
+
+def _expint_fraccion(nu, z):
+    """
+    e^z E_nu(z) por la fracción continua par (Lentz modificado), vectorizado en nu.
+    Los puntos convergidos se retiran del lote cada COMPACTAR_CADA iteraciones.
+    """
+    diminuto = 1e-300
+    h = np.empty(nu.shape, dtype=np.complex128)
+    idx = np.arange(len(nu))
+    b = z + nu
+    c = np.full(nu.shape, 1 / diminuto, dtype=np.complex128)
+    d = 1 / b
+    hh = d.copy()
+    for i in range(1, MAX_ITER_ZETA):
+        a = -i * (nu - 1 + i)
+        b += 2
+        d = 1 / (a * d + b)
+        c = b + a / c
+        delta = c * d
+        hh *= delta
+        if i % COMPACTAR_CADA == 0:
+            hecho = np.abs(delta - 1) < TOL_ZETA
+            h[idx[hecho]] = hh[hecho]
+            sigue = ~hecho
+            idx, nu, b, c, d, hh = idx[sigue], nu[sigue], b[sigue], c[sigue], d[sigue], hh[sigue]
+            if len(idx) == 0:
+                break
+    h[idx] = hh
+    return h
+
+
+def _expint_serie(nu, z):
+    """
+    e^z E_nu(z) = e^z z^(nu-1) Gamma(1-nu) - sum_n z^n / (1-nu)_(n+1).
+    Converge geométricamente sin cancelación cuando |1 - nu| > |z|; el primer
+    término se combina en escala logarítmica (Gamma y z^(nu-1) se compensan).
+    """
+    a = 1 - nu
+    principal = np.exp(z + loggamma(a) + (nu - 1) * np.log(z))
+    termino = 1 / a
+    suma = termino.copy()
+    for n in range(1, MAX_ITER_ZETA):
+        termino = termino * z / (a + n)
+        suma += termino
+        if np.all(np.abs(termino) < TOL_ZETA * np.abs(suma)):
+            break
+    return principal - suma
+
+
+def expint_reescalada(nu, z):
+    """
+    [EXACTO] e^z E_nu(z) para un array de nu complejos y z fijo.
+    Con z = -i w la integral oscilante tiene un punto de silla en u = Im(nu) / w > 1
+    cuando Im(nu) > w (análogo para z = +i w): ahí la fracción continua sólo ve el
+    extremo y se usa la serie de la gamma incompleta inferior.
+    """
+    nu = _complejo(nu)
+    resultado = np.empty(nu.shape, dtype=np.complex128)
+    silla = -np.sign(z.imag) * nu.imag > abs(z)
+    if silla.any():
+        resultado[silla] = _expint_serie(nu[silla], z)
+    if (~silla).any():
+        resultado[~silla] = _expint_fraccion(nu[~silla], z)
+    return resultado
+
+
+def I_osc_coseno(s):
+    """
+    [APROX] I_osc(s) = s int_2^inf R(x) x^(-s-1) dx con R(x) ~ -0.5 cos(pi x),
+    en forma cerrada (Sección 11):
+        -(s pi^s / 4) [(-i)^(-s) Gamma(-s, 2 pi i) + i^(-s) Gamma(-s, -2 pi i)]
+      = -(s / 4) 2^(-s) [E_(s+1)(-2 pi i) + E_(s+1)(2 pi i)]
+    (los factores pi^s y las fases se cancelan con e^(+-2 pi i) = 1). Vectorizado en s.
+    """
+    s = _complejo(s)
+    z = 2j * np.pi
+    return -(s / 4) * 2.0 ** (-s) * (expint_reescalada(s + 1, -z) + expint_reescalada(s + 1, z))
+
+
+# --- ONDA CUADRADA EXACTA: SERIE ALTERNADA ACELERADA ---
+
+# Razón de convergencia de la aceleración CVZ con polinomios de Chebyshev.
+RAZON_CVZ = 3 + np.sqrt(8)
+
+# |t| a partir del cual eta se toma de la zeta de scipy en vez de CVZ.
+LIMITE_T_CVZ = 50.0
+
+# Granularidad de n al agrupar puntos de una malla con el mismo número de términos.
+GRANO_CVZ = 8
+
+# Tabla de ln k (k = 1, 2, ...) compartida por todas las evaluaciones; crece bajo demanda.
+_log_k = {"tabla": np.zeros(0)}
+
+
+def tabla_log_k(n):
+    """ln k para k = 1..n (vista de una tabla precalculada)."""
+    if len(_log_k["tabla"]) < n:
+        _log_k["tabla"] = np.log(np.arange(1, max(n, 2 * len(_log_k["tabla"])) + 1, dtype=np.float64))
+    return _log_k["tabla"][:n]
+
+
+def _log_cota_cvz(s):
+    """
+    ln(2 Gamma(sigma) / |Gamma(s)|): la cota CVZ sin el factor (3 + sqrt 8)^(-n).
+    k^(-s) = int_0^1 y^(k-1) w(y) dy con w = (-ln y)^(s-1) / Gamma(s), e
+    int_0^1 |w| = Gamma(sigma) / |Gamma(s)|. Sólo vale para sigma > 0 (NaN fuera).
+    """
+    s = _complejo(s)
+    sigma = np.where(s.real > 0, s.real, np.nan)
+    return np.log(2) + loggamma(sigma).real - loggamma(s).real
+
+
+def cota_cvz(s, n):
+    """
+    [EXACTO] Cota del error de eta(s) con n términos CVZ (Cohen-Villegas-Zagier),
+    truncamiento más redondeo en float64, para sigma = Re s > 0 (inf si no):
+        2 Gamma(sigma) / (|Gamma(s)| (3 + sqrt 8)^n) + n (|s| ln n + n + 2) eps.
+    El redondeo es el peor caso: fase de exp(-s ln k) con error |s| ln k eps por
+    término (|k^(-s)| <= 1 y |peso| <= 1) y n sumas del producto matricial.
+    """
+    s = _complejo(s)
+    n = np.asarray(n, dtype=np.float64)
+    log_cota = _log_cota_cvz(s) - n * np.log(RAZON_CVZ)
+    redondeo = n * (np.abs(s) * np.log(n) + n + 2) * np.finfo(np.float64).eps
+    return np.exp(np.nan_to_num(log_cota, nan=np.inf)) + redondeo
+
+
+def terminos_cvz(s, tol=TOL_ZETA):
+    """
+    Términos CVZ que usa eta_dirichlet en cada s: mínimo n (>= 8, múltiplo de
+    GRANO_CVZ) con truncamiento de cota_cvz(s, n) < tol. Para sigma <= 0, sin cota, el conteo
+    heurístico ln(1/tol) + pi |t| / 2 + ln(1 + 2|t|) en unidades de ln(3 + sqrt 8).
+    """
+    s = _complejo(s)
+    t = np.abs(s.imag)
+    log_cota = _log_cota_cvz(s)
+    heuristica = np.log(2) + 0.5 * np.pi * t + np.log1p(2 * t)
+    log_cota = np.where(np.isnan(log_cota), heuristica, log_cota) - np.log(tol)
+    n = np.maximum(np.ceil(log_cota / np.log(RAZON_CVZ)), 8).astype(np.int64)
+    return -(-n // GRANO_CVZ) * GRANO_CVZ
+
+
+@lru_cache(maxsize=None)
+def _pesos_cvz(n):
+    """
+    (-1)^k (d_n - d_k) / d_n, k < n, de Cohen-Villegas-Zagier con polinomios de Chebyshev:
+    d_k = n sum_{i <= k} (n+i-1)! 4^i / ((n-i)! (2i)!). Los sumandos crecen como
+    (3 + sqrt 8)^(2i), así que se acumulan en escala logarítmica normalizada.
+    """
+    i = np.arange(1, n + 1)
+    log_t = np.concatenate(([0.0], np.cumsum(np.log(4.0 * (n + i - 1) * (n - i + 1) / ((2 * i - 1) * (2 * i))))))
+    t = np.exp(log_t - log_t.max())
+    cola = np.cumsum(t[::-1])[::-1]
+    pesos = cola[1:] / cola[0] * (-1.0) ** np.arange(n)
+    pesos.flags.writeable = False
+    return pesos
+
+
+def eta_dirichlet(s, tol=TOL_ZETA):
+    """
+    [EXACTO] eta(s) = sum_{k >= 1} (-1)^(k-1) k^(-s) por la aceleración de
+    Cohen-Villegas-Zagier, vectorizada y válida para todo s complejo.
+    n se elige por punto con terminos_cvz (error < tol garantizado para Re s > 0) y
+    los puntos se agrupan por n (múltiplos de GRANO_CVZ) para compartir pesos y la
+    tabla de ln k.
+    """
+    s = _complejo(s)
+    forma = s.shape
+    s = s.ravel()
+    grupo = terminos_cvz(s, tol)
+    eta = np.zeros(len(s), dtype=np.complex128)
+    for n in np.unique(grupo):
+        n = int(n)
+        idx = np.flatnonzero(grupo == n)
+        # Suma matricial por bloques de puntos: exp(-s ln k) con la tabla de ln k
+        pesos = _pesos_cvz(n)
+        log_k = tabla_log_k(n)
+        paso = max(1, (1 << 22) // n)
+        for i in range(0, len(idx), paso):
+            sub = s[idx[i:i + paso]]
+            eta[idx[i:i + paso]] = np.exp(-np.outer(sub, log_k)) @ pesos
+    return eta.reshape(forma)
+
+
+def I_osc_exacta(s):
+    """
+    [EXACTO] I_osc(s) con la onda cuadrada R(x) = 0.5 (-1)^(floor x - 1).
+    Por tramos: s int_k^(k+1) x^(-s-1) dx = k^(-s) - (k+1)^(-s), así que
+        I_osc(s) = 0.5 sum_{k >= 2} (-1)^(k-1) (k^(-s) - (k+1)^(-s)) = eta(s) - 1 + 2^(-s-1).
+    eta por CVZ hasta |t| = LIMITE_T_CVZ (n crece como pi |t| / 2); por encima,
+    eta(s) = (1 - 2^(1-s)) zeta(s) con la zeta compleja de scipy.
+    """
+    s = _complejo(s)
+    eta = np.empty(s.shape, dtype=np.complex128)
+    alto = np.abs(s.imag) > LIMITE_T_CVZ
+    if (~alto).any():
+        eta[~alto] = eta_dirichlet(s[~alto])
+    if alto.any():
+        eta[alto] = (1 - 2.0 ** (1 - s[alto])) * zeta_scipy(s[alto])
+    return eta - 1 + 2.0 ** (-s - 1)
+
+
+def zeta_knuttzen(s, onda="coseno"):
+    """
+    Aproximación de Knuttzen a zeta (Teorema 6.7 y Definición 6.6), válida para
+    Re(s) > 1, con escalares o arrays de s complejos:
+        zeta(s) ~ (S_alg(s) + I_osc(s)) / Z_bin(s)
+    - S_alg / Z_bin: esqueleto algebraico (2 + 3/2^(s+1) (s+1)/(s-1)) / (2 - 2^-s).
+    - I_osc = s int_2^inf R(x) x^(-s-1) dx con la onda 'coseno' (R ~ -0.5 cos(pi x),
+      forma cerrada con gammas incompletas) o 'cuadrada' (R exacta, serie acelerada).
+    """
+    if onda == "coseno":
+        I = I_osc_coseno(s)
+    elif onda == "cuadrada":
+        I = I_osc_exacta(s)
+    else:
+        raise ValueError(f"Onda desconocida: {onda!r} (usar 'coseno' o 'cuadrada')")
+    return (estructura_algebraica(s) + I) / impedancia_binaria(s)
+
+
+# --- ESCÁNER DE RESONANCIAS |S| = |I_osc| ---
+
+# Fracción del espaciado medio entre ceros usada como paso base del barrido.
+FRACCION_PASO = 0.25
+
+# Niveles de subdivisión y sub-celdas por nivel de las celdas sospechosas de ocultar un par
+# de raíces: se separan pares a más de paso / SUBPASOS_REFINADO^PROFUNDIDAD_REFINADO.
+PROFUNDIDAD_REFINADO = 3
+SUBPASOS_REFINADO = 8
+
+# Crecimiento relativo de t dentro de un bloque de la malla con paso constante.
+CRECIMIENTO_BLOQUE = 0.1
+
+
+def balance_resonancia(s):
+    """[EXACTO] f(s) = |S_alg(s)| - |I_osc(s)| (onda cuadrada exacta), vectorizado."""
+    s = _complejo(s)
+    return np.abs(estructura_algebraica(s)) - np.abs(I_osc_exacta(s))
+
+
+def paso_adaptativo(t, fraccion=FRACCION_PASO):
+    """Paso local: fracción del espaciado medio entre ceros de zeta, 2 pi / ln(t / 2 pi)."""
+    t = np.maximum(np.abs(np.asarray(t, dtype=np.float64)), 2 * np.pi * np.e)
+    return fraccion * 2 * np.pi / np.log(t / (2 * np.pi))
+
+
+def malla_adaptativa(t0, t1, fraccion=FRACCION_PASO):
+    """Nodos de t0 a t1 (incluidos) con el paso adaptativo evaluado por tramos."""
+    nodos = [np.array([float(t0)])]
+    t = float(t0)
+    while t < t1:
+        # Un bloque de nodos con el paso del inicio del bloque; el bloque se corta en
+        # t * (1 + CRECIMIENTO_BLOQUE) para que el paso no quede desfasado
+        h = float(paso_adaptativo(t, fraccion))
+        fin = min(t1, max(t * (1 + CRECIMIENTO_BLOQUE), t + h))
+        n = max(1, min(int((fin - t) / h), 4096))
+        bloque = t + h * np.arange(1, n + 1)
+        if bloque[-1] > t1 - 0.5 * h:
+            bloque = np.append(bloque[bloque < t1 - 0.5 * h], t1)
+        nodos.append(bloque)
+        t = float(bloque[-1])
+    return np.concatenate(nodos)
+
+
+def _cambios_de_signo(t, f):
+    """Intervalos [t_i, t_i+1] con cambio de signo de f."""
+    i = np.flatnonzero(np.sign(f[:-1]) * np.sign(f[1:]) < 0)
+    return t[i], t[i + 1], f[i], f[i + 1]
+
+
+def _celdas_sospechosas(t, f):
+    """
+    Celdas [t_i, t_i+1] sin cambio de signo en las que la pendiente más empinada de
+    sus extremos (np.gradient sobre la malla no uniforme) llevaría |f| a cero dentro
+    de la celda: posible par de raíces que el paso no separa, también junto a un
+    cambio de signo (donde un test de mínimo local sobre tres nodos no dispara).
+    """
+    if len(t) < 2:
+        return t[:0], t[:0]
+    d = np.abs(np.gradient(f, t))
+    h = np.diff(t)
+    alcance = h * np.maximum(d[:-1], d[1:])
+    mismo_signo = np.sign(f[:-1]) * np.sign(f[1:]) > 0
+    i = np.flatnonzero(mismo_signo & (np.minimum(np.abs(f[:-1]), np.abs(f[1:])) < alcance))
+    return t[i], t[i + 1]
+
+
+def _illinois(sigma, a, b, fa, fb, xtol, max_iter=100):
+    """Regula falsi de Illinois vectorizada sobre todos los intervalos con cambio de signo."""
+    raiz = 0.5 * (a + b)
+    idx = np.arange(len(a))
+    for _ in range(max_iter):
+        if len(idx) == 0:
+            break
+        c = b - fb * (b - a) / (fb - fa)
+        fc = balance_resonancia(sigma + 1j * c)
+        cruza = np.sign(fc) * np.sign(fb) < 0
+        a = np.where(cruza, b, a)
+        fa = np.where(cruza, fb, 0.5 * fa)
+        b, fb = c, fc
+        hecho = (np.abs(b - a) < xtol) | (fc == 0)
+        raiz[idx[hecho]] = c[hecho]
+        sigue = ~hecho
+        idx, a, b, fa, fb = idx[sigue], a[sigue], b[sigue], fa[sigue], fb[sigue]
+    raiz[idx] = b
+    return raiz
+
+
+def escanear_resonancias(sigma, t0, t1, fraccion=FRACCION_PASO, profundidad=PROFUNDIDAD_REFINADO,
+                         xtol=1e-10):
+    """
+    [EXACTO] Puntos t en [t0, t1) con |S(sigma + i t)| = |I_osc(sigma + i t)|.
+      1. Barrido con paso adaptativo (fracción del espaciado entre ceros de zeta).
+      2. Refinado: cada celda sin cambio de signo cuya pendiente podría llevar |f| a
+         cero se subdivide en SUBPASOS_REFINADO, hasta 'profundidad' niveles.
+      3. Cada cambio de signo se encierra y se resuelve con Illinois vectorizado.
+    Devuelve (t_raices, pendiente) ordenados; pendiente > 0 = la estructura recupera el dominio.
+    """
+    t = malla_adaptativa(t0, t1, fraccion)
+    f = balance_resonancia(sigma + 1j * t)
+    a, b, fa, fb = _cambios_de_signo(t, f)
+    tramos_a, tramos_b, tramos_fa, tramos_fb = [a], [b], [fa], [fb]
+
+    lo, hi = _celdas_sospechosas(t, f)
+    for _ in range(profundidad):
+        if len(lo) == 0:
+            break
+        # Cada celda sospechosa se subdivide en SUBPASOS_REFINADO y se vuelve a examinar
+        pasos = np.linspace(0, 1, SUBPASOS_REFINADO + 1)
+        t_fino = lo[:, None] + (hi - lo)[:, None] * pasos
+        f_fino = balance_resonancia(sigma + 1j * t_fino)
+        nuevos_lo, nuevos_hi = [], []
+        for tf, ff in zip(t_fino, f_fino):
+            a, b, fa, fb = _cambios_de_signo(tf, ff)
+            tramos_a.append(a); tramos_b.append(b); tramos_fa.append(fa); tramos_fb.append(fb)
+            l, h = _celdas_sospechosas(tf, ff)
+            nuevos_lo.append(l); nuevos_hi.append(h)
+        lo = np.concatenate(nuevos_lo)
+        hi = np.concatenate(nuevos_hi)
+
+    a, b = np.concatenate(tramos_a), np.concatenate(tramos_b)
+    fa, fb = np.concatenate(tramos_fa), np.concatenate(tramos_fb)
+    raices = _illinois(sigma, a, b, fa, fb, xtol)
+    orden = np.argsort(raices)
+    raices = raices[orden]
+    pendiente = np.sign(fb - fa)[orden]
+    dentro = (raices >= t0) & (raices < t1)
+    return raices[dentro], pendiente[dentro]
+
+
+def _escanear_args(args):
+    return escanear_resonancias(*args)
+
+
+def particion_t(t0, t1, n_tramos, fraccion=FRACCION_PASO):
+    """Corta [t0, t1] en n_tramos de coste similar (mismo número de nodos de la malla)."""
+    # Nodos por unidad de t ~ 1 / paso: se integra en una malla gruesa
+    t = np.linspace(t0, t1, 4097)
+    densidad = 1 / paso_adaptativo(t, fraccion)
+    coste = np.concatenate(([0.0], np.cumsum(0.5 * (densidad[1:] + densidad[:-1]) * np.diff(t))))
+    cortes = np.interp(coste[-1] * np.arange(1, n_tramos) / n_tramos, coste, t)
+    bordes = np.concatenate(([t0], cortes, [t1]))
+    return list(zip(bordes[:-1], bordes[1:]))
+
+
+def escanear_paralelo(sigma, t0, t1, procesos=None, tramos_por_proceso=4, fraccion=FRACCION_PASO,
+                      profundidad=PROFUNDIDAD_REFINADO, xtol=1e-10):
+    """
+    Reparte [t0, t1) en tramos de coste similar entre un pool de procesos y
+    concatena los catálogos en orden. Mismos argumentos que escanear_resonancias.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    args = [(sigma, lo, hi, fraccion, profundidad, xtol)
+            for lo, hi in particion_t(t0, t1, procesos * tramos_por_proceso, fraccion)]
+    if procesos == 1:
+        partes = [_escanear_args(a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            partes = list(pool.map(_escanear_args, args))
+    return np.concatenate([p[0] for p in partes]), np.concatenate([p[1] for p in partes])
+
+
+# --- VERIFICACIÓN POR INTERVALOS DE GRAM ---
+
+# Muestras por intervalo de Gram (~ un espaciado medio entre ceros) del conteo denso.
+MUESTRAS_GRAM = 256
+
+
+def theta_riemann_siegel(t):
+    """[EXACTO] theta(t) = Im ln Gamma(1/4 + i t/2) - (t/2) ln pi."""
+    t = np.asarray(t, dtype=np.float64)
+    return loggamma(0.25 + 0.5j * t).imag - 0.5 * t * np.log(np.pi)
+
+
+def puntos_gram(t0, t1):
+    """
+    Puntos de Gram g_n en [t0, t1]: theta(g_n) = n pi, por Newton con
+    theta'(t) ~ ln(t / 2 pi) / 2. theta crece desde t ~ 6.3 (g_-1 ~ 9.67).
+    """
+    t0 = max(float(t0), 7.0)
+    if t1 <= t0:
+        return np.zeros(0)
+    n = np.arange(np.ceil(theta_riemann_siegel(t0) / np.pi), np.floor(theta_riemann_siegel(t1) / np.pi) + 1)
+    # Semilla por interpolación en una malla gruesa (theta es monótona en [t0, t1])
+    malla = np.linspace(t0, t1, 4097)
+    g = np.interp(n * np.pi, theta_riemann_siegel(malla), malla)
+    for _ in range(8):
+        g = g - (theta_riemann_siegel(g) - n * np.pi) / (0.5 * np.log(g / (2 * np.pi)))
+    return g[(g >= t0) & (g <= t1)]
+
+
+def verificar_escaneo(sigma, t0, t1, raices, muestras=MUESTRAS_GRAM):
+    """
+    Control de regresión del escáner: cuenta las raíces de 'raices' en cada intervalo
+    entre puntos de Gram de [t0, t1) y las compara con los cambios de signo de f en
+    un barrido denso de 'muestras' puntos por intervalo (paso ~ espaciado / muestras).
+    Devuelve (bordes, conteo_escaneo, conteo_denso); las discrepancias son las celdas
+    con conteos distintos.
+    """
+    bordes = np.unique(np.concatenate(([t0], puntos_gram(t0, t1), [t1])))
+    conteo_escaneo = np.histogram(raices, bins=bordes)[0]
+    conteo_denso = np.zeros(len(bordes) - 1, dtype=np.int64)
+    for i in range(0, len(bordes) - 1, 256):
+        fin = min(i + 256, len(bordes) - 1)
+        lo, hi = bordes[i:fin], bordes[i + 1:fin + 1]
+        t = lo[:, None] + (hi - lo)[:, None] * np.linspace(0, 1, muestras + 1)
+        f = balance_resonancia(sigma + 1j * t)
+        conteo_denso[i:fin] = (np.sign(f[:, :-1]) * np.sign(f[:, 1:]) < 0).sum(axis=1)
+    return bordes, conteo_escaneo, conteo_denso